@@ -0,0 +1,40 @@
+from app.settings import config
+from app.utils.metrics import Sample, metrics
+
+from .base import BaseBackplane
+from .memory import InMemoryBackplane
+from .postgres import PostgresBackplane
+
+
+def get_backplane() -> BaseBackplane:
+    """Создание шины событий по настройкам BACKPLANE_*."""
+    if config.backplane.kind == "postgres":
+        return PostgresBackplane(
+            dsn=config.db.dsn_no_driver,
+            channel=config.backplane.channel,
+            max_payload_size=config.backplane.max_payload_size,
+            reconnect_delay=config.backplane.reconnect_delay,
+        )
+    return InMemoryBackplane()
+
+
+backplane = get_backplane()
+metrics.register_collector(
+    "backplane",
+    lambda: [
+        Sample(
+            "backplane_publish_failures_total",
+            backplane.get_stats()["publish_failures"],
+            "Events not delivered to other workers",
+            "counter",
+        )
+    ],
+)
+
+__all__ = [
+    "BaseBackplane",
+    "InMemoryBackplane",
+    "PostgresBackplane",
+    "backplane",
+    "get_backplane",
+]
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Awaitable, Callable
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+class BaseBackplane:
+    """Шина событий между воркерами приложения.
+
+    Подписчики регистрируются по топику. `publish` одновременно отправляет событие
+    остальным воркерам и доставляет его подписчикам текущего процесса.
+    Воркер не получает обратно свои же события.
+    """
+
+    def __init__(self):
+        self._handlers: dict[str, list[Handler]] = defaultdict(list)
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        """Подписка обработчика на топик."""
+        if handler not in self._handlers[topic]:
+            self._handlers[topic].append(handler)
+
+    def unsubscribe(self, topic: str, handler: Handler) -> None:
+        if handler in self._handlers.get(topic, []):
+            self._handlers[topic].remove(handler)
+
+    async def publish(self, topic: str, payload: dict) -> None:
+        """Публикация события.
+
+        Args:
+            topic (str): топик события
+            payload (dict): данные события, должны сериализоваться в json
+        """
+        # остальные воркеры не должны ждать рассылки по локальным сокетам
+        await asyncio.gather(
+            self._publish_remote(topic, payload), self.dispatch(topic, payload)
+        )
+
+    async def dispatch(self, topic: str, payload: dict) -> None:
+        """Доставка события подписчикам текущего процесса."""
+        for handler in list(self._handlers.get(topic, [])):
+            try:
+                await handler(payload)
+            except Exception as err:
+                logging.exception(f"Backplane handler error on topic {topic}: {err}")
+
+    async def _publish_remote(self, topic: str, payload: dict) -> None:
+        """Отправка события остальным воркерам."""
+
+    def get_stats(self) -> dict:
+        return {"publish_failures": 0}
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
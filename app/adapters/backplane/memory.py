@@ -0,0 +1,8 @@
+from app.adapters.backplane.base import BaseBackplane
+
+
+class InMemoryBackplane(BaseBackplane):
+    """Шина событий в рамках одного процесса.
+
+    Подходит для запуска с одним воркером и для тестов.
+    """
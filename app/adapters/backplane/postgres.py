@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+import time
+from uuid import uuid4
+
+import psycopg
+from psycopg import sql
+
+from app.adapters.backplane.base import BaseBackplane
+
+# через сколько секунд выбрасывать недособранные составные события
+CHUNKS_TTL_SECONDS = 30
+
+
+class PostgresBackplane(BaseBackplane):
+    """Шина событий между воркерами на PostgreSQL LISTEN/NOTIFY.
+
+    Использует два выделенных соединения вне пула приложения: одно слушает канал,
+    второе публикует события. Событие длиннее лимита NOTIFY режется на части,
+    которые отправляются в одной транзакции и собираются на стороне получателя.
+    Полученные события складываются в очередь и доставляются отдельной задачей,
+    чтобы медленная рассылка не мешала читать канал.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        channel: str,
+        max_payload_size: int = 7000,
+        reconnect_delay: float = 1.0,
+    ):
+        super().__init__()
+        self._dsn = dsn
+        self._channel = channel
+        self._max_payload_size = max_payload_size
+        self._reconnect_delay = reconnect_delay
+        self._origin = uuid4().hex
+
+        self._listen_task: asyncio.Task | None = None
+        self._dispatch_task: asyncio.Task | None = None
+        self._events: asyncio.Queue[tuple[str, dict]] = asyncio.Queue()
+        self.publish_failures = 0
+        self._listening = asyncio.Event()
+        self._publish_conn: psycopg.AsyncConnection | None = None
+        self._publish_lock = asyncio.Lock()
+        self._chunks: dict[str, dict] = {}
+
+    async def start(self, timeout: float = 5.0) -> None:
+        if self._listen_task is not None:
+            return
+        self._listening = asyncio.Event()
+        self._dispatch_task = asyncio.create_task(self._dispatch_events())
+        self._listen_task = asyncio.create_task(self._listen())
+        try:
+            await asyncio.wait_for(self._listening.wait(), timeout)
+        except asyncio.TimeoutError:
+            logging.warning(
+                f"Backplane channel {self._channel} is not listened yet, keep retrying in background"
+            )
+
+    async def stop(self) -> None:
+        for task in (self._listen_task, self._dispatch_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._listen_task = None
+        self._dispatch_task = None
+
+        async with self._publish_lock:
+            await self._close_publish_connection()
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    self._dsn, autocommit=True
+                ) as conn:
+                    await conn.execute(
+                        sql.SQL("LISTEN {}").format(sql.Identifier(self._channel))
+                    )
+                    self._listening.set()
+                    logging.info(f"Backplane listens channel {self._channel}")
+                    async for notify in conn.notifies():
+                        event = self.decode(notify.payload)
+                        if event is not None:
+                            self._events.put_nowait(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                self._listening.clear()
+                logging.error(f"Backplane listener error: {err}")
+                await asyncio.sleep(self._reconnect_delay)
+
+    async def _dispatch_events(self) -> None:
+        while True:
+            topic, payload = await self._events.get()
+            await self.dispatch(topic, payload)
+
+    def decode(self, raw: str) -> tuple[str, dict] | None:
+        """Разбор уведомления NOTIFY.
+
+        Возвращает топик и данные события или None, если событие свое,
+        битое или собрано еще не из всех частей.
+        """
+        try:
+            envelope = json.loads(raw)
+        except json.JSONDecodeError:
+            logging.warning(f"Backplane got invalid payload: {raw[:100]}")
+            return None
+
+        if envelope.get("o") == self._origin:
+            return None
+
+        if "m" in envelope:
+            envelope = self._collect_chunk(envelope)
+            if envelope is None:
+                return None
+
+        return envelope["t"], envelope["p"]
+
+    def _collect_chunk(self, chunk: dict) -> dict | None:
+        """Сборка составного события. Возвращает событие, когда пришли все части."""
+        now = time.monotonic()
+        for message_id in [
+            key
+            for key, value in self._chunks.items()
+            if now - value["ts"] > CHUNKS_TTL_SECONDS
+        ]:
+            del self._chunks[message_id]
+
+        collected = self._chunks.setdefault(chunk["m"], {"ts": now, "parts": {}})
+        collected["parts"][chunk["i"]] = chunk["d"]
+        if len(collected["parts"]) < chunk["n"]:
+            return None
+
+        del self._chunks[chunk["m"]]
+        data = "".join(collected["parts"][i] for i in range(chunk["n"]))
+        return json.loads(data)
+
+    def encode(self, topic: str, payload: dict) -> list[str]:
+        """Упаковка события в одно или несколько уведомлений NOTIFY."""
+        data = json.dumps({"o": self._origin, "t": topic, "p": payload}, default=str)
+        if len(data) <= self._max_payload_size:
+            return [data]
+
+        # json.dumps экранирует не-ascii символы, поэтому длина строки равна
+        # длине в байтах, а повторное экранирование увеличит часть не более чем вдвое
+        part_size = self._max_payload_size // 2
+        parts = [data[i : i + part_size] for i in range(0, len(data), part_size)]
+        message_id = uuid4().hex
+        return [
+            json.dumps(
+                {"o": self._origin, "m": message_id, "i": i, "n": len(parts), "d": part}
+            )
+            for i, part in enumerate(parts)
+        ]
+
+    async def _publish_remote(self, topic: str, payload: dict) -> None:
+        notifications = self.encode(topic, payload)
+        async with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    conn = await self._get_publish_connection()
+                    async with conn.transaction():
+                        for notification in notifications:
+                            await conn.execute(
+                                "SELECT pg_notify(%s, %s)",
+                                (self._channel, notification),
+                            )
+                    return
+                except psycopg.Error as err:
+                    logging.error(
+                        f"Backplane publish error on topic {topic} (attempt {attempt + 1}): {err}"
+                    )
+                    await self._close_publish_connection()
+
+        self.publish_failures += 1
+        logging.error(f"Backplane dropped event on topic {topic} for other workers")
+
+    def get_stats(self) -> dict:
+        return {"publish_failures": self.publish_failures}
+
+    async def _get_publish_connection(self) -> psycopg.AsyncConnection:
+        if self._publish_conn is None or self._publish_conn.closed:
+            self._publish_conn = await psycopg.AsyncConnection.connect(
+                self._dsn, autocommit=True
+            )
+        return self._publish_conn
+
+    async def _close_publish_connection(self) -> None:
+        if self._publish_conn is not None:
+            try:
+                await self._publish_conn.close()
+            except psycopg.Error:
+                pass
+            self._publish_conn = None
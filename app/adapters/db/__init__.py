@@ -1,16 +1,46 @@
-from sqlalchemy import NullPool, create_engine
+import time
+
+from sqlalchemy import NullPool, create_engine, event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.adapters.db.pool import (
+    InstrumentedAsyncAdaptedQueuePool,
+    get_pool_metrics,
+    get_pool_stats,
+)
 from app.settings import config
+from app.utils.metrics import metrics
+
+QUERY_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+query_duration = metrics.histogram(
+    "db_query_duration_seconds", "SQL statement duration", ("operation",)
+)
+
+
+def get_async_pool_options() -> dict:
+    """Параметры пула асинхронного движка по настройкам БД"""
+    if config.db.pool_mode == "null":
+        # PgBouncer в режиме transaction не поддерживает prepared statements
+        return {"poolclass": NullPool, "connect_args": {"prepare_threshold": None}}
+
+    return {
+        "poolclass": InstrumentedAsyncAdaptedQueuePool,
+        "pool_size": config.db.pool_size,
+        "max_overflow": config.db.pool_max_overflow,
+        "pool_timeout": config.db.pool_timeout,
+        "pool_recycle": config.db.pool_recycle,
+        "pool_pre_ping": config.db.pool_pre_ping,
+        "connect_args": {"prepare_threshold": config.db.prepare_threshold},
+    }
+
 
 ASYNC_ENGINE = create_async_engine(
     config.db.async_db_uri,
-    pool_pre_ping=True,
-    poolclass=NullPool,
     echo=config.db.echo,
     future=True,
-    connect_args={"prepare_threshold": 0},
+    **get_async_pool_options(),
 )
 ASYNC_SESSION = async_sessionmaker(
     bind=ASYNC_ENGINE,
@@ -20,6 +50,42 @@ ASYNC_SESSION = async_sessionmaker(
     autoflush=False,
 )
 
+
+@event.listens_for(ASYNC_ENGINE.sync_engine, "connect")
+def set_prepared_max(dbapi_connection, connection_record):
+    dbapi_connection.driver_connection.prepared_max = config.db.prepared_max
+
+
+@event.listens_for(ASYNC_ENGINE.sync_engine, "before_cursor_execute")
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.query_started_at = time.perf_counter()
+
+
+@event.listens_for(ASYNC_ENGINE.sync_engine, "after_cursor_execute")
+def observe_query_duration(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, "query_started_at", None)
+    if started_at is None:
+        return
+    query_duration.observe(time.perf_counter() - started_at, query_operation(statement))
+
+
+def query_operation(statement: str) -> str:
+    """Метка запроса по первому слову, число рядов не зависит от текста SQL"""
+    words = statement.lstrip()[:7].split(None, 1)
+    operation = words[0].upper() if words else ""
+    return operation if operation in QUERY_OPERATIONS else "OTHER"
+
+
+def get_db_pool_stats() -> dict:
+    """Статистика пула соединений асинхронного движка"""
+    return get_pool_stats(ASYNC_ENGINE.pool)
+
+
+metrics.register_collector("db_pool", lambda: get_pool_metrics(ASYNC_ENGINE.pool))
+
+
+# синхронный движок нужен только скриптам наполнения БД, пул ему не нужен
 SYNC_ENGINE = create_engine(
     config.db.sync_db_uri,
     echo=config.db.echo,
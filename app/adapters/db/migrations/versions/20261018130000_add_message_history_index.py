@@ -0,0 +1,24 @@
+"""Add message (chat_id, sent_at, id) index
+
+Revision ID: 20261018130000
+Revises: 20261018120000
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018130000'
+down_revision = '20261018120000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_message_chat_id_sent_at_id', 'message', ['chat_id', 'sent_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_message_chat_id_sent_at_id', table_name='message')
@@ -0,0 +1,49 @@
+"""Add chat_stats
+
+Revision ID: 20261018140000
+Revises: 20261018130000
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018140000'
+down_revision = '20261018130000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('chat_stats',
+    sa.Column('chat_id', sa.UUID(), nullable=False),
+    sa.Column('message_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_message_id', sa.UUID(), nullable=True),
+    sa.Column('last_sent_at', sa.DateTime(), nullable=True),
+    sa.Column('id', sa.UUID(), server_default=sa.text('uuid_generate_v4()'), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['chat_id'], ['chat.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['last_message_id'], ['message.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('chat_id')
+    )
+    # счетчики для уже существующих сообщений
+    op.execute(
+        """
+        INSERT INTO chat_stats (chat_id, message_count, last_message_id, last_sent_at)
+        SELECT chat_id,
+               count(*),
+               (array_agg(id ORDER BY sent_at DESC NULLS LAST, id DESC))[1],
+               max(sent_at)
+        FROM message
+        WHERE chat_id IS NOT NULL
+        GROUP BY chat_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('chat_stats')
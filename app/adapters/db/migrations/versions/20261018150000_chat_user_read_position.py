@@ -0,0 +1,79 @@
+"""Replace message_read_status with read position on chat_user
+
+Revision ID: 20261018150000
+Revises: 20261018140000
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018150000'
+down_revision = '20261018140000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('chat_user', sa.Column('last_read_sent_at', sa.DateTime(), nullable=True))
+    op.add_column('chat_user', sa.Column('last_read_message_id', sa.UUID(), nullable=True))
+    # отметка участника - самое позднее прочитанное им сообщение чата
+    op.execute(
+        """
+        UPDATE chat_user
+        SET last_read_sent_at = last_read.sent_at,
+            last_read_message_id = last_read.id
+        FROM (
+            SELECT DISTINCT ON (message.chat_id, message_read_status.profile_id)
+                   message.chat_id,
+                   message_read_status.profile_id,
+                   message.sent_at,
+                   message.id
+            FROM message_read_status
+            JOIN message ON message.id = message_read_status.message_id
+            WHERE message.sent_at IS NOT NULL
+            ORDER BY message.chat_id,
+                     message_read_status.profile_id,
+                     message.sent_at DESC,
+                     message.id DESC
+        ) AS last_read
+        WHERE chat_user.chat_id = last_read.chat_id
+          AND chat_user.profile_id = last_read.profile_id
+        """
+    )
+    op.drop_index(op.f('ix_message_read_status_profile_id'), table_name='message_read_status')
+    op.drop_index(op.f('ix_message_read_status_message_id'), table_name='message_read_status')
+    op.drop_table('message_read_status')
+
+
+def downgrade() -> None:
+    op.create_table('message_read_status',
+    sa.Column('message_id', sa.UUID(), nullable=False),
+    sa.Column('profile_id', sa.UUID(), nullable=False),
+    sa.Column('read_at', sa.DateTime(), nullable=False),
+    sa.Column('id', sa.UUID(), server_default=sa.text('uuid_generate_v4()'), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['message_id'], ['message.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['profile_id'], ['profile.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('message_id', 'profile_id', name='unique_message_user_read')
+    )
+    op.create_index(op.f('ix_message_read_status_message_id'), 'message_read_status', ['message_id'], unique=False)
+    op.create_index(op.f('ix_message_read_status_profile_id'), 'message_read_status', ['profile_id'], unique=False)
+    op.execute(
+        """
+        INSERT INTO message_read_status (message_id, profile_id, read_at)
+        SELECT message.id, chat_user.profile_id, now()
+        FROM chat_user
+        JOIN message ON message.chat_id = chat_user.chat_id
+        WHERE chat_user.last_read_sent_at IS NOT NULL
+          AND message.sender_id IS DISTINCT FROM chat_user.profile_id
+          AND (message.sent_at, message.id)
+              <= (chat_user.last_read_sent_at, chat_user.last_read_message_id)
+        """
+    )
+    op.drop_column('chat_user', 'last_read_message_id')
+    op.drop_column('chat_user', 'last_read_sent_at')
@@ -0,0 +1,40 @@
+"""Add chat_user unread_count
+
+Revision ID: 20261018160000
+Revises: 20261018150000
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018160000'
+down_revision = '20261018150000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('chat_user', sa.Column('unread_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        """
+        UPDATE chat_user
+        SET unread_count = (
+            SELECT count(message.id)
+            FROM message
+            WHERE message.chat_id = chat_user.chat_id
+              AND message.sender_id != chat_user.profile_id
+              AND (
+                  chat_user.last_read_sent_at IS NULL
+                  OR (message.sent_at, message.id)
+                     > (chat_user.last_read_sent_at, chat_user.last_read_message_id)
+              )
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('chat_user', 'unread_count')
@@ -0,0 +1,114 @@
+import time
+from collections import deque
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.utils.metrics import Sample, metrics
+
+pool_wait_duration = metrics.histogram(
+    "db_pool_wait_seconds",
+    "Time to get a connection from the pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+
+
+class PoolStats:
+    """Статистика выдачи соединений из пула"""
+
+    def __init__(self, window_size: int = 1000):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.max_wait = 0.0
+        self._waits: deque[float] = deque(maxlen=window_size)
+
+    def record(self, wait: float, timed_out: bool = False) -> None:
+        self.checkouts += 1
+        if timed_out:
+            self.timeouts += 1
+        self.max_wait = max(self.max_wait, wait)
+        self._waits.append(wait)
+        pool_wait_duration.observe(wait)
+
+    def percentile(self, percent: float) -> float:
+        """Перцентиль ожидания соединения по последним замерам."""
+        if not self._waits:
+            return 0.0
+        ordered = sorted(self._waits)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+        return ordered[index]
+
+    def get_stats(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_p50": self.percentile(50),
+            "wait_p99": self.percentile(99),
+            "wait_max": self.max_wait,
+        }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, замеряющий время ожидания свободного соединения.
+
+    В замер входит и открытие нового соединения сверх `pool_size`.
+    """
+
+    stats = pool_stats
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record(time.perf_counter() - started_at, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - started_at)
+        return connection
+
+
+def get_pool_stats(pool: Pool) -> dict:
+    """Статистика пула: ожидание соединений и текущая загрузка.
+
+    Для NullPool загрузка не считается, каждое соединение открывается заново.
+    """
+    if not isinstance(pool, QueuePool):
+        return {"mode": "null"}
+
+    # max_overflow=-1 снимает лимит, тогда загрузка считается от pool_size
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    checked_out = pool.checkedout()
+    return {
+        "mode": "queue",
+        "size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "utilization": checked_out / capacity if capacity > 0 else 0.0,
+        **pool_stats.get_stats(),
+    }
+
+
+def get_pool_metrics(pool: Pool) -> list[Sample]:
+    """Метрики загрузки пула для /metrics, для NullPool их нет"""
+    stats = get_pool_stats(pool)
+    if stats["mode"] != "queue":
+        return []
+    return [
+        Sample("db_pool_size", stats["size"], "Pool size"),
+        Sample("db_pool_checked_out", stats["checked_out"], "Connections in use"),
+        Sample("db_pool_overflow", stats["overflow"], "Connections over pool size"),
+        Sample(
+            "db_pool_utilization", stats["utilization"], "Share of pool capacity in use"
+        ),
+        Sample(
+            "db_pool_timeouts_total",
+            stats["timeouts"],
+            "Checkouts failed by pool_timeout",
+            "counter",
+        ),
+    ]
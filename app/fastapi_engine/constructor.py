@@ -1,34 +1,39 @@
-import logging
-
 from fastapi import FastAPI
-from starlette.responses import RedirectResponse
+from starlette.responses import PlainTextResponse, RedirectResponse
 
 from app.fastapi_engine.events.error_event import init_error_handler
 from app.fastapi_engine.events.startup import startup_application
-from app.fastapi_engine.middlewares import add_corse_middleware
-from app.fastapi_engine.middlewares.success_middleware import add_meta_middleware
+from app.fastapi_engine.logging_config import setup_logging
+from app.fastapi_engine.middlewares import (
+    add_corse_middleware,
+    add_logging_middleware,
+    add_metrics_middleware,
+)
+from app.fastapi_engine.responses import EnvelopeJSONResponse
 from app.settings import config
+from app.utils.metrics import CONTENT_TYPE, metrics
 
-logging.basicConfig(
-    filename=config.log.access_log_path if config.log.write_to_file else None,
-    encoding="utf-8",
-    level=config.log.logging_level,
-    format=config.log.format,
-)
+setup_logging()
 
 
 def get_fastapi_app() -> FastAPI:
     app = FastAPI(
         **config.app.api_settings,
+        default_response_class=EnvelopeJSONResponse,
         lifespan=startup_application,
     )
 
     add_corse_middleware(app)
-    add_meta_middleware(app)
     init_error_handler(app)
 
-    # if config.log.enable:
-    #     add_logging_middleware(app)
+    if config.log.access_log:
+        add_logging_middleware(app)
+    if config.app.metrics_enabled:
+        add_metrics_middleware(app)
+
+        @app.get(config.app.prefix + "/metrics", include_in_schema=False)
+        async def metrics_endpoint():
+            return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
 
     @app.get("/", include_in_schema=False)
     async def docs_redirect():
@@ -3,6 +3,12 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from app.adapters.backplane import backplane
+from app.fastapi_engine.logging_config import stop_logging
+from app.modules.auth_module.dependencies.token_revocations import token_revocations
+from app.modules.chat_module.services.message_writer import message_writer
+from app.settings import config
+
 
 @asynccontextmanager
 async def startup_application(app: FastAPI):
@@ -26,5 +32,12 @@ async def startup_application(app: FastAPI):
     ChatDBSchema.model_rebuild()
     ProfileDBSchema.model_rebuild()
 
+    await backplane.start()
+    if config.jwt.verify_mode == "signature":
+        await token_revocations.load()
+
     yield
     logging.info("Shutdown application")
+    await message_writer.flush()
+    await backplane.stop()
+    stop_logging()
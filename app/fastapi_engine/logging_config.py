@@ -0,0 +1,45 @@
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from app.settings import config
+
+_listener: QueueListener | None = None
+
+
+def setup_logging():
+    """Настройка корневого логгера по LogSettings.
+
+    При LOG_QUEUE=true запись в поток или файл идет в потоке QueueListener,
+    а код в цикле событий только кладет запись в очередь и не ждет ввода-вывода.
+    """
+    global _listener
+    if logging.getLogger().handlers:
+        # как и basicConfig, уже настроенный логгер не трогаем
+        return
+
+    if config.log.write_to_file:
+        handler = logging.FileHandler(config.log.access_log_path, encoding="utf-8")
+    else:
+        handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(config.log.format))
+    if not config.log.queue:
+        logging.basicConfig(handlers=[handler], level=config.log.logging_level)
+        return
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    # сообщение собирается из аргументов в вызывающем потоке, остальной формат
+    # с временем и модулем накладывает обработчик слушателя
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    logging.basicConfig(handlers=[queue_handler], level=config.log.logging_level)
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    """Запись оставшихся в очереди сообщений и остановка потока слушателя"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
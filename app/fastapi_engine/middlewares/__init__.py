@@ -1,7 +1,11 @@
 from .cors_middleware import add_corse_middleware
-from .log_middleware import add_logging_middleware
+from .log_middleware import LogMiddleware, add_logging_middleware
+from .metrics_middleware import MetricsMiddleware, add_metrics_middleware
 
 __all__ = [
+    "LogMiddleware",
+    "MetricsMiddleware",
     "add_corse_middleware",
     "add_logging_middleware",
+    "add_metrics_middleware",
 ]
@@ -1,15 +1,61 @@
+import codecs
+import hashlib
+import json
 import logging
+import random
 
-from fastapi import FastAPI, Request, Response
-from starlette.background import BackgroundTask
+from fastapi import FastAPI
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.settings import config
 
 
-def log_info(req_body: bytes, res_body: bytes, *args, **kwargs):
+class BodyLog:
+    """Тело запроса или ответа для лога.
+
+    Хранится только начало тела до max_size байт, размер и хэш считаются
+    по всем кускам, поэтому память не зависит от размера тела.
+    """
+
+    def __init__(self, max_size: int, with_hash: bool = False):
+        self.max_size = max_size
+        self.head = bytearray()
+        self.size = 0
+        self.hash = hashlib.sha256() if with_hash else None
+
+    def add(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.hash is not None:
+            self.hash.update(chunk)
+        free = self.max_size - len(self.head)
+        if free > 0:
+            self.head += chunk[:free]
+
+    @property
+    def truncated(self) -> bool:
+        return self.size > len(self.head)
+
+    def to_log(self) -> dict:
+        try:
+            # незаконченный символ на месте обрезки отбрасывается
+            body = codecs.getincrementaldecoder("utf-8")().decode(
+                bytes(self.head), final=not self.truncated
+            )
+        except UnicodeDecodeError:
+            body = bytes(self.head)
+        log_item = {"body": body}
+        if self.truncated:
+            log_item["body_size"] = self.size
+            log_item["body_truncated"] = True
+        if self.hash is not None:
+            log_item["body_sha256"] = self.hash.hexdigest()
+        return log_item
+
+
+def log_info(req_body: BodyLog, res_body: BodyLog, *args, **kwargs):
     log_item = {"Request": {}, "Response": {}}
 
-    log_item["Request"]["headers"] = kwargs["kwargs"].get("req_headers")
     req_headers = kwargs["kwargs"].get("req_headers", {})
     safe_headers = {
         k: v
@@ -17,51 +63,72 @@ def log_info(req_body: bytes, res_body: bytes, *args, **kwargs):
         if k.lower() not in ["authorization", "cookie", "x-api-key"]
     }
     log_item["Request"]["headers"] = safe_headers
+    log_item["Request"].update(req_body.to_log())
     log_item["Response"]["status_code"] = kwargs["kwargs"].get("status_code")
+    log_item["Response"].update(res_body.to_log())
+
+    if config.log.access_json:
+        logging.info(json.dumps(log_item, ensure_ascii=False, default=str))
+    else:
+        logging.info(log_item)
+
+
+class LogMiddleware:
+    """Логирование запроса и ответа на уровне ASGI сообщений.
+
+    Сообщения receive и send передаются дальше сразу, в лог идет начало
+    тел не длиннее access_body_max_size, поэтому стриминг не ломается, а память
+    на запрос ограничена. Запросы логируются выборочно по access_sample_rate
+    и access_sample_routes.
+    """
 
-    try:
-        log_item["Request"]["body"] = req_body.decode("utf-8")
-    except UnicodeDecodeError:
-        log_item["Request"]["body"] = req_body
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-    try:
-        log_item["Response"]["body"] = res_body.decode("utf-8")
-    except UnicodeDecodeError:
-        log_item["Response"]["body"] = res_body
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.sampled(scope["path"]):
+            await self.app(scope, receive, send)
+            return
 
-    logging.info(log_item)
+        max_size = config.log.access_body_max_size
+        with_hash = config.log.access_body_hash
+        req_body, res_body = BodyLog(max_size, with_hash), BodyLog(max_size, with_hash)
+        response = {}
 
+        async def receive_with_log() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                req_body.add(message.get("body", b""))
+            return message
 
-async def log_middleware(request: Request, call_next):
-    task = None
-    req_body = await request.body()
-    response = await call_next(request)
+        async def send_with_log(message: Message):
+            if message["type"] == "http.response.start":
+                response["status_code"] = message["status"]
+                response["headers"] = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                res_body.add(message.get("body", b""))
+            await send(message)
 
-    res_body = b""
-    async for chunk in response.body_iterator:
-        res_body += chunk
+        await self.app(scope, receive_with_log, send_with_log)
 
-    if request.url.path not in config.app.no_log:
-        task = BackgroundTask(
-            log_info,
+        log_info(
             req_body,
             res_body,
             kwargs={
-                "req_headers": dict(request.headers),
-                "resp_headers": dict(response.headers),
-                "status_code": response.status_code,
+                "req_headers": dict(Headers(scope=scope)),
+                "resp_headers": dict(Headers(raw=response.get("headers", []))),
+                "status_code": response.get("status_code"),
             },
         )
 
-    return Response(
-        content=res_body,
-        status_code=response.status_code,
-        headers=dict(response.headers),
-        media_type=response.media_type,
-        background=task,
-    )
+    @staticmethod
+    def sampled(path: str) -> bool:
+        if path in config.app.no_log:
+            return False
+        rate = config.log.access_sample_rate_for(path)
+        return rate >= 1 or random.random() < rate
 
 
 def add_logging_middleware(app: FastAPI):
     logging.warning("LoggingMiddleware Enabled")
-    app.middleware("http")(log_middleware)
+    app.add_middleware(LogMiddleware)
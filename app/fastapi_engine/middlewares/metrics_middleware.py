@@ -0,0 +1,50 @@
+import time
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import metrics
+
+http_request_duration = metrics.histogram(
+    "http_request_duration_seconds",
+    "HTTP request duration by route template",
+    ("method", "route", "status"),
+)
+
+
+class MetricsMiddleware:
+    """Время HTTP запросов по шаблону маршрута.
+
+    Метка route берется из шаблона найденного маршрута (/chats/{chat_id}/),
+    а не из пути, поэтому число рядов не растет с числом чатов. Запросы мимо
+    маршрутов попадают в route="unmatched".
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_request_duration.observe(
+                time.perf_counter() - started_at, scope["method"], route, str(status)
+            )
+
+
+def add_metrics_middleware(app: FastAPI):
+    app.add_middleware(MetricsMiddleware)
@@ -0,0 +1,20 @@
+from typing import Any
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+
+class EnvelopeJSONResponse(JSONResponse):
+    """Ответ по умолчанию с метаинформацией об успешном ответе.
+
+    new_body = {"status": "success", "data": body_response}
+
+    Обертка добавляется до сериализации, поэтому тело сериализуется один раз.
+    Ответы, которые роут вернул сам (HTML, редирект, стриминг, JSONResponse),
+    и ответы с кодом, отличным от 200, не меняются.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if self.status_code == status.HTTP_200_OK:
+            content = {"status": "success", "data": content}
+        return super().render(content)
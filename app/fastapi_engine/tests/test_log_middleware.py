@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from app.fastapi_engine.middlewares import LogMiddleware, log_middleware
+from app.settings import config
+
+
+async def call_app(app, path: str, body: bytes = b"") -> list[dict]:
+    """Вызов ASGI приложения, возвращает отправленные сообщения"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"authorization", b"Bearer secret"),
+        ],
+        "server": ("test", 80),
+        "client": ("test", 1),
+    }
+    requests = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if requests:
+            return requests.pop(0)
+        # клиент не отключается, пока не получит ответ
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent
+
+
+class TestLogMiddleware:
+    """Тесты ASGI логирования запросов"""
+
+    @pytest.fixture
+    def app(self):
+        app = FastAPI()
+
+        @app.post("/echo")
+        async def echo(data: dict):
+            return data
+
+        @app.post("/stream")
+        async def stream():
+            return StreamingResponse(iter([b"first,", b"second"]))
+
+        return LogMiddleware(app)
+
+    @pytest.fixture
+    def log_items(self, monkeypatch):
+        items = []
+        monkeypatch.setattr(logging, "info", items.append)
+        return items
+
+    async def test_request_and_response_logged(self, app, log_items):
+        await call_app(app, "/echo", b'{"text": "hello"}')
+
+        (item,) = log_items
+        assert item["Request"]["body"] == '{"text": "hello"}'
+        assert item["Request"]["headers"] == {"content-type": "application/json"}
+        assert item["Response"] == {"status_code": 200, "body": '{"text":"hello"}'}
+
+    async def test_streaming_passes_through(self, app, log_items):
+        """Тест, что куски ответа уходят клиенту по мере готовности"""
+        sent = await call_app(app, "/stream")
+
+        chunks = [m["body"] for m in sent if m["type"] == "http.response.body"]
+        assert chunks[:2] == [b"first,", b"second"]
+        assert log_items[0]["Response"]["body"] == "first,second"
+
+    async def test_no_log_path(self, app, log_items, monkeypatch):
+        monkeypatch.setattr(type(config.app), "no_log", ["/echo"])
+
+        sent = await call_app(app, "/echo", b"{}")
+
+        assert sent[0]["status"] == 200
+        assert log_items == []
+
+    async def test_body_truncated(self, app, log_items, monkeypatch):
+        """Тест, что в лог попадает только начало тела"""
+        monkeypatch.setattr(config.log, "access_body_max_size", 13)
+        monkeypatch.setattr(config.log, "access_body_hash", True)
+        body = '{"text": "привет"}'.encode()
+
+        await call_app(app, "/echo", body)
+
+        request = log_items[0]["Request"]
+        # обрезка пришлась на середину "р", незаконченный символ отброшен
+        assert request["body"] == '{"text": "п'
+        assert request["body_size"] == len(body)
+        assert request["body_truncated"] is True
+        assert request["body_sha256"] == hashlib.sha256(body).hexdigest()
+
+    async def test_json_mode(self, app, log_items, monkeypatch):
+        monkeypatch.setattr(config.log, "access_json", True)
+
+        await call_app(app, "/echo", b'{"text": "hello"}')
+
+        assert json.loads(log_items[0])["Response"]["status_code"] == 200
+
+    @pytest.mark.parametrize(("path", "logged"), [("/echo", False), ("/stream", True)])
+    async def test_sampling_by_route(self, app, log_items, monkeypatch, path, logged):
+        monkeypatch.setattr(config.log, "access_sample_rate", 0.5)
+        monkeypatch.setattr(
+            config.log, "access_sample_routes", {"/e": 0, "/echo": 0.1}
+        )
+        monkeypatch.setattr(log_middleware.random, "random", lambda: 0.2)
+
+        await call_app(app, path, b"{}")
+
+        assert bool(log_items) is logged
@@ -0,0 +1,50 @@
+import logging
+from logging.handlers import QueueHandler
+
+import pytest
+
+from app.fastapi_engine.logging_config import setup_logging, stop_logging
+from app.settings import config
+
+
+class TestLoggingConfig:
+    """Тесты настройки корневого логгера"""
+
+    @pytest.fixture
+    def log_path(self, tmp_path, monkeypatch):
+        root = logging.getLogger()
+        level = root.level
+        path = tmp_path / "access.log"
+        monkeypatch.setattr(config.log, "write_to_file", True)
+        monkeypatch.setattr(config.log, "access_log_path", str(path))
+        monkeypatch.setattr(config.log, "format", "%(levelname)s | %(message)s")
+        yield path
+        stop_logging()
+        for handler in root.handlers:
+            handler.close()
+        root.setLevel(level)
+
+    def test_queue(self, log_path, monkeypatch):
+        """Тест, что запись уходит через очередь и форматируется один раз"""
+        monkeypatch.setattr(config.log, "queue", True)
+        # обработчики pytest добавляются к корневому логгеру на время теста
+        monkeypatch.setattr(logging.getLogger(), "handlers", [])
+
+        setup_logging()
+        (handler,) = logging.getLogger().handlers
+        logging.info("User %s joined chat %s", "user", "chat")
+        stop_logging()
+
+        assert isinstance(handler, QueueHandler)
+        assert log_path.read_text() == "INFO | User user joined chat chat\n"
+
+    def test_without_queue(self, log_path, monkeypatch):
+        monkeypatch.setattr(config.log, "queue", False)
+        monkeypatch.setattr(logging.getLogger(), "handlers", [])
+
+        setup_logging()
+        (handler,) = logging.getLogger().handlers
+        logging.warning("Chat.ID %s Not Found", "chat")
+
+        assert isinstance(handler, logging.FileHandler)
+        assert log_path.read_text() == "WARNING | Chat.ID chat Not Found\n"
@@ -0,0 +1,133 @@
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.adapters.db import query_operation
+from app.fastapi_engine.middlewares import MetricsMiddleware
+from app.fastapi_engine.middlewares.metrics_middleware import http_request_duration
+from app.utils.metrics import MetricsRegistry, Sample
+
+
+class TestMetricsRegistry:
+    """Тесты текстового формата метрик"""
+
+    def test_counter(self):
+        registry = MetricsRegistry()
+        events = registry.counter("events_total", "Events", ("type",))
+        events.inc("typing")
+        events.inc("typing")
+        events.inc('say "hi"\n')
+
+        assert registry.render().splitlines() == [
+            "# HELP events_total Events",
+            "# TYPE events_total counter",
+            'events_total{type="typing"} 2',
+            'events_total{type="say \\"hi\\"\\n"} 1',
+        ]
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        duration = registry.histogram("duration_seconds", "Duration", buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            duration.observe(value)
+
+        lines = registry.render().splitlines()
+
+        assert lines[2:] == [
+            'duration_seconds_bucket{le="0.1"} 2',
+            'duration_seconds_bucket{le="1"} 3',
+            'duration_seconds_bucket{le="+Inf"} 4',
+            "duration_seconds_sum 3.65",
+            "duration_seconds_count 4",
+        ]
+
+    def test_same_name_returns_same_metric(self):
+        registry = MetricsRegistry()
+
+        assert registry.counter("events_total", "Events") is registry.counter(
+            "events_total", "Events"
+        )
+
+    def test_collector_samples_share_header(self):
+        registry = MetricsRegistry()
+        registry.register_collector(
+            "queue",
+            lambda: [
+                Sample("queue_events_total", 1, "Events", "counter", {"event": "a"}),
+                Sample("queue_events_total", 2, kind="counter", labels={"event": "b"}),
+                Sample("queue_size", 0.5, "Size"),
+            ],
+        )
+
+        assert registry.render().splitlines() == [
+            "# HELP queue_events_total Events",
+            "# TYPE queue_events_total counter",
+            'queue_events_total{event="a"} 1',
+            'queue_events_total{event="b"} 2',
+            "# HELP queue_size Size",
+            "# TYPE queue_size gauge",
+            "queue_size 0.5",
+        ]
+
+
+class TestMetricsMiddleware:
+    """Тесты замера HTTP запросов"""
+
+    @pytest.fixture
+    async def client(self):
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/metrics-test/{chat_id}/")
+        async def get_chat(chat_id: int):
+            return {"id": chat_id}
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            yield client
+
+    async def test_route_template_label(self, client):
+        labels = ("GET", "/metrics-test/{chat_id}/", "200")
+        before = http_request_duration.count(*labels)
+
+        await client.get("/metrics-test/1/")
+        await client.get("/metrics-test/2/")
+
+        assert http_request_duration.count(*labels) == before + 2
+
+    async def test_unmatched_route(self, client):
+        labels = ("GET", "unmatched", "404")
+        before = http_request_duration.count(*labels)
+
+        await client.get("/metrics-test/1/unknown")
+
+        assert http_request_duration.count(*labels) == before + 1
+
+
+@pytest.mark.parametrize(
+    "statement, operation",
+    [
+        ("SELECT chat.id FROM chat", "SELECT"),
+        ("\n  insert into message (id) VALUES (%s)", "INSERT"),
+        ("WITH page AS (SELECT 1) SELECT * FROM page", "OTHER"),
+        ("", "OTHER"),
+    ],
+)
+def test_query_operation(statement, operation):
+    assert query_operation(statement) == operation
+
+
+async def test_metrics_endpoint(app, client):
+    await client.get(app.url_path_for("healthcheck:get"))
+
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/healthcheck/"' in body
+    assert 'db_query_duration_seconds_count{operation="SELECT"}' in body
+    assert "ws_active_sockets 0" in body
+    assert "auth_token_cache_hits_total" in body
+    assert "chat_dedup_blocked_total" in body
@@ -0,0 +1,76 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from app.fastapi_engine.responses import EnvelopeJSONResponse
+from app.modules.auth_module.api.routes.auth import login_swager, router
+from app.modules.base_module.schemas.base import BaseSchema
+
+
+class ItemSchema(BaseSchema):
+    item_name: str
+
+
+class TestEnvelopeJSONResponse:
+    """Тесты обертки успешных ответов"""
+
+    @pytest.fixture
+    async def client(self):
+        app = FastAPI(default_response_class=EnvelopeJSONResponse)
+
+        @app.get("/item", response_model=ItemSchema)
+        async def get_item():
+            return {"item_name": "чат"}
+
+        @app.post("/item", status_code=201)
+        async def create_item():
+            return {"id": 1}
+
+        @app.get("/html")
+        async def get_html():
+            return HTMLResponse("<p>chat</p>")
+
+        @app.get("/stream")
+        async def get_stream():
+            return StreamingResponse(iter([b'{"a"', b": 1}"]))
+
+        @app.get("/raw")
+        async def get_raw():
+            return JSONResponse({"access_token": "token"})
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            yield client
+
+    async def test_success_envelope(self, client):
+        response = await client.get("/item")
+
+        assert response.json() == {"status": "success", "data": {"itemName": "чат"}}
+        assert response.headers["content-length"] == str(len(response.content))
+
+    async def test_not_ok_status(self, client):
+        response = await client.post("/item")
+
+        assert response.status_code == 201
+        assert response.json() == {"id": 1}
+
+    @pytest.mark.parametrize(
+        ("path", "body"),
+        [
+            ("/html", b"<p>chat</p>"),
+            ("/stream", b'{"a": 1}'),
+            ("/raw", b'{"access_token":"token"}'),
+        ],
+    )
+    async def test_returned_response_untouched(self, client, path, body):
+        """Тест, что ответы, собранные роутом, не оборачиваются"""
+        response = await client.get(path)
+
+        assert response.content == body
+
+    def test_swagger_login_not_wrapped(self):
+        (route,) = [r for r in router.routes if r.endpoint is login_swager]
+
+        assert route.response_class is JSONResponse
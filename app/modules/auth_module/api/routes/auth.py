@@ -8,6 +8,7 @@ from fastapi import (
     Request,
     Response,
 )
+from fastapi.responses import JSONResponse
 
 from app.dependencies.services_dependency import get_service
 from app.modules.auth_module.dependencies.jwt_decode import (
@@ -40,7 +41,8 @@ router = APIRouter()
 router = APIRouter()
 
 
-@router.post("/sign-in/swagger/", include_in_schema=False)
+# свагер ждет токен без обертки {"status": "success", "data": ...}
+@router.post("/sign-in/swagger/", include_in_schema=False, response_class=JSONResponse)
 async def login_swager(
     response: Response,
     form_data: Annotated[OAuth2EmailRequestForm, Depends()],
@@ -1,2 +1,3 @@
 from .account_crud import AccountCRUD
 from .account_session_crud import AccountSessionCRUD
+from .revoked_token_crud import RevokedTokenCRUD
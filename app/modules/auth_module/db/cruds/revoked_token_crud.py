@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.auth_module.db.models.account import RevokedTokenModel
+from app.modules.auth_module.schemas.account_session import (
+    RevokedTokenDBSchema,
+    RevokedTokenSchema,
+)
+from app.modules.base_module.db.cruds.base_crud import BaseCRUD
+
+
+class RevokedTokenCRUD(
+    BaseCRUD[RevokedTokenSchema, RevokedTokenDBSchema, RevokedTokenModel]
+):
+    _in_schema = RevokedTokenSchema
+    _out_schema = RevokedTokenDBSchema
+    _table = RevokedTokenModel
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def revoke(self, tokens: list[RevokedTokenSchema]):
+        """Запись отозванных токенов, повторный отзыв игнорируется"""
+        if not tokens:
+            return
+        query = (
+            insert(self._table)
+            .values([token.model_dump() for token in tokens])
+            .on_conflict_do_nothing(index_elements=[self._table.token_hash])
+        )
+        await self.session.execute(query)
+
+    async def get_active(self) -> list[tuple[str, datetime]]:
+        """Хэши и сроки действия еще не истекших отозванных токенов"""
+        query = select(self._table.token_hash, self._table.expires_at).where(
+            self._table.expires_at > datetime.now()
+        )
+        result = await self.session.execute(query)
+        return [tuple(row) for row in result.all()]
+
+    async def delete_expired(self):
+        query = delete(self._table).where(self._table.expires_at <= datetime.now())
+        await self.session.execute(query)
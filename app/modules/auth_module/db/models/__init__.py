@@ -1 +1 @@
-from .account import AccountModel, AccountSessionModel
+from .account import AccountModel, AccountSessionModel, RevokedTokenModel
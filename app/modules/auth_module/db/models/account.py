@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import TYPE_CHECKING
 from uuid import UUID
 
@@ -13,6 +14,7 @@ if TYPE_CHECKING:
 
 class AccountModel(Base):
     __tablename__ = "account"
+    __table_args__ = {"extend_existing": True}
 
     email: Mapped[str] = mapped_column(unique=True)
     password: Mapped[str]
@@ -20,13 +22,16 @@ class AccountModel(Base):
     is_confirmed: Mapped[bool] = mapped_column(default=False)
     confirmation_token: Mapped[str | None] = mapped_column(String(300))
 
-    sessions: Mapped[list["AccountSessionModel"] | None] = relationship(
+    sessions: Mapped[
+        list["app.modules.auth_module.db.models.account.AccountSessionModel"] | None
+    ] = relationship(
         lazy="joined", cascade="all, delete-orphan"
     )
 
 
 class AccountSessionModel(Base):
     __tablename__ = "account_session"
+    __table_args__ = {"extend_existing": True}
 
     refresh_token: Mapped[str] = mapped_column(String(300), unique=True)
     access_token: Mapped[str] = mapped_column(String(300), unique=True)
@@ -34,3 +39,14 @@ class AccountSessionModel(Base):
     account_id: Mapped[UUID] = mapped_column(
         FK("account.id", ondelete="CASCADE"), index=True
     )
+
+
+class RevokedTokenModel(Base):
+    """Отозванные, но еще не истекшие токены удаленных и замененных сессий"""
+
+    __tablename__ = "revoked_token"
+    __table_args__ = {"extend_existing": True}
+
+    # sha256 токена, сам токен не хранится
+    token_hash: Mapped[str] = mapped_column(String(64), unique=True)
+    expires_at: Mapped[datetime] = mapped_column(index=True)
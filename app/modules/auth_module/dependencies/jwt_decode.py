@@ -7,7 +7,7 @@ from typing import Annotated
 import jwt
 from fastapi import Depends
 from fastapi.security import HTTPBearer
-from jwt import DecodeError
+from jwt import DecodeError, ExpiredSignatureError, PyJWTError
 from pydantic import ValidationError
 
 from .errors import (
@@ -19,6 +19,8 @@ from .errors import (
 )
 from app.adapters.db import ASYNC_SESSION
 from app.modules.auth_module.db.cruds.account_session_crud import AccountSessionCRUD
+from app.modules.auth_module.dependencies.token_cache import token_cache
+from app.modules.auth_module.dependencies.token_revocations import token_revocations
 from app.modules.auth_module.schemas.account import AccountSchema
 from app.modules.auth_module.schemas.token import Token, TokenTypeEnum
 from app.modules.auth_module.utils.oauth import oauth2_scheme
@@ -35,12 +37,27 @@ def token_expired(input_datetime: str | datetime) -> bool:
     return False
 
 
-async def decode_token(token: str, check_in_db: bool = True) -> Token:
+async def decode_token(token: str, check_in_db: bool | None = None) -> Token:
     """
-    - Проверить записан ли токен в БД.
+    - Проверить записан ли токен в БД. Проверенные токены кэшируются.
     - Извлечь данные из токена
+
+    В режиме JWT_VERIFY_MODE=signature по умолчанию БД не проверяется:
+    проверяются подпись и срок действия, а отзыв токена - по списку в памяти.
+
+    Args:
+        check_in_db (bool | None): проверить токен по таблице сессий,
+            по умолчанию зависит от JWT_VERIFY_MODE
     """
+    verify_signature = config.jwt.verify_mode == "signature"
+    if check_in_db is None:
+        check_in_db = not verify_signature
+
     if check_in_db:
+        cached = token_cache.get(token)
+        if cached is not None:
+            return cached
+
         async with ASYNC_SESSION() as session:
             crud = AccountSessionCRUD(session)
             exists = await crud.access_token_exists(token)
@@ -51,23 +68,40 @@ async def decode_token(token: str, check_in_db: bool = True) -> Token:
     try:
         raw_token = jwt.decode(
             token,
-            algorithms=config.jwt.alg,
+            algorithms=[config.jwt.alg],
             key=config.jwt.secret_key,
             options={
-                "verify_signature": False,
+                "verify_signature": verify_signature,
+                "require": ["exp"] if verify_signature else [],
                 "verify_aud": False,
                 "verify_iss": False,
             },
         )
-        return Token(**raw_token)
+        decoded = Token(**raw_token)
+    except ExpiredSignatureError as err:
+        logging.warning(f"Token expired: {err}")
+        raise TokenExpiredError from err
+
     except DecodeError as err:
         logging.warning(f"Token DecodeError: {err}")
         raise TokenDecodeError("Invalid JWT token") from err
 
+    except PyJWTError as err:
+        logging.warning(f"Invalid token claims: {err}")
+        raise InvalidTokenError from err
+
     except ValidationError as err:
         logging.warning(f"Invalid token schema inside token dict: {err}")
         raise InvalidTokenError
 
+    if verify_signature and token_revocations.is_revoked(token):
+        logging.warning("Token revoked")
+        raise InvalidTokenError
+
+    if check_in_db:
+        token_cache.set(token, decoded)
+    return decoded
+
 
 async def decode_token_and_check_exp(token: str) -> Token:
     decoded = await decode_token(token, check_in_db=False)
@@ -87,6 +121,8 @@ async def get_account_from_token(
     except ValidationError as err:
         logging.warning(f"Invalid token schema inside token dict: {err}")
         raise InvalidTokenError
+    except TokenExpiredError:
+        raise
     except Exception as err:
         logging.warning(f"Exception in get_account_from_token: {err}")
         raise BaseTokenException
@@ -128,6 +164,8 @@ async def check_refresh_token(raw_token: str):
     except ValidationError as err:
         logging.warning(f"Invalid schema in refresh_token: {err}")
         raise InvalidTokenError
+    except TokenExpiredError:
+        raise
     except Exception as err:
         logging.warning(f"BaseTokenException: {err}")
         raise BaseTokenException
@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 from uuid import UUID
 
 import jwt
+from pydantic import ValidationError
 
 from app.modules.auth_module.schemas.token import Token, TokenTypeEnum
 from app.settings import config
@@ -43,7 +44,20 @@ def create_refresh_token(account_id: UUID, account_email: str) -> str:
 
 
 def create_token(token: Token) -> str:
+    payload = token.model_dump(mode="json", by_alias=True)
+    if token.exp is not None:
+        # unix-время, чтобы срок действия проверялся самим PyJWT
+        payload["exp"] = int(token.exp.timestamp())
     encoded_jwt: str = jwt.encode(
-        token.json(), config.jwt.secret_key, algorithm=config.jwt.alg
+        payload, config.jwt.secret_key, algorithm=config.jwt.alg
     )
     return encoded_jwt
+
+
+def get_token_exp(token: str) -> datetime | None:
+    """Срок действия токена без проверки подписи"""
+    try:
+        raw_token = jwt.decode(token, options={"verify_signature": False})
+        return Token(**raw_token).exp
+    except (jwt.InvalidTokenError, ValidationError):
+        return None
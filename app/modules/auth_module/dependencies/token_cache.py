@@ -0,0 +1,80 @@
+import hashlib
+import logging
+from datetime import datetime, timedelta
+
+from app.adapters.backplane import BaseBackplane, backplane
+from app.modules.auth_module.dependencies.token import get_token_exp
+from app.modules.auth_module.schemas.token import Token
+from app.settings import config
+from app.utils.metrics import cache_samples, metrics
+from app.utils.ttl_cache import TTLCache
+
+# топик шины событий, через который воркеры узнают об отозванных токенах
+TOKEN_INVALIDATION_TOPIC = "token_invalidation"
+
+
+def token_key(token: str) -> str:
+    """Ключ кэша: по шине событий передаются хэши, а не сами токены"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def token_expires_at(token: str) -> datetime:
+    """Срок действия токена; если его не прочитать - максимальный срок жизни токена"""
+    exp = get_token_exp(token)
+    if exp is None:
+        exp = datetime.now() + timedelta(days=config.jwt.refresh_token_expire_days)
+    return exp
+
+
+class TokenCache:
+    """Кэш токенов, которые уже проверены по таблице сессий.
+
+    Запись живет не дольше ttl и не дольше срока действия токена.
+    При удалении или замене сессии ее токены сбрасываются на всех воркерах.
+    """
+
+    def __init__(self, backplane: BaseBackplane, maxsize: int, ttl: float):
+        self._cache: TTLCache[str, Token] = TTLCache(maxsize, ttl)
+        self.backplane = backplane
+        self.backplane.subscribe(TOKEN_INVALIDATION_TOPIC, self.handle_backplane_event)
+
+    def get(self, token: str) -> Token | None:
+        return self._cache.get(token_key(token))
+
+    def set(self, token: str, decoded: Token) -> None:
+        ttl = None
+        if decoded.exp is not None:
+            ttl = (decoded.exp - datetime.now()).total_seconds()
+        self._cache.set(token_key(token), decoded, ttl)
+
+    async def invalidate(self, *tokens: str | None) -> None:
+        """Сброс токенов из кэша и отзыв их на всех воркерах"""
+        revoked = [
+            {"key": token_key(token), "exp": token_expires_at(token).timestamp()}
+            for token in tokens
+            if token
+        ]
+        if revoked:
+            await self.backplane.publish(TOKEN_INVALIDATION_TOPIC, {"tokens": revoked})
+
+    async def handle_backplane_event(self, event: dict):
+        for token in event["tokens"]:
+            self._cache.pop(token["key"])
+        logging.debug(f"Token cache invalidated {len(event['tokens'])} tokens")
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def get_stats(self) -> dict:
+        return self._cache.get_stats()
+
+
+token_cache = TokenCache(
+    backplane, config.jwt.token_cache_size, config.jwt.token_cache_ttl
+)
+metrics.register_collector(
+    "token_cache",
+    lambda: cache_samples(
+        "auth_token_cache", "Verified tokens cache", token_cache.get_stats()
+    ),
+)
@@ -0,0 +1,65 @@
+import logging
+import time
+
+from app.adapters.backplane import BaseBackplane, backplane
+from app.adapters.db import ASYNC_SESSION
+from app.modules.auth_module.db.cruds.revoked_token_crud import RevokedTokenCRUD
+from app.modules.auth_module.dependencies.token_cache import (
+    TOKEN_INVALIDATION_TOPIC,
+    token_key,
+)
+
+
+class TokenRevocations:
+    """Отозванные токены, срок действия которых еще не истек.
+
+    В режиме JWT_VERIFY_MODE=signature заменяет поиск токена в таблице сессий:
+    при старте воркер загружает список из таблицы revoked_token, новые отзывы
+    приходят через шину событий.
+    """
+
+    def __init__(self, backplane: BaseBackplane):
+        # хэш токена -> unix-время истечения
+        self._expires: dict[str, float] = {}
+        self._prune_at_size = 1024
+        backplane.subscribe(TOKEN_INVALIDATION_TOPIC, self.handle_backplane_event)
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    def is_revoked(self, token: str) -> bool:
+        return token_key(token) in self._expires
+
+    def add(self, key: str, expires_at: float) -> None:
+        self._expires[key] = expires_at
+        # истекшие токены не нужно помнить, их отклонит проверка exp
+        if len(self._expires) >= self._prune_at_size:
+            self.prune()
+            self._prune_at_size = max(1024, len(self._expires) * 2)
+
+    def prune(self) -> None:
+        now = time.time()
+        self._expires = {
+            key: expires_at
+            for key, expires_at in self._expires.items()
+            if expires_at > now
+        }
+
+    async def load(self) -> None:
+        """Загрузка отозванных токенов из БД при старте воркера"""
+        async with ASYNC_SESSION() as session:
+            crud = RevokedTokenCRUD(session)
+            await crud.delete_expired()
+            revoked = await crud.get_active()
+            await session.commit()
+
+        for key, expires_at in revoked:
+            self.add(key, expires_at.timestamp())
+        logging.info(f"Loaded {len(revoked)} revoked tokens")
+
+    async def handle_backplane_event(self, event: dict):
+        for token in event["tokens"]:
+            self.add(token["key"], token["exp"])
+
+
+token_revocations = TokenRevocations(backplane)
@@ -1,3 +1,4 @@
+from datetime import datetime
 from uuid import UUID
 
 from app.modules.base_module.schemas.base import BaseDB, BaseSchema
@@ -12,3 +13,12 @@ class AccountSessionBaseSchema(BaseSchema):
 
 class AccountSessionDBSchema(AccountSessionBaseSchema, BaseDB):
     pass
+
+
+class RevokedTokenSchema(BaseSchema):
+    token_hash: str
+    expires_at: datetime
+
+
+class RevokedTokenDBSchema(RevokedTokenSchema, BaseDB):
+    pass
@@ -2,6 +2,8 @@ from datetime import datetime
 from enum import Enum
 from uuid import UUID
 
+from pydantic import field_validator
+
 from app.modules.base_module.schemas.base import BaseSchema
 from app.modules.base_module.schemas.customs import EmailStr
 
@@ -18,6 +20,14 @@ class Token(BaseSchema):
     exp: datetime | None = None
     token_type: TokenTypeEnum
 
+    @field_validator("exp")
+    @classmethod
+    def exp_to_local_time(cls, value: datetime | None) -> datetime | None:
+        """exp в токене записан unix-временем, а сравнивается с локальным datetime.now()"""
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone().replace(tzinfo=None)
+        return value
+
 
 class AuthTokens(BaseSchema):
     access_token: str | None = None
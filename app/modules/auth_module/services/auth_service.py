@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.modules.auth_module.db.cruds import AccountCRUD
 from app.modules.auth_module.db.cruds.account_session_crud import AccountSessionCRUD
+from app.modules.auth_module.db.cruds.revoked_token_crud import RevokedTokenCRUD
 from app.modules.auth_module.dependencies.errors import (
     InvalidTokenError,
     InvalidTokenTypeError,
@@ -14,11 +15,19 @@ from app.modules.auth_module.dependencies.errors import (
 from app.modules.auth_module.dependencies.jwt_decode import (
     decode_token_and_check_exp,
 )
+from app.modules.auth_module.dependencies.token_cache import (
+    token_cache,
+    token_expires_at,
+    token_key,
+)
 from app.modules.auth_module.schemas.account import (
     AccountDBSchema,
     AccountRegisterSchema,
 )
-from app.modules.auth_module.schemas.account_session import AccountSessionBaseSchema
+from app.modules.auth_module.schemas.account_session import (
+    AccountSessionBaseSchema,
+    RevokedTokenSchema,
+)
 from app.modules.auth_module.schemas.token import Token, TokenTypeEnum
 from app.modules.auth_module.utils.const import EMPTY_FINGER_PRINT
 from app.modules.auth_module.utils.errors import (
@@ -43,8 +52,32 @@ class AuthService(BaseService):
         super().__init__(session)
         self.crud = AccountCRUD(session)
         self.s_crud = AccountSessionCRUD(session)
+        self.revoked_crud = RevokedTokenCRUD(session)
         self.notification_service = NotificationService()
         self.profile_crud = ProfileCRUD(session)
+        # токены замененных и удаленных сессий, сбрасываются из кэша после commit
+        self._stale_tokens: list[str] = []
+
+    async def commit(self):
+        """Commit сессии и отзыв токенов измененных сессий на всех воркерах"""
+        await self.revoked_crud.revoke(
+            [
+                RevokedTokenSchema(
+                    token_hash=token_key(token), expires_at=token_expires_at(token)
+                )
+                for token in self._stale_tokens
+            ]
+        )
+        await self.session.commit()
+        stale_tokens, self._stale_tokens = self._stale_tokens, []
+        await token_cache.invalidate(*stale_tokens)
+
+    def _forget_session_tokens(self, account_session: AccountSessionBaseSchema | None):
+        if account_session is not None:
+            self._stale_tokens += [
+                account_session.access_token,
+                account_session.refresh_token,
+            ]
 
     async def authenticate_user(
         self, email: str, plain_password: str, fingerprint: str
@@ -67,7 +100,7 @@ class AuthService(BaseService):
         if not db_account.can_account_create_session:
             pass
         new_session = await self.create_or_update_session(db_account, fingerprint)
-        await self.session.commit()
+        await self.commit()
         return new_session
 
     async def register_user(
@@ -177,7 +210,7 @@ class AuthService(BaseService):
         await self.crud.update(
             account.id, {"is_confirmed": True, "confirmation_token": None}
         )
-        await self.session.commit()
+        await self.commit()
         logging.debug(
             f"Account.ID: {account.id}. Email confirmed. Account session created"
         )
@@ -268,15 +301,17 @@ class AuthService(BaseService):
         if account_session.fingerprint != fingerprint:
             logging.warning(f"Account.ID: {db_account.id}. Incorrect fingerprint")
             await self.s_crud.delete_session(account_session.refresh_token)
-            await self.session.commit()
+            self._forget_session_tokens(account_session)
+            await self.commit()
             raise InvalidTokenError
 
         new_session = db_account.create_session(fingerprint)
         await self.s_crud.update_refresh_token(
             refresh_token, account_id, new_session.dict()
         )
+        self._forget_session_tokens(account_session)
         logging.debug(f"Account.ID: {db_account.id} Session updated.")
-        await self.session.commit()
+        await self.commit()
         return new_session
 
     async def check_token_and_create_session(
@@ -306,7 +341,7 @@ class AuthService(BaseService):
             db_account_values["is_confirmed"] = True
         await self.crud.update(db_account.id, db_account_values)
 
-        await self.session.commit()
+        await self.commit()
         logging.debug(f"Account.ID: {db_account.id}. Token Verified. Session created")
         return new_session
 
@@ -327,11 +362,13 @@ class AuthService(BaseService):
             await self.s_crud.update_refresh_token(
                 account_session.refresh_token, db_account.id, new_session.dict()
             )
+            self._forget_session_tokens(account_session)
             logging.debug(f"Account.ID: {db_account.id} session updated")
         await self.session.flush()
         return new_session
 
     async def logout_account(self, refresh_token: str):
-        await self.s_crud.delete_session(refresh_token)
-        await self.session.commit()
+        deleted_session = await self.s_crud.delete_session(refresh_token)
+        self._forget_session_tokens(deleted_session)
+        await self.commit()
         logging.debug("Refresh token destroyed")
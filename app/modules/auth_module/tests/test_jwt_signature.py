@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+
+from app.adapters.backplane import InMemoryBackplane
+from app.modules.auth_module.dependencies.errors import (
+    InvalidTokenError,
+    TokenDecodeError,
+    TokenExpiredError,
+)
+from app.modules.auth_module.dependencies.jwt_decode import decode_token
+from app.modules.auth_module.dependencies.token import create_access_token, create_token
+from app.modules.auth_module.dependencies.token_cache import TokenCache
+from app.modules.auth_module.dependencies.token_revocations import TokenRevocations
+from app.modules.auth_module.schemas.token import Token, TokenTypeEnum
+from app.settings import config
+
+
+class TestSignatureVerifyMode:
+    """Тесты проверки токена по подписи без обращения к БД"""
+
+    @pytest.fixture(autouse=True)
+    def signature_mode(self, monkeypatch):
+        monkeypatch.setattr(config.jwt, "verify_mode", "signature")
+
+    @pytest.fixture(autouse=True)
+    def no_db(self):
+        with patch(
+            "app.modules.auth_module.dependencies.jwt_decode.ASYNC_SESSION",
+            side_effect=AssertionError("DB must not be used"),
+        ):
+            yield
+
+    @pytest.fixture
+    def backplane(self):
+        return InMemoryBackplane()
+
+    @pytest.fixture
+    def revocations(self, backplane):
+        revocations = TokenRevocations(backplane)
+        with patch(
+            "app.modules.auth_module.dependencies.jwt_decode.token_revocations",
+            revocations,
+        ):
+            yield revocations
+
+    async def test_valid_token(self, revocations):
+        """Тест проверки корректного токена без запроса к БД"""
+        account_id = uuid4()
+        token = create_access_token(account_id, "user@example.com")
+
+        decoded = await decode_token(token)
+
+        assert decoded.user_id == account_id
+        assert decoded.exp > datetime.now()
+
+    async def test_invalid_signature(self, revocations):
+        """Тест отклонения токена с чужой подписью"""
+        header, payload, signature = create_access_token(
+            uuid4(), "user@example.com"
+        ).split(".")
+        forged = f"{header}.{payload}.{signature[::-1]}"
+
+        with pytest.raises(TokenDecodeError):
+            await decode_token(forged)
+
+    async def test_expired_token(self, revocations):
+        """Тест отклонения истекшего токена самим PyJWT"""
+        token = create_token(
+            Token(
+                user_id=uuid4(),
+                email="user@example.com",
+                exp=datetime.now() - timedelta(minutes=1),
+                token_type=TokenTypeEnum.access_type,
+            )
+        )
+
+        with pytest.raises(TokenExpiredError):
+            await decode_token(token)
+
+    async def test_revoked_token(self, backplane, revocations):
+        """Тест отклонения отозванного токена на всех воркерах"""
+        token = create_access_token(uuid4(), "user@example.com")
+        token_cache = TokenCache(backplane, maxsize=10, ttl=60)
+        await decode_token(token)
+
+        await token_cache.invalidate(token)
+
+        assert revocations.is_revoked(token)
+        with pytest.raises(InvalidTokenError):
+            await decode_token(token)
+
+    def test_prune_expired_revocations(self, revocations):
+        """Тест, что истекшие отзывы не копятся в памяти"""
+        revocations.add("expired", 0)
+        revocations.add("active", datetime.now().timestamp() + 60)
+
+        revocations.prune()
+
+        assert len(revocations) == 1
@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.adapters.backplane import InMemoryBackplane
+from app.modules.auth_module.dependencies.jwt_decode import decode_token
+from app.modules.auth_module.dependencies.token import create_access_token
+from app.modules.auth_module.dependencies.token_cache import TokenCache
+from app.modules.auth_module.schemas.token import Token, TokenTypeEnum
+from app.utils.ttl_cache import TTLCache
+
+
+def make_token(exp: datetime) -> Token:
+    return Token(
+        user_id=uuid4(),
+        email="user@example.com",
+        exp=exp,
+        token_type=TokenTypeEnum.access_type,
+    )
+
+
+class TestTTLCache:
+    """Тесты кэша с временем жизни записей"""
+
+    def test_evicts_least_recently_used(self):
+        """Тест вытеснения самой давно используемой записи"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_expired_entry_is_missing(self):
+        """Тест, что просроченная запись не возвращается"""
+        cache = TTLCache(maxsize=10, ttl=60)
+        with patch("app.utils.ttl_cache.time.monotonic", return_value=100):
+            cache.set("a", 1, ttl=5)
+        with patch("app.utils.ttl_cache.time.monotonic", return_value=106):
+            assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_zero_size_disables_cache(self):
+        """Тест отключения кэша нулевым размером"""
+        cache = TTLCache(maxsize=0, ttl=60)
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
+
+
+class TestTokenCache:
+    """Тесты кэша проверенных токенов"""
+
+    async def test_invalidation_reaches_other_workers(self):
+        """Тест сброса токена в кэшах всех воркеров"""
+        backplane_1, backplane_2 = InMemoryBackplane(), InMemoryBackplane()
+        backplane_2._handlers = backplane_1._handlers
+        cache_1 = TokenCache(backplane_1, maxsize=10, ttl=60)
+        cache_2 = TokenCache(backplane_2, maxsize=10, ttl=60)
+        decoded = make_token(datetime.now() + timedelta(minutes=5))
+        cache_1.set("token", decoded)
+        cache_2.set("token", decoded)
+
+        await cache_1.invalidate("token", None)
+
+        assert cache_1.get("token") is None
+        assert cache_2.get("token") is None
+
+    def test_expired_token_is_not_cached(self):
+        """Тест, что просроченный токен не попадает в кэш"""
+        cache = TokenCache(InMemoryBackplane(), maxsize=10, ttl=60)
+        cache.set("token", make_token(datetime.now() - timedelta(seconds=1)))
+
+        assert cache.get("token") is None
+
+
+class TestDecodeTokenCache:
+    """Тесты кэширования проверки токена по БД"""
+
+    @pytest.fixture
+    def cache(self):
+        cache = TokenCache(InMemoryBackplane(), maxsize=10, ttl=60)
+        with patch(
+            "app.modules.auth_module.dependencies.jwt_decode.token_cache", cache
+        ):
+            yield cache
+
+    @pytest.fixture
+    def mock_crud(self):
+        crud = AsyncMock()
+        crud.access_token_exists.return_value = True
+        with patch(
+            "app.modules.auth_module.dependencies.jwt_decode.ASYNC_SESSION"
+        ), patch(
+            "app.modules.auth_module.dependencies.jwt_decode.AccountSessionCRUD",
+            return_value=crud,
+        ):
+            yield crud
+
+    async def test_second_check_skips_db(self, cache, mock_crud):
+        """Тест, что повторная проверка токена не ходит в БД"""
+        token = create_access_token(uuid4(), "user@example.com")
+
+        first = await decode_token(token)
+        second = await decode_token(token)
+
+        assert first == second
+        mock_crud.access_token_exists.assert_awaited_once_with(token)
+
+    async def test_invalidated_token_checked_again(self, cache, mock_crud):
+        """Тест, что сброшенный токен снова проверяется по БД"""
+        token = create_access_token(uuid4(), "user@example.com")
+        await decode_token(token)
+
+        await cache.invalidate(token)
+        await decode_token(token)
+
+        assert mock_crud.access_token_exists.await_count == 2
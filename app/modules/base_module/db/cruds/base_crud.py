@@ -1,10 +1,22 @@
+import json
 import logging
-from typing import Any, Generic, Iterable, Literal, TypeVar, Union
+from functools import lru_cache
+from typing import (
+    Any,
+    Generic,
+    Iterable,
+    Literal,
+    NamedTuple,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+)
 from uuid import UUID
 
 from psycopg.errors import UniqueViolation
-from pydantic import TypeAdapter
-from sqlalchemy import delete, func, insert, inspect, select, update
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import delete, func, insert, inspect, literal, select, text, update
 from sqlalchemy.engine.result import ScalarResult
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -16,6 +28,7 @@ from app.modules.base_module.db.errors import (
 )
 from app.modules.base_module.db.models import Base
 from app.modules.base_module.schemas.base import BaseSchema
+from app.modules.base_module.schemas.pagination import CountMode
 from app.settings import config
 
 S_in = TypeVar("S_in", bound=BaseSchema)
@@ -23,19 +36,100 @@ S_out = TypeVar("S_out", bound=BaseSchema)
 T = TypeVar("T", bound=Base)
 
 
+class Page(NamedTuple):
+    total_count: int | None
+    has_more: bool | None
+    items: list
+
+
+@lru_cache(maxsize=None)
+def relationship_names(table: type) -> tuple[str, ...]:
+    """Имена relationship модели, inspect() выполняется один раз на класс"""
+    return tuple(rel.key for rel in inspect(table).relationships)
+
+
+@lru_cache(maxsize=None)
+def list_adapter(schema: type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter списка схем, валидатор pydantic-core собирается один раз на класс"""
+    return TypeAdapter(list[schema])
+
+
+def _nested_schema(annotation: Any) -> tuple[type[BaseModel] | None, bool]:
+    """Вложенная схема поля и признак списка: X, X | None, list[X]"""
+    if get_origin(annotation) is list:
+        nested, _ = _nested_schema(get_args(annotation)[0])
+        return nested, True
+    for arg in get_args(annotation) or (annotation,):
+        if isinstance(arg, type) and issubclass(arg, BaseModel):
+            return arg, False
+    return None, False
+
+
+@lru_cache(maxsize=None)
+def _construct_plan(
+    schema: type[BaseModel],
+) -> tuple[tuple[str, type[BaseModel] | None, bool], ...]:
+    if not schema.__pydantic_complete__:
+        # forward ref вроде "ProfileSchema" без rebuild попал бы в схему как есть
+        schema.model_rebuild(raise_errors=True)
+    return tuple(
+        (name, *_nested_schema(field.annotation))
+        for name, field in schema.model_fields.items()
+    )
+
+
+def construct_schema(schema: type[BaseModel], item: Any) -> BaseModel:
+    """Схема из записи ORM через model_construct, без валидации.
+
+    Только для записей, которые пришли из БД: типы колонок и ограничения уже
+    гарантированы, а валидаторы схемы не запускаются. Незагруженные атрибуты
+    записи не трогаются и получают значения по умолчанию.
+    """
+    # загруженные атрибуты записи ORM лежат в __dict__, чтение из него
+    # не вызывает дескрипторы и lazy load
+    attrs = item.__dict__ if isinstance(item, Base) else None
+    values = {}
+    for name, nested, many in _construct_plan(schema):
+        if attrs is not None:
+            if name not in attrs:
+                continue
+            value = attrs[name]
+        elif hasattr(item, name):
+            value = getattr(item, name)
+        else:
+            continue
+        if nested is not None and value is not None:
+            if many:
+                value = [construct_schema(nested, row) for row in value]
+            else:
+                value = construct_schema(nested, value)
+        values[name] = value
+    return schema.model_construct(**values)
+
+
 class BaseCRUD(Generic[S_in, S_out, T]):
     _in_schema: type[S_in]
     _out_schema: type[S_out]
     _table: type[T]
+    # связи, которые догружаются после add и update; None - все связи модели
+    _load_relations: tuple[str, ...] | None = None
+    # схемы ответа собираются без валидации, см. construct_schema
+    _construct_out: bool = False
 
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def add(self, in_schema: S_in, return_raw: bool = False) -> S_out:
+    async def add(
+        self,
+        in_schema: S_in,
+        return_raw: bool = False,
+        relations: Iterable[str] | None = None,
+    ) -> S_out:
         """Добавление записи в соответствующую таблицу
 
         Args:
             in_schema: Объект схемы создания записи
+            relations: связи, которые нужно догрузить, по умолчанию _load_relations
 
         Returns:
             object: Объект схемы записи из БД
@@ -56,10 +150,10 @@ class BaseCRUD(Generic[S_in, S_out, T]):
             else:
                 raise BaseDBError from err
 
-        await self.await_relations(item)
+        await self.await_relations(item, relations)
         if return_raw:
             return item
-        return self._out_schema.model_validate(item)
+        return self.to_schema(item)
 
     async def add_many(self, in_schema: list[Union[S_in, dict]]) -> list[S_out]:
         """Добавление нескольких записей в соответствующую таблицу
@@ -71,10 +165,9 @@ class BaseCRUD(Generic[S_in, S_out, T]):
             object: Список объектов схем записей из БД
         """
         if in_schema:
-            validator = TypeAdapter(list[self._out_schema])
             q = insert(self._table).values(in_schema).returning(self._table)
             results = await self.session.scalars(q)
-            return validator.validate_python(results)
+            return self.to_schemas(results)
 
     async def get_all(self) -> list[S_out]:
         """Получение всех записей таблицы
@@ -82,9 +175,8 @@ class BaseCRUD(Generic[S_in, S_out, T]):
         Returns:
             object: Список объектов схем записей из БД
         """
-        validator = TypeAdapter(list[self._out_schema])
         results = await self.session.scalars(select(self._table))
-        return validator.validate_python(results)
+        return self.to_schemas(results)
 
     async def get_by_id(self, item_uuid: UUID, return_raw: bool = False) -> S_out:
         """Получение записи по уникальному идентификатору
@@ -101,7 +193,7 @@ class BaseCRUD(Generic[S_in, S_out, T]):
             raise ItemNotFoundError(f"Item {item_uuid} not found")
         if return_raw:
             return item
-        return self._out_schema.model_validate(item)
+        return self.to_schema(item)
 
     async def get_by_ids(
         self, ids: list[UUID], return_raw: bool = False
@@ -110,21 +202,25 @@ class BaseCRUD(Generic[S_in, S_out, T]):
         items = (await self.session.scalars(query)).all()
         if return_raw:
             return items
-        validator = TypeAdapter(list[self._out_schema])
-        return validator.validate_python(items)
+        return self.to_schemas(items)
 
     async def find_catalogues_by_ids(self, catalogue: T, ids: list[UUID]) -> list[T]:
         query = select(catalogue).where(catalogue.id.in_(ids))
         return (await self.session.scalars(query)).all()
 
     async def update(
-        self, item_uuid: UUID, data: Union[dict, S_in], validate: bool = True
+        self,
+        item_uuid: UUID,
+        data: Union[dict, S_in],
+        validate: bool = True,
+        relations: Iterable[str] | None = None,
     ):
         """Обновление записи в бд по уникальному идентификатору
 
         Args:
             item_uuid: Уникальный идентификатор записи
             data: Данные для обновления
+            relations: связи, которые нужно догрузить, по умолчанию _load_relations
 
         Returns:
             object: Схема объекта записи из БД
@@ -138,10 +234,10 @@ class BaseCRUD(Generic[S_in, S_out, T]):
             .returning(self._table)
         )
         result = await self.session.scalar(q)
-        await self.await_relations(result)
+        await self.await_relations(result, relations)
         if result:
             if validate:
-                return self._out_schema.model_validate(result)
+                return self.to_schema(result)
             return result
         raise ItemNotFoundError(f"Item {item_uuid} not found")
 
@@ -202,7 +298,8 @@ class BaseCRUD(Generic[S_in, S_out, T]):
         query: select,
         limit: int,
         offset: int,
-    ) -> tuple[int, ScalarResult]:
+        count: CountMode = CountMode.exact,
+    ) -> tuple[int | None, ScalarResult]:
         """Помимо выполнения запроса к БД вертает общее кол-во.
 
         и передает параметры пагинации, если это необходимо.
@@ -211,18 +308,80 @@ class BaseCRUD(Generic[S_in, S_out, T]):
             query(select): select query
             limit (int): limit
             offset (int): offset
+            count (CountMode): способ подсчета общего количества
 
         Returns:
-            Tuple[int, ChunkedIteratorResult]:
+            Tuple[int | None, ChunkedIteratorResult]:
         """
-        total_query = select(func.count()).select_from(query.subquery())
-        total_count = await self.session.scalar(total_query)
+        total_count = await self.count_select(query, count)
 
         if all((limit is not None, offset is not None)):
             query = query.limit(limit).offset(offset * limit)
 
         return total_count, await self.session.scalars(query)
 
+    async def select_page(
+        self,
+        query: select,
+        limit: int | None,
+        offset: int | None,
+        count: CountMode = CountMode.exact,
+    ) -> Page:
+        """Страница выборки с признаком has_more.
+
+        Запрашивается на одну запись больше limit, поэтому наличие следующей
+        страницы известно и без подсчета общего количества.
+
+        Returns:
+            Page: общее количество (None для CountMode.none), has_more и записи
+        """
+        total_count = await self.count_select(query, count)
+        if limit is None:
+            items = (await self.session.scalars(query)).unique().all()
+            return Page(total_count, False, items)
+
+        query = query.limit(limit + 1).offset((offset or 0) * limit)
+        items = (await self.session.scalars(query)).unique().all()
+        return Page(total_count, len(items) > limit, items[:limit])
+
+    async def count_select(self, query: select, count: CountMode) -> int | None:
+        """Общее количество записей выборки выбранным способом."""
+        if count == CountMode.none:
+            return None
+        if count == CountMode.estimated:
+            return await self._estimate_count(query)
+
+        total_query = select(func.count()).select_from(query.order_by(None).subquery())
+        return await self.session.scalar(total_query)
+
+    async def _estimate_count(self, query: select) -> int:
+        """Оценка количества записей по плану запроса.
+
+        Планировщик не проходит по записям, поэтому оценка стоит одинаково для
+        любой выборки, но ее точность зависит от свежести статистики таблиц.
+        CRUD с поддерживаемым счетчиком может переопределить метод.
+        """
+        subquery = select(literal(1)).select_from(query.order_by(None).subquery())
+        compiled = subquery.compile(
+            dialect=self.session.get_bind().dialect, compile_kwargs={"literal_binds": True}
+        )
+        plan = await self.session.scalar(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def to_schema(self, item: T) -> S_out:
+        """Схема ответа из записи ORM"""
+        if self._construct_out:
+            return construct_schema(self._out_schema, item)
+        return self._out_schema.model_validate(item)
+
+    def to_schemas(self, items: Iterable[T]) -> list[S_out]:
+        """Схемы ответа из записей ORM через общий TypeAdapter схемы"""
+        if self._construct_out:
+            return [construct_schema(self._out_schema, item) for item in items]
+        return list_adapter(self._out_schema).validate_python(items)
+
     def get_relationship_names(self):
         """После обновления таблицы, может возникнуть ошибка GreenletSpawn.
         Довольно неприятная вещь, связанная с тем, что невозможно обратиться к
@@ -230,16 +389,28 @@ class BaseCRUD(Generic[S_in, S_out, T]):
 
         https://docs.sqlalchemy.org/en/20/orm/extensions/asyncio.html#sqlalchemy.ext.asyncio.AsyncAttrs.awaitable_attrs
         """
-        mapper = inspect(self._table)
+        return list(relationship_names(self._table))
+
+    async def await_relations(self, item: T, relations: Iterable[str] | None = None):
+        """Догрузка связей записи.
 
-        return [rel.key for rel in mapper.relationships]
+        Связи, которые уже загружены или взяты из identity map сессии,
+        повторно не запрашиваются.
 
-    async def await_relations(self, item: T):
-        relationships = self.get_relationship_names()
-        if not relationships:
+        Args:
+            relations: имена связей, по умолчанию _load_relations или все связи
+        """
+        if item is None:
             return
-        for relation in relationships:
-            await getattr(item.awaitable_attrs, relation)
+        if relations is None:
+            relations = self._load_relations
+        if relations is None:
+            relations = relationship_names(self._table)
+
+        unloaded = inspect(item).unloaded
+        for relation in relations:
+            if relation in unloaded:
+                await getattr(item.awaitable_attrs, relation)
 
     def split_into_chunks(
         self,
@@ -0,0 +1,47 @@
+import logging
+from typing import Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.adapters.db import ASYNC_SESSION
+
+
+class UnitOfWork:
+    """Единица работы: короткая сессия БД на одну операцию.
+
+    Сессия открывается при входе в контекст и закрывается при выходе, поэтому
+    соединение из пула занято только на время операции. Без явного `commit`
+    изменения откатываются.
+
+    Пример:
+        async with UnitOfWork() as uow:
+            ...
+            await uow.commit()
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession] = ASYNC_SESSION):
+        self._session_factory = session_factory
+        self.session: AsyncSession | None = None
+
+    async def __aenter__(self) -> "UnitOfWork":
+        self.session = self._session_factory()
+        self.init_cruds(self.session)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is not None:
+                logging.warning(f"[DATABASE].Exception: {exc}. Do rollback")
+            await self.session.rollback()
+        finally:
+            await self.session.close()
+            self.session = None
+
+    def init_cruds(self, session: AsyncSession) -> None:
+        """Создание CRUD-классов модуля поверх сессии единицы работы"""
+
+    async def commit(self) -> None:
+        await self.session.commit()
+
+    async def rollback(self) -> None:
+        await self.session.rollback()
@@ -1,8 +1,24 @@
+import base64
+from datetime import datetime
+from enum import Enum, unique
+from typing import NamedTuple
+from uuid import UUID
+
 from pydantic import Field, field_validator
 
 from app.modules.base_module.schemas.base import BaseSchema
 
 
+@unique
+class CountMode(str, Enum):
+    """Как считать общее количество записей выборки"""
+
+    exact: str = "exact"
+    # оценка планировщика или поддерживаемый счетчик, без прохода по записям
+    estimated: str = "estimated"
+    none: str = "none"
+
+
 class PaginationParams(BaseSchema):
     limit: int | None = Field(
         default=None,
@@ -16,6 +32,11 @@ class PaginationParams(BaseSchema):
         examples=1,
         description="Requested page number",
     )
+    count: CountMode | None = Field(
+        default=None,
+        examples=["exact"],
+        description="How to count total results: exact, estimated or none",
+    )
 
     @field_validator("offset", mode="before")
     def validate_offset(cls, offset):
@@ -34,3 +55,55 @@ class Paginator(PaginationParams):
         description="Total count of query results",
         alias="totalCount",
     )
+
+
+class Cursor(NamedTuple):
+    """Позиция записи для keyset пагинации: время и id как разрешение равенства"""
+
+    position: datetime
+    id: UUID
+
+    def encode(self) -> str:
+        raw = f"{self.position.isoformat()}|{self.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @classmethod
+    def decode(cls, cursor: str) -> "Cursor":
+        """Разбор курсора из запроса.
+
+        Raises:
+            ValueError: курсор поврежден
+        """
+        try:
+            position, id_ = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return cls(datetime.fromisoformat(position), UUID(id_))
+        except (ValueError, UnicodeError) as err:
+            raise ValueError("Invalid cursor") from err
+
+
+class CursorParams(BaseSchema):
+    before: str | None = Field(
+        default=None,
+        description="Cursor to load results before (older than) the given one",
+    )
+    after: str | None = Field(
+        default=None,
+        description="Cursor to load results after (newer than) the given one",
+    )
+
+    @property
+    def is_set(self) -> bool:
+        return self.before is not None or self.after is not None
+
+    def decode(self) -> tuple[Cursor | None, Cursor | None]:
+        """Разбор курсоров before и after.
+
+        Raises:
+            ValueError: курсор поврежден или заданы оба направления
+        """
+        if self.before is not None and self.after is not None:
+            raise ValueError("Only one of before and after can be set")
+        return tuple(
+            Cursor.decode(cursor) if cursor is not None else None
+            for cursor in (self.before, self.after)
+        )
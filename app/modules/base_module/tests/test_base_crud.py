@@ -0,0 +1,137 @@
+import asyncio
+from datetime import datetime
+from unittest.mock import Mock
+from uuid import uuid4
+
+import pytest
+
+from app.modules.base_module.db.cruds import base_crud
+from app.modules.base_module.db.cruds.base_crud import (
+    BaseCRUD,
+    construct_schema,
+    list_adapter,
+    relationship_names,
+)
+from app.modules.chat_module.db.cruds.message_crud import MessageCRUD
+from app.modules.chat_module.db.models.chat import ChatModel, MessageModel
+from app.modules.chat_module.db.models.profile import ProfileModel
+from app.modules.chat_module.schemas.message_schema import MessageDBSchema
+from app.modules.chat_module.schemas.profile_schemas import ProfileDBSchema
+
+
+class AwaitableAttrs:
+    """Заглушка awaitable_attrs, запоминает догруженные связи"""
+
+    def __init__(self):
+        self.awaited = []
+
+    def __getattr__(self, name):
+        self.awaited.append(name)
+        return asyncio.sleep(0)
+
+
+class ChatCRUD(BaseCRUD):
+    _table = ChatModel
+
+
+class TestAwaitRelations:
+    """Тесты догрузки связей после записи"""
+
+    @pytest.fixture
+    def item(self, monkeypatch):
+        item = Mock(awaitable_attrs=AwaitableAttrs())
+        # owner уже загружен вместе с записью
+        monkeypatch.setattr(
+            base_crud,
+            "inspect",
+            lambda _: Mock(unloaded={"members", "stats"}),
+        )
+        return item
+
+    def test_relationship_names_cached(self, monkeypatch):
+        relationship_names.cache_clear()
+        inspect = Mock(wraps=base_crud.inspect)
+        monkeypatch.setattr(base_crud, "inspect", inspect)
+
+        names = [relationship_names(ChatModel) for _ in range(3)]
+
+        assert set(names[0]) == {"members", "owner", "stats"}
+        inspect.assert_called_once_with(ChatModel)
+
+    async def test_all_unloaded_relations(self, item):
+        await ChatCRUD(Mock()).await_relations(item)
+
+        assert sorted(item.awaitable_attrs.awaited) == ["members", "stats"]
+
+    async def test_declared_relations(self, item, monkeypatch):
+        """Тест, что догружаются только объявленные связи"""
+        monkeypatch.setattr(ChatCRUD, "_load_relations", ("owner", "members"))
+
+        await ChatCRUD(Mock()).await_relations(item)
+
+        assert item.awaitable_attrs.awaited == ["members"]
+
+    async def test_relations_per_call(self, item):
+        await ChatCRUD(Mock()).await_relations(item, relations=())
+
+        assert item.awaitable_attrs.awaited == []
+
+    async def test_missing_item(self):
+        await ChatCRUD(Mock()).await_relations(None)
+
+
+def make_message(**kwargs) -> MessageModel:
+    now = datetime(2025, 1, 1)
+    sender = ProfileModel(id=uuid4(), first_name="Иван", created_at=now, updated_at=now)
+    values = {
+        "id": uuid4(),
+        "chat_id": uuid4(),
+        "text": "hello",
+        "sent_at": now,
+        "read_at": None,
+        "created_at": now,
+        "updated_at": now,
+        "sender_id": sender.id,
+        "sender": sender,
+    }
+    return MessageModel(**(values | kwargs))
+
+
+class TestOutSchemas:
+    """Тесты сборки схем ответа из записей"""
+
+    def test_adapter_built_once(self):
+        assert list_adapter(MessageDBSchema) is list_adapter(MessageDBSchema)
+
+    def test_construct_matches_validate(self):
+        """Тест, что схема без валидации совпадает с провалидированной"""
+        messages = [make_message(), make_message(read_at=datetime(2025, 1, 2))]
+
+        constructed = [construct_schema(MessageDBSchema, item) for item in messages]
+
+        validated = list_adapter(MessageDBSchema).validate_python(messages)
+        assert [item.model_dump() for item in constructed] == [
+            item.model_dump() for item in validated
+        ]
+        assert constructed[0].json() == validated[0].json()
+
+    def test_construct_skips_unloaded(self):
+        """Тест, что незагруженные связи не запрашиваются"""
+        now = datetime(2025, 1, 1)
+        profile = ProfileModel(id=uuid4(), created_at=now, updated_at=now)
+
+        schema = construct_schema(ProfileDBSchema, profile)
+
+        assert schema.chats is None
+        assert schema.pd is None
+        assert schema.id == profile.id
+
+    def test_message_crud_constructs(self):
+        message = make_message()
+        crud = MessageCRUD(Mock())
+
+        (schema,) = crud.to_schemas([message])
+
+        assert isinstance(schema, MessageDBSchema)
+        assert schema.sender.first_name == "Иван"
+        assert crud.to_schema(message) == schema
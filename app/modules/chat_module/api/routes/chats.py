@@ -5,9 +5,10 @@ from fastapi import APIRouter, Depends
 
 from app.dependencies.services_dependency import get_service
 from app.modules.auth_module.dependencies.jwt_decode import get_account_from_token
-from app.modules.base_module.schemas.pagination import PaginationParams
+from app.modules.base_module.schemas.pagination import CursorParams, PaginationParams
 from app.modules.chat_module.schemas.chat_schemas import (
     ChatSchema,
+    ChatUnreadSchema,
     CreateChatSchema,
     DetailedChatSchema,
     UpdateChatSchema,
@@ -26,6 +27,19 @@ async def get_chats(
     return await service.accounts_chats(account.id)
 
 
+@router.get(
+    "/unread/",
+    response_model=list[ChatUnreadSchema],
+    summary="Непрочитанные по всем чатам",
+    name="chats_unread:get",
+)
+async def get_unread_counts(
+    service: Annotated[get_service(ChatService), Depends()],
+    account: Annotated[get_account_from_token, Depends()],
+):
+    return await service.unread_counts(account.id)
+
+
 @router.post("/", response_model=ChatSchema, summary="Создать чат", name="chats:post")
 async def create_chat(
     service: Annotated[get_service(ChatService), Depends()],
@@ -71,5 +85,6 @@ async def chat_history(
     account: Annotated[get_account_from_token, Depends()],
     chat_id: UUID,
     pagination: Annotated[PaginationParams, Depends()],
+    cursor: Annotated[CursorParams, Depends()],
 ):
-    return await service.chat_history(account.id, chat_id, pagination)
+    return await service.chat_history(account.id, chat_id, pagination, cursor)
@@ -3,7 +3,7 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, WebSocket
 
-from app.dependencies.services_dependency import get_service
+from app.modules.chat_module.dependencies import get_websocket_service
 from app.modules.chat_module.services.websocket_service import WebsocketService
 
 router = APIRouter()
@@ -13,6 +13,6 @@ router = APIRouter()
 async def websocket_endpoint(
     websocket: WebSocket,
     chat_id: UUID,
-    service: Annotated[get_service(WebsocketService), Depends()],
+    service: Annotated[WebsocketService, Depends(get_websocket_service)],
 ):
     await service.handle_incoming_connection(websocket, chat_id)
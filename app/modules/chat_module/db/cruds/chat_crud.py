@@ -1,12 +1,13 @@
 from typing import TYPE_CHECKING
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import exists, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
 from app.modules.base_module.db.cruds.base_crud import BaseCRUD
 from app.modules.base_module.db.errors import ItemNotFoundError
+from app.modules.chat_module.db.membership_cache import membership_cache
 from app.modules.chat_module.db.models.chat import ChatModel, ChatUsersModel
 from app.modules.chat_module.schemas.chat_schemas import ChatDBSchema, ChatSchema
 
@@ -38,6 +39,32 @@ class ChatCRUD(BaseCRUD[ChatSchema, ChatDBSchema, ChatModel]):
             return item
         return self._out_schema.model_validate(item)
 
+    async def exists(self, chat_id: UUID) -> bool:
+        query = select(exists().where(self._table.id == chat_id))
+        return await self.session.scalar(query)
+
+    async def get_member_ids(self, chat_id: UUID) -> frozenset[UUID]:
+        """Id участников чата из кэша, при промахе - из chat_user"""
+        members = membership_cache.get(chat_id)
+        if members is None:
+            query = select(ChatUsersModel.profile_id).where(
+                ChatUsersModel.chat_id == chat_id
+            )
+            members = frozenset(await self.session.scalars(query))
+            membership_cache.set(chat_id, members)
+        return members
+
+    async def is_member(self, chat_id: UUID, profile_id: UUID) -> bool:
+        return profile_id in await self.get_member_ids(chat_id)
+
+    async def is_owner(self, chat_id: UUID, profile_id: UUID) -> bool:
+        query = select(
+            exists().where(
+                self._table.id == chat_id, self._table.owner_id == profile_id
+            )
+        )
+        return await self.session.scalar(query)
+
     async def add_members(self, chat_id: UUID, members: list[UUID]):
         for member in members:
             self.session.add(ChatUsersModel(chat_id=chat_id, profile_id=member))
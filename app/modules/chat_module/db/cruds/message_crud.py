@@ -1,68 +1,249 @@
 import logging
+from collections import Counter
 from datetime import datetime
-from operator import and_
-from typing import TYPE_CHECKING
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from pydantic import TypeAdapter
-from sqlalchemy import exists, func, literal, select, update
+from sqlalchemy import case, func, insert, or_, select, tuple_, update
 from sqlalchemy.dialects.postgresql import insert as pg_insert
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm import selectinload
 
-from app.modules.base_module.db.cruds.base_crud import BaseCRUD
+from app.modules.base_module.db.cruds.base_crud import BaseCRUD, Page
+from app.modules.base_module.schemas.base import BaseSchema
+from app.modules.base_module.schemas.pagination import CountMode, Cursor
 from app.modules.chat_module.db.models.chat import (
+    ChatStatsModel,
     ChatUsersModel,
     MessageModel,
-    MessageReadStatusModel,
 )
+from app.modules.chat_module.db.models.profile import ProfileModel
 from app.modules.chat_module.schemas.message_schema import (
     MessageDBSchema,
     MessageSchema,
 )
 
-if TYPE_CHECKING:
-    from app.modules.chat_module.db.models.profile import ProfileModel
-
 
 class MessageCRUD(BaseCRUD[MessageSchema, MessageDBSchema, MessageModel]):
     _in_schema = MessageSchema
     _out_schema = MessageDBSchema
     _table = MessageModel
+    # схеме сообщения из связей нужен только отправитель
+    _load_relations = ("sender",)
+    # сообщения и отправители приходят из БД, валидация схемы на страницах
+    # истории занимает больше времени, чем сам запрос
+    _construct_out = True
+
+    async def add(
+        self, in_schema: MessageSchema | dict, return_raw: bool = False
+    ) -> MessageDBSchema:
+        """Добавление сообщения со счетчиками чата в той же транзакции."""
+        message = await super().add(in_schema, return_raw=True)
+        await self.update_chat_stats(message)
+        await self.increment_unread(message)
+        if return_raw:
+            return message
+        return self.to_schema(message)
+
+    async def add_many(
+        self, in_schema: list[MessageSchema | dict]
+    ) -> list[MessageDBSchema]:
+        """Добавление пачки сообщений одним INSERT со счетчиками чатов.
+
+        Returns:
+            list[MessageDBSchema]: сообщения в порядке in_schema
+        """
+        if not in_schema:
+            return []
+        values = [
+            item.model_dump(exclude_unset=True)
+            if isinstance(item, BaseSchema)
+            else dict(item)
+            for item in in_schema
+        ]
+        for item in values:
+            # id нужен заранее, RETURNING не обязан сохранять порядок VALUES
+            item.setdefault("id", uuid4())
+
+        query = (
+            insert(self._table)
+            .values(values)
+            .returning(self._table)
+            .options(selectinload(self._table.sender))
+        )
+        inserted = {item.id: item for item in await self.session.scalars(query)}
+        messages = [inserted[item["id"]] for item in values]
+
+        last_messages = {}
+        for message in messages:
+            last = last_messages.get(message.chat_id)
+            if last is None or (last.sent_at, last.id) < (message.sent_at, message.id):
+                last_messages[message.chat_id] = message
+        chat_counts = Counter(message.chat_id for message in messages)
+        for chat_id, message in last_messages.items():
+            await self.update_chat_stats(message, count=chat_counts[chat_id])
+
+        # непрочитанные увеличиваются одним UPDATE на отправителя в чате
+        senders, sender_counts = {}, Counter()
+        for message in messages:
+            key = (message.chat_id, message.sender_id)
+            senders[key] = message
+            sender_counts[key] += 1
+        for key, message in senders.items():
+            await self.increment_unread(message, count=sender_counts[key])
+
+        return self.to_schemas(messages)
+
+    async def update_chat_stats(self, message: MessageModel, count: int = 1) -> None:
+        """Увеличение счетчика сообщений и сдвиг указателя на последнее сообщение.
+
+        Указатель не откатывается назад, если сообщение пришло с более ранним
+        sent_at, чем уже сохраненное последнее.
+
+        Args:
+            message: последнее из добавленных сообщений чата
+            count: сколько сообщений чата добавлено
+        """
+        stats = ChatStatsModel.__table__
+        stmt = pg_insert(stats).values(
+            chat_id=message.chat_id,
+            message_count=count,
+            last_message_id=message.id,
+            last_sent_at=message.sent_at,
+        )
+        is_newer = stats.c.last_sent_at.is_(None) | (
+            stats.c.last_sent_at <= stmt.excluded.last_sent_at
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[stats.c.chat_id],
+            set_={
+                "message_count": stats.c.message_count + stmt.excluded.message_count,
+                "last_message_id": case(
+                    (is_newer, stmt.excluded.last_message_id),
+                    else_=stats.c.last_message_id,
+                ),
+                "last_sent_at": case(
+                    (is_newer, stmt.excluded.last_sent_at),
+                    else_=stats.c.last_sent_at,
+                ),
+                "updated_at": func.now(),
+            },
+        )
+        await self.session.execute(stmt)
+
+    async def increment_unread(self, message: MessageModel, count: int = 1) -> None:
+        """Новое сообщение непрочитано у всех участников, кроме отправителя.
+
+        Args:
+            count: сколько сообщений отправителя добавлено в чат
+        """
+        query = (
+            update(ChatUsersModel)
+            .where(
+                ChatUsersModel.chat_id == message.chat_id,
+                ChatUsersModel.profile_id != message.sender_id,
+            )
+            .values(unread_count=ChatUsersModel.unread_count + count)
+        )
+        await self.session.execute(query)
+
+    async def get_message_count(self, chat_id: UUID) -> int:
+        """Количество сообщений чата по счетчику, без прохода по сообщениям."""
+        query = select(ChatStatsModel.message_count).where(
+            ChatStatsModel.chat_id == chat_id
+        )
+        return await self.session.scalar(query) or 0
 
     async def chat_history(
-        self, chat_id: UUID, limit: int, offset: int
-    ) -> tuple[int, list[MessageDBSchema]]:
+        self,
+        chat_id: UUID,
+        limit: int | None = None,
+        offset: int | None = None,
+        count: CountMode = CountMode.exact,
+    ) -> Page:
+        """Страница истории чата по номеру страницы.
+
+        Returns:
+            Page: общее количество по способу count, has_more и сообщения
+                в хронологическом порядке
+        """
+        # отправители догружаются отдельным запросом по ключам страницы,
+        # поэтому limit и offset применяются к сообщениям, а не к строкам join
         query = (
             select(self._table)
             .where(self._table.chat_id == chat_id)
             .options(
-                joinedload(self._table.sender),
-                joinedload(self._table.read_statuses),
-                joinedload(self._table.readers),
+                selectinload(self._table.sender),
             )
-            .order_by(self._table.sent_at.desc())
+            .order_by(self._table.sent_at.desc(), self._table.id.desc())
         )
-        total, items = await self.paginated_select(query, limit, offset)
-        items = items.unique().all()
-        validator = TypeAdapter(list[self._out_schema])
-        validated_items = validator.validate_python(items)
+        if count == CountMode.estimated:
+            # счетчик чата точнее оценки планировщика и так же дешев
+            page = await self.select_page(query, limit, offset, CountMode.none)
+            page = page._replace(total_count=await self.get_message_count(chat_id))
+        else:
+            page = await self.select_page(query, limit, offset, count)
+        items = self.to_schemas(page.items)
+
+        return page._replace(items=list(reversed(items)))
+
+    async def chat_history_page(
+        self,
+        chat_id: UUID,
+        limit: int,
+        before: Cursor | None = None,
+        after: Cursor | None = None,
+    ) -> tuple[bool, list[MessageDBSchema]]:
+        """Страница истории чата по курсору (sent_at, id).
 
-        return total, list(reversed(validated_items))
+        Запрос идет по индексу (chat_id, sent_at, id), поэтому стоимость страницы
+        не зависит от того, насколько далеко пролистана история.
+
+        Args:
+            chat_id: UUID чата
+            limit: количество сообщений на странице
+            before: вернуть сообщения старше курсора, по умолчанию последние
+            after: вернуть сообщения новее курсора
+
+        Returns:
+            tuple[bool, list[MessageDBSchema]]: есть ли еще сообщения в направлении
+                листания и сообщения в хронологическом порядке
+        """
+        position = tuple_(self._table.sent_at, self._table.id)
+        query = (
+            select(self._table)
+            .where(self._table.chat_id == chat_id)
+            .options(
+                selectinload(self._table.sender),
+            )
+        )
+        if after is not None:
+            query = query.where(position > tuple(after)).order_by(
+                self._table.sent_at, self._table.id
+            )
+        else:
+            if before is not None:
+                query = query.where(position < tuple(before))
+            query = query.order_by(self._table.sent_at.desc(), self._table.id.desc())
+
+        # лишняя запись показывает, есть ли следующая страница, без count
+        items = (await self.session.scalars(query.limit(limit + 1))).unique().all()
+        has_more = len(items) > limit
+        items = items[:limit]
+        if after is None:
+            items = list(reversed(items))
+
+        return has_more, self.to_schemas(items)
 
     async def get_messages_by_ids(self, ids: list[UUID]) -> list[MessageDBSchema]:
         query = (
             select(self._table)
             .where(self._table.id.in_(ids))
             .options(
-                joinedload(self._table.sender),
-                selectinload(self._table.read_statuses),
-                selectinload(self._table.readers),
+                selectinload(self._table.sender),
             )
         )
         items = await self.session.scalars(query)
         items = items.unique().all()
-        validator = TypeAdapter(list[self._out_schema])
-        return validator.validate_python(items)
+        return self.to_schemas(items)
 
     async def mark_as_read(self, message_id: UUID) -> MessageDBSchema:
         """Простая отметка для 1-to-1 чатов."""
@@ -74,7 +255,7 @@ class MessageCRUD(BaseCRUD[MessageSchema, MessageDBSchema, MessageModel]):
         )
         item = await self.session.scalar(query)
         await self.await_relations(item)
-        return self._out_schema.model_validate(item)
+        return self.to_schema(item)
 
     async def mark_messages_read_by_last_id(
         self, chat_id: UUID, profile_id: UUID, last_read_message_id: UUID
@@ -82,6 +263,9 @@ class MessageCRUD(BaseCRUD[MessageSchema, MessageDBSchema, MessageModel]):
         """
         Отметить все сообщения до указанного ID как прочитанные
 
+        Сдвигается отметка прочтения участника в chat_user, строки на каждое
+        сообщение не создаются.
+
         Args:
             chat_id: UUID чата
             profile_id: UUID пользователя
@@ -90,80 +274,43 @@ class MessageCRUD(BaseCRUD[MessageSchema, MessageDBSchema, MessageModel]):
         Returns:
             list[UUID]: Список ID сообщений, которые были отмечены как прочитанные
         """
-        membership_check = select(ChatUsersModel).where(
-            ChatUsersModel.chat_id == chat_id,
-            ChatUsersModel.profile_id == profile_id,
-        )
-        membership = await self.session.scalar(membership_check)
+        membership = await self._get_membership(chat_id, profile_id)
         if not membership:
-            logging.warning(f"User {profile_id} is not member of chat {chat_id}")
+            logging.warning("User %s is not member of chat %s", profile_id, chat_id)
             return []
 
-        unread_messages_cte = (
-            select(
-                self._table.id.label("message_id"),
-                literal(profile_id).label("profile_id"),
-                literal(datetime.utcnow()).label("read_at"),
-            )
-            .select_from(self._table)
-            .outerjoin(
-                MessageReadStatusModel,
-                and_(
-                    MessageReadStatusModel.message_id == self._table.id,
-                    MessageReadStatusModel.profile_id == profile_id,
-                ),
-            )
-            .join(
-                ChatUsersModel,
-                and_(
-                    ChatUsersModel.chat_id == chat_id,
-                    ChatUsersModel.profile_id == profile_id,
-                ),
-            )
+        target = await self._get_position(last_read_message_id, chat_id)
+        if target is None:
+            return []
+        current = membership.read_position
+        if current is not None and current >= target:
+            return []
+
+        position = tuple_(self._table.sent_at, self._table.id)
+        unread_messages_query = (
+            select(self._table.id)
             .where(
                 self._table.chat_id == chat_id,
                 self._table.sender_id != profile_id,
-                self._table.sent_at
-                <= (
-                    select(self._table.sent_at)
-                    .where(self._table.id == last_read_message_id)
-                    .scalar_subquery()
-                ),
-                MessageReadStatusModel.message_id.is_(None),  # Еще не прочитано
-                # Проверка существования сообщения встроена в условие
-                exists().where(
-                    and_(
-                        self._table.id == last_read_message_id,
-                        self._table.chat_id == chat_id,
-                    )
-                ),
+                position <= target,
             )
-            .cte("unread_messages")
+            .order_by(self._table.sent_at, self._table.id)
         )
-
-        unread_messages_query = select(unread_messages_cte.c.message_id)
+        if current is not None:
+            unread_messages_query = unread_messages_query.where(position > current)
         unread_message_ids = list(await self.session.scalars(unread_messages_query))
-        if not unread_message_ids:
-            return []
 
-        read_statuses_data = [
-            {
-                "message_id": message_id,
-                "profile_id": profile_id,
-                "read_at": datetime.utcnow(),
-            }
-            for message_id in unread_message_ids
-        ]
-
-        stmt = pg_insert(MessageReadStatusModel).values(read_statuses_data)
-        stmt = stmt.on_conflict_do_nothing(index_elements=["message_id", "profile_id"])
-        await self.session.execute(stmt)
-        logging.debug(f"Marked {len(unread_message_ids)} messages as read")
+        if not await self._advance_read_position(chat_id, profile_id, target):
+            # отметку уже сдвинул параллельный запрос с другого устройства
+            return []
+        logging.debug("Marked %s messages as read", len(unread_message_ids))
 
         return unread_message_ids
 
     async def mark_as_read_by_profile(self, message_id: UUID, profile_id: UUID) -> bool:
         """
+        Отметка прочтения сдвигается до сообщения, если оно новее текущей отметки.
+
         Args:
             message_id: UUID сообщения
             profile_id: UUID пользователя
@@ -172,42 +319,132 @@ class MessageCRUD(BaseCRUD[MessageSchema, MessageDBSchema, MessageModel]):
             bool: True если сообщение было отмечено, False если уже было прочитано
         """
         try:
-            stmt = pg_insert(MessageReadStatusModel).values(
-                {
-                    "message_id": message_id,
-                    "profile_id": profile_id,
-                    "read_at": datetime.utcnow(),
-                }
-            )
-            stmt = stmt.on_conflict_do_nothing(
-                index_elements=["message_id", "profile_id"]
+            message = await self.session.execute(
+                select(self._table.chat_id, self._table.sent_at, self._table.id).where(
+                    self._table.id == message_id
+                )
             )
-            result = await self.session.execute(stmt)
-            # Если rowcount > 0, значит запись была вставлена
-            was_inserted = result.rowcount > 0
+            message = message.first()
+            if message is None:
+                return False
 
-            if was_inserted:
+            chat_id, sent_at, message_id = message
+            was_marked = await self._advance_read_position(
+                chat_id, profile_id, (sent_at, message_id)
+            )
+            if was_marked:
                 logging.info(
-                    f"Message {message_id} marked as read by profile {profile_id}"
+                    "Message %s marked as read by profile %s", message_id, profile_id
                 )
 
-            return was_inserted
+            return was_marked
 
         except Exception as e:
-            logging.error(f"Error marking message as read: {e}")
+            logging.error("Error marking message as read: %s", e)
             return False
 
+    async def get_readers_ids(self, message_id: UUID) -> list[UUID]:
+        """Участники, чья отметка прочтения не раньше сообщения, кроме отправителя."""
+        query = (
+            select(ChatUsersModel.profile_id)
+            .join(self._table, self._table.chat_id == ChatUsersModel.chat_id)
+            .where(
+                self._table.id == message_id,
+                ChatUsersModel.profile_id != self._table.sender_id,
+                tuple_(
+                    ChatUsersModel.last_read_sent_at,
+                    ChatUsersModel.last_read_message_id,
+                )
+                >= tuple_(self._table.sent_at, self._table.id),
+            )
+        )
+        return list(await self.session.scalars(query))
+
+    async def is_read_by(self, message_id: UUID, profile_id: UUID) -> bool:
+        message = await self.session.get(self._table, message_id)
+        membership = message and await self._get_membership(
+            message.chat_id, profile_id
+        )
+        return bool(membership and membership.has_read(message))
+
     async def get_unread_count_for_user(self, chat_id: UUID, profile_id: UUID) -> int:
         """Получить количество непрочитанных сообщений для пользователя в чате."""
-        read_messages_subquery = select(MessageReadStatusModel.message_id).where(
-            MessageReadStatusModel.profile_id == profile_id
+        query = select(ChatUsersModel.unread_count).where(
+            ChatUsersModel.chat_id == chat_id,
+            ChatUsersModel.profile_id == profile_id,
         )
+        result = await self.session.scalar(query)
+        return result or 0
 
-        unread_query = select(func.count(self._table.id)).where(
-            self._table.chat_id == chat_id,
-            self._table.sender_id != profile_id,
-            self._table.id.notin_(read_messages_subquery),
+    async def get_unread_counts(self, account_id: UUID) -> dict[UUID, int]:
+        """Счетчики непрочитанных по всем чатам аккаунта одним запросом."""
+        query = (
+            select(ChatUsersModel.chat_id, ChatUsersModel.unread_count)
+            .join(ProfileModel, ProfileModel.id == ChatUsersModel.profile_id)
+            .where(ProfileModel.account_id == account_id)
         )
+        return dict((await self.session.execute(query)).all())
 
-        result = await self.session.scalar(unread_query)
-        return result or 0
+    async def _get_membership(
+        self, chat_id: UUID, profile_id: UUID
+    ) -> ChatUsersModel | None:
+        query = select(ChatUsersModel).where(
+            ChatUsersModel.chat_id == chat_id,
+            ChatUsersModel.profile_id == profile_id,
+        )
+        return await self.session.scalar(query)
+
+    async def _get_position(
+        self, message_id: UUID, chat_id: UUID
+    ) -> tuple[datetime, UUID] | None:
+        query = select(self._table.sent_at, self._table.id).where(
+            self._table.id == message_id, self._table.chat_id == chat_id
+        )
+        position = (await self.session.execute(query)).first()
+        return tuple(position) if position is not None else None
+
+    async def _advance_read_position(
+        self, chat_id: UUID, profile_id: UUID, target: tuple[datetime, UUID]
+    ) -> bool:
+        """Сдвиг отметки прочтения вперед, назад отметка не двигается.
+
+        Returns:
+            bool: False, если участника нет или отметка уже не меньше target
+        """
+        query = (
+            update(ChatUsersModel)
+            .where(
+                ChatUsersModel.chat_id == chat_id,
+                ChatUsersModel.profile_id == profile_id,
+                or_(
+                    ChatUsersModel.last_read_sent_at.is_(None),
+                    tuple_(
+                        ChatUsersModel.last_read_sent_at,
+                        ChatUsersModel.last_read_message_id,
+                    )
+                    < target,
+                ),
+            )
+            .values(
+                last_read_sent_at=target[0],
+                last_read_message_id=target[1],
+                # пересчет по сообщениям после новой отметки, их немного
+                unread_count=self._unread_after(chat_id, profile_id, target),
+            )
+        )
+        result = await self.session.execute(query)
+        return result.rowcount > 0
+
+    def _unread_after(
+        self, chat_id: UUID, profile_id: UUID, position: tuple[datetime, UUID]
+    ):
+        """Подзапрос количества чужих сообщений чата после позиции."""
+        return (
+            select(func.count(self._table.id))
+            .where(
+                self._table.chat_id == chat_id,
+                self._table.sender_id != profile_id,
+                tuple_(self._table.sent_at, self._table.id) > position,
+            )
+            .scalar_subquery()
+        )
@@ -2,7 +2,7 @@ from uuid import UUID
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.modules.base_module.db.cruds.base_crud import BaseCRUD
 from app.modules.base_module.db.errors import (
@@ -14,6 +14,22 @@ from app.modules.chat_module.schemas.profile_schemas import (
     ProfileDBSchema,
     ProfileSchema,
 )
+from app.settings import config
+from app.utils.metrics import cache_samples, metrics
+from app.utils.ttl_cache import TTLCache
+
+# профиль аккаунта не меняется, поэтому его id можно держать в кэше воркера
+profile_id_cache: TTLCache[UUID, UUID] = TTLCache(
+    config.chat.profile_cache_size, config.chat.profile_cache_ttl
+)
+metrics.register_collector(
+    "profile_id_cache",
+    lambda: cache_samples(
+        "chat_profile_id_cache",
+        "Account to profile id cache",
+        profile_id_cache.get_stats(),
+    ),
+)
 
 
 class ProfileCRUD(BaseCRUD[ProfileSchema, ProfileDBSchema, ProfileModel]):
@@ -25,14 +41,19 @@ class ProfileCRUD(BaseCRUD[ProfileSchema, ProfileDBSchema, ProfileModel]):
         self.session = session
 
     async def get_profile_by_account_id(self, account_id: UUID):
+        """Профиль со всеми чатами, их участниками и владельцами.
+
+        Тяжелый запрос, только когда ответу нужен список чатов. Для проверок
+        доступа есть get_profile_id_by_account_id и проверки в ChatCRUD.
+        """
         query = (
             select(self._table)
             .where(self._table.account_id == account_id)
             .options(
                 joinedload(self._table.pd),
-                joinedload(self._table.chats).options(
-                    joinedload(ChatModel.members),
-                    joinedload(ChatModel.owner),
+                selectinload(self._table.chats).options(
+                    selectinload(ChatModel.members),
+                    selectinload(ChatModel.owner),
                 ),
             )
         )
@@ -40,4 +61,18 @@ class ProfileCRUD(BaseCRUD[ProfileSchema, ProfileDBSchema, ProfileModel]):
         # await self.await_relations(item)
         if not item:
             raise ItemNotFoundError(f"Profile for account {account_id} not found")
+        profile_id_cache.set(account_id, item.id)
         return self._out_schema.model_validate(item)
+
+    async def get_profile_id_by_account_id(self, account_id: UUID) -> UUID:
+        """Id профиля аккаунта без загрузки связей"""
+        profile_id = profile_id_cache.get(account_id)
+        if profile_id is not None:
+            return profile_id
+
+        query = select(self._table.id).where(self._table.account_id == account_id)
+        profile_id = await self.session.scalar(query)
+        if profile_id is None:
+            raise ItemNotFoundError(f"Profile for account {account_id} not found")
+        profile_id_cache.set(account_id, profile_id)
+        return profile_id
@@ -0,0 +1,66 @@
+import logging
+from uuid import UUID
+
+from app.adapters.backplane import BaseBackplane, backplane
+from app.settings import config
+from app.utils.metrics import cache_samples, metrics
+from app.utils.ttl_cache import TTLCache
+
+# топик шины событий, через который воркеры узнают об изменении состава чата
+MEMBERSHIP_INVALIDATION_TOPIC = "chat_membership_invalidation"
+
+
+class MembershipCache:
+    """Кэш участников чата для проверок доступа.
+
+    Состав чата меняется редко, а проверяется почти на каждое событие сокета.
+    Запись живет не дольше ttl, при изменении состава чата она сбрасывается
+    на всех воркерах.
+    """
+
+    def __init__(self, backplane: BaseBackplane, maxsize: int, ttl: float):
+        self._cache: TTLCache[UUID, frozenset[UUID]] = TTLCache(maxsize, ttl)
+        self.backplane = backplane
+        self.backplane.subscribe(
+            MEMBERSHIP_INVALIDATION_TOPIC, self.handle_backplane_event
+        )
+
+    def get(self, chat_id: UUID) -> frozenset[UUID] | None:
+        return self._cache.get(chat_id)
+
+    def set(self, chat_id: UUID, members: frozenset[UUID]) -> None:
+        self._cache.set(chat_id, members)
+
+    async def invalidate(self, *chat_ids: UUID) -> None:
+        """Сброс участников чатов на всех воркерах.
+
+        Вызывается после коммита, иначе параллельный запрос может снова
+        закэшировать старый состав.
+        """
+        if chat_ids:
+            await self.backplane.publish(
+                MEMBERSHIP_INVALIDATION_TOPIC,
+                {"chat_ids": [str(chat_id) for chat_id in chat_ids]},
+            )
+
+    async def handle_backplane_event(self, event: dict):
+        for chat_id in event["chat_ids"]:
+            self._cache.pop(UUID(chat_id))
+        logging.debug("Membership cache invalidated %s chats", len(event["chat_ids"]))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def get_stats(self) -> dict:
+        return self._cache.get_stats()
+
+
+membership_cache = MembershipCache(
+    backplane, config.chat.membership_cache_size, config.chat.membership_cache_ttl
+)
+metrics.register_collector(
+    "membership_cache",
+    lambda: cache_samples(
+        "chat_membership_cache", "Chat membership cache", membership_cache.get_stats()
+    ),
+)
@@ -1,3 +1,3 @@
-from .chat import ChatModel, ChatUsersModel, MessageModel
+from .chat import ChatModel, ChatStatsModel, ChatUsersModel, MessageModel
 from .profile import ProfileModel, ProfilePersonalDataModel
 
@@ -3,7 +3,7 @@ from typing import TYPE_CHECKING
 from uuid import UUID
 
 from sqlalchemy import ForeignKey as FK
-from sqlalchemy import String, UniqueConstraint
+from sqlalchemy import Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.modules.base_module.db.models.base import Base
@@ -30,6 +30,13 @@ class ChatModel(Base):
     owner: Mapped["ProfileModel"] = relationship(
         "app.modules.chat_module.db.models.profile.ProfileModel", viewonly=True
     )
+    stats: Mapped["app.modules.chat_module.db.models.chat.ChatStatsModel | None"] = (
+        relationship(
+            "app.modules.chat_module.db.models.chat.ChatStatsModel",
+            lazy="selectin",
+            viewonly=True,
+        )
+    )
 
 
 class ChatUsersModel(Base):
@@ -40,29 +47,34 @@ class ChatUsersModel(Base):
     profile_id: Mapped[UUID] = mapped_column(
         FK("profile.id", ondelete="CASCADE"), index=True
     )
+    # отметка прочтения: прочитаны все сообщения чата до (sent_at, id) включительно
+    last_read_sent_at: Mapped[datetime | None]
+    last_read_message_id: Mapped[UUID | None]
+    # чужие сообщения после отметки прочтения, обновляется при отправке и прочтении
+    unread_count: Mapped[int] = mapped_column(default=0, server_default="0")
 
+    @property
+    def read_position(self) -> tuple[datetime, UUID] | None:
+        if self.last_read_sent_at is None:
+            return None
+        return self.last_read_sent_at, self.last_read_message_id
 
-class MessageReadStatusModel(Base):
-    __tablename__ = "message_read_status"
+    def has_read(self, message: "MessageModel") -> bool:
+        """Проверить, прочитано ли сообщение участником"""
+        if message.sender_id == self.profile_id:
+            return True
+        position = self.read_position
+        return position is not None and (message.sent_at, message.id) <= position
 
-    message_id: Mapped[UUID] = mapped_column(
-        FK("message.id", ondelete="CASCADE"), index=True
-    )
-    profile_id: Mapped[UUID] = mapped_column(
-        FK("profile.id", ondelete="CASCADE"), index=True
-    )
-    read_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
+class MessageModel(Base):
+    __tablename__ = "message"
     __table_args__ = (
-        UniqueConstraint("message_id", "profile_id", name="unique_message_user_read"),
+        # keyset пагинация истории чата
+        Index("ix_message_chat_id_sent_at_id", "chat_id", "sent_at", "id"),
         {"extend_existing": True},
     )
 
-
-class MessageModel(Base):
-    __tablename__ = "message"
-    __table_args__ = {"extend_existing": True}
-
     chat_id: Mapped[UUID | None] = mapped_column(
         FK("chat.id", ondelete="CASCADE"), index=True
     )
@@ -77,32 +89,22 @@ class MessageModel(Base):
     sender: Mapped["app.modules.chat_module.db.models.profile.ProfileModel | None"] = (
         relationship(viewonly=True)
     )
-    read_statuses: Mapped[list[MessageReadStatusModel]] = relationship(
-        lazy="selectin",
-        cascade="all, delete-orphan",
-        viewonly=True,
-    )
-    readers: Mapped[
-        list["app.modules.chat_module.db.models.profile.ProfileModel"] | None
-    ] = relationship(
-        secondary="message_read_status",
-        lazy="selectin",
-        overlaps="read_statuses",
-        viewonly=True,
-    )
 
-    def is_read_by(self, profile_id: UUID) -> bool:
-        """Проверить, прочитано ли сообщение конкретным пользователем"""
-        return any(status.profile_id == profile_id for status in self.read_statuses)
 
-    @property
-    def readers_ids(self) -> list[UUID]:
-        """Получить список пользователей, которые прочитали сообщение"""
-        return [status.profile_id for status in self.read_statuses]
-
-    def get_read_at_for_user(self, profile_id: UUID) -> datetime | None:
-        """Получить время прочтения для конкретного пользователя"""
-        for status in self.read_statuses:
-            if status.profile_id == profile_id:
-                return status.read_at
-        return None
+class ChatStatsModel(Base):
+    """Счетчики чата, обновляются вместе с добавлением сообщения.
+
+    Строка удаляется каскадно вместе с чатом.
+    """
+
+    __tablename__ = "chat_stats"
+    __table_args__ = {"extend_existing": True}
+
+    chat_id: Mapped[UUID] = mapped_column(
+        FK("chat.id", ondelete="CASCADE"), unique=True
+    )
+    message_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    last_message_id: Mapped[UUID | None] = mapped_column(
+        FK("message.id", ondelete="SET NULL")
+    )
+    last_sent_at: Mapped[datetime | None]
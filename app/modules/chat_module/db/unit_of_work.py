@@ -0,0 +1,19 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.base_module.db.unit_of_work import UnitOfWork
+from app.modules.chat_module.db.cruds.chat_crud import ChatCRUD
+from app.modules.chat_module.db.cruds.message_crud import MessageCRUD
+from app.modules.chat_module.db.cruds.profile_crud import ProfileCRUD
+
+
+class ChatUnitOfWork(UnitOfWork):
+    """Единица работы модуля чатов"""
+
+    profile_crud: ProfileCRUD
+    message_crud: MessageCRUD
+    chat_crud: ChatCRUD
+
+    def init_cruds(self, session: AsyncSession) -> None:
+        self.profile_crud = ProfileCRUD(session)
+        self.message_crud = MessageCRUD(session)
+        self.chat_crud = ChatCRUD(session)
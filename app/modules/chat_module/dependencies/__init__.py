@@ -0,0 +1,10 @@
+from app.modules.chat_module.services.websocket_service import WebsocketService
+
+
+def get_websocket_service() -> WebsocketService:
+    """Сервис WebSocket без сессии БД из зависимостей.
+
+    Сессия из `get_session` жила бы все время соединения, поэтому сервис
+    открывает короткие единицы работы сам.
+    """
+    return WebsocketService()
@@ -32,3 +32,9 @@ class AccessDenied(BaseChatException):
     status_code = status.HTTP_403_FORBIDDEN
     detail = "Access denied"
     code = ErrorCode.auth_error
+
+
+class InvalidCursor(BaseChatException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    detail = "Invalid pagination cursor"
+    code = ErrorCode.validation_error
@@ -10,6 +10,19 @@ if TYPE_CHECKING:
     from app.modules.chat_module.schemas.profile_schemas import ProfileSchema
 
 
+class ChatStatsSchema(BaseSchema):
+    message_count: int = Field(0, description="количество сообщений в чате")
+    last_message_id: UUID | None = Field(None, description="последнее сообщение")
+    last_sent_at: datetime | None = Field(
+        None, description="время последнего сообщения"
+    )
+
+
+class ChatUnreadSchema(BaseSchema):
+    chat_id: UUID
+    unread_count: int = Field(description="количество непрочитанных сообщений")
+
+
 class ChatSchema(BaseSchema):
     id: UUID
     name: str = Field(description="название чата", example="chat name")
@@ -17,6 +30,9 @@ class ChatSchema(BaseSchema):
         None, description="описание чата", example="chat description"
     )
     owner: "ProfileSchema" = Field(description="Владелец чата")
+    stats: ChatStatsSchema | None = Field(
+        None, description="счетчики сообщений, пусто для чата без сообщений"
+    )
 
 
 class DetailedChatSchema(ChatSchema):
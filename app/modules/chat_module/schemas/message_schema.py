@@ -5,6 +5,7 @@ from uuid import UUID
 from pydantic import Field
 
 from app.modules.base_module.schemas.base import BaseDB, BaseSchema
+from app.modules.base_module.schemas.pagination import Cursor
 
 if TYPE_CHECKING:
     from app.modules.chat_module.schemas.profile_schemas import ProfileSchema
@@ -27,5 +28,24 @@ class MessageDBSchema(MessageSchema, BaseDB):
 
 
 class MessageEntities(BaseSchema):
-    total_count: int
+    # при листании по курсору общее количество не считается
+    total_count: int | None = None
+    has_more: bool | None = None
+    before_cursor: str | None = Field(
+        default=None, description="курсор для загрузки более старых сообщений"
+    )
+    after_cursor: str | None = Field(
+        default=None, description="курсор для загрузки более новых сообщений"
+    )
     entities: list[MessageSchema]
+
+    @staticmethod
+    def page_cursors(messages: list[MessageSchema]) -> dict:
+        """Курсоры границ страницы, сообщения в хронологическом порядке"""
+        if not messages:
+            return {"before_cursor": None, "after_cursor": None}
+        first, last = messages[0], messages[-1]
+        return {
+            "before_cursor": Cursor(first.sent_at, first.id).encode(),
+            "after_cursor": Cursor(last.sent_at, last.id).encode(),
+        }
@@ -4,17 +4,26 @@ from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.modules.base_module.schemas.pagination import (
+    CountMode,
+    CursorParams,
+    PaginationParams,
+)
 from app.modules.base_module.services.base_service import BaseService
 from app.modules.chat_module.db.cruds.chat_crud import ChatCRUD
 from app.modules.chat_module.db.cruds.message_crud import MessageCRUD
 from app.modules.chat_module.db.cruds.profile_crud import ProfileCRUD
+from app.modules.chat_module.db.membership_cache import membership_cache
 from app.modules.chat_module.errors import (
     AccessDenied,
     ChatNotFound,
+    InvalidCursor,
     MembersNotFound,
     ProhibitedToModifyChat,
 )
 from app.modules.chat_module.schemas.chat_schemas import CreateChatSchema
+from app.modules.chat_module.schemas.message_schema import MessageEntities
+from app.settings import config
 
 if TYPE_CHECKING:
     from app.modules.auth_module.schemas.account import AccountDBSchema
@@ -33,20 +42,25 @@ class ChatService(BaseService):
         profile_db: "ProfileDBSchema" = (
             await self.profile_crud.get_profile_by_account_id(account_id)
         )
-        logging.info(f"Profile.ID {profile_db.id} has {len(profile_db.chats)} chats")
+        logging.info("Profile.ID %s has %s chats", profile_db.id, len(profile_db.chats))
         return profile_db.chats
 
+    async def unread_counts(self, account_id: UUID) -> list[dict]:
+        counts = await self.message_crud.get_unread_counts(account_id)
+        return [
+            {"chat_id": chat_id, "unread_count": unread_count}
+            for chat_id, unread_count in counts.items()
+        ]
+
     async def create_chat(self, account_id: UUID, chat_data: CreateChatSchema):
         values = chat_data.model_dump(exclude_unset=True)
-        profile_db: "ProfileDBSchema" = (
-            await self.profile_crud.get_profile_by_account_id(account_id)
-        )
+        profile_id = await self.profile_crud.get_profile_id_by_account_id(account_id)
 
         members = values.pop("members", [])
-        if profile_db.id not in members:
-            members.append(profile_db.id)
+        if profile_id not in members:
+            members.append(profile_id)
 
-        values["owner_id"] = profile_db.id
+        values["owner_id"] = profile_id
 
         chat = await self.chat_crud.add(values)
         profiles: list["ProfileModel"] = await self.profile_crud.get_by_ids(
@@ -59,33 +73,31 @@ class ChatService(BaseService):
 
         await self.chat_crud.add_members(chat.id, members)
         await self.session.commit()
-        logging.info(f"Chat.ID {chat.id} with {len(members)} members created")
+        await membership_cache.invalidate(chat.id)
+        logging.info("Chat.ID %s with %s members created", chat.id, len(members))
         return chat
 
     async def delete_chat(self, account_id: UUID, chat_id: UUID):
-        profile_db: "ProfileDBSchema" = (
-            await self.profile_crud.get_profile_by_account_id(account_id)
-        )
-        if not profile_db.is_owner_of_chat(chat_id):
+        profile_id = await self.profile_crud.get_profile_id_by_account_id(account_id)
+        if not await self.chat_crud.is_owner(chat_id, profile_id):
             raise ProhibitedToModifyChat()
 
         await self.chat_crud.delete(chat_id)
         await self.session.commit()
-        logging.debug(f"Chat.ID {chat_id} deleted")
+        await membership_cache.invalidate(chat_id)
+        logging.debug("Chat.ID %s deleted", chat_id)
 
     async def update_chat(
         self, account_id: UUID, chat_data: CreateChatSchema, chat_id: UUID
     ):
-        profile_db: "ProfileDBSchema" = (
-            await self.profile_crud.get_profile_by_account_id(account_id)
-        )
+        profile_id = await self.profile_crud.get_profile_id_by_account_id(account_id)
 
-        if not profile_db.is_owner_of_chat(chat_id):
+        if not await self.chat_crud.is_owner(chat_id, profile_id):
             raise ProhibitedToModifyChat()
 
         values = chat_data.model_dump(exclude_unset=True)
         members = values.pop("members", [])
-        members.append(profile_db.id)
+        members.append(profile_id)
 
         chat = await self.chat_crud.update(chat_id, values)
         profiles: list["ProfileModel"] = await self.profile_crud.get_by_ids(
@@ -102,37 +114,69 @@ class ChatService(BaseService):
             await self.chat_crud.add_members(chat.id, new_members)
 
         await self.session.commit()
-        logging.debug(f"Chat.ID {chat.id} with {len(members)} members updated")
+        if new_members:
+            await membership_cache.invalidate(chat.id)
+        logging.debug("Chat.ID %s with %s members updated", chat.id, len(members))
         return chat
 
     async def chat_info(self, account_id: UUID, chat_id: UUID):
-        profile_db: "ProfileDBSchema" = (
-            await self.profile_crud.get_profile_by_account_id(account_id)
-        )
-        if not profile_db.is_memeber_of_chat(chat_id):
+        profile_id = await self.profile_crud.get_profile_id_by_account_id(account_id)
+        if not await self.chat_crud.is_member(chat_id, profile_id):
             raise AccessDenied("Only chat members can see chat info")
 
         chat = await self.chat_crud.full_chat_info(chat_id)
-        logging.debug(f"Found {chat}")
+        logging.debug("Found %s", chat)
         return chat
 
-    async def chat_history(self, account_id: UUID, chat_id: UUID, pagination: dict):
-        profile_db: "ProfileDBSchema" = (
-            await self.profile_crud.get_profile_by_account_id(account_id)
-        )
+    async def chat_history(
+        self,
+        account_id: UUID,
+        chat_id: UUID,
+        pagination: PaginationParams,
+        cursor: CursorParams | None = None,
+    ):
+        profile_id = await self.profile_crud.get_profile_id_by_account_id(account_id)
 
-        chat = profile_db.find_chat(chat_id)
-        if chat is None:
+        # чужой чат для клиента не отличается от несуществующего
+        if not await self.chat_crud.is_member(chat_id, profile_id):
             raise ChatNotFound()
 
-        if chat_id not in profile_db.chat_ids:
-            raise AccessDenied()
-
-        total, messages = await self.message_crud.chat_history(
-            chat_id, **pagination.model_dump(exclude_unset=True)
+        if cursor is not None and cursor.is_set:
+            try:
+                before, after = cursor.decode()
+            except ValueError as err:
+                raise InvalidCursor(str(err))
+
+            has_more, messages = await self.message_crud.chat_history_page(
+                chat_id,
+                limit=pagination.limit or config.chat.history_page_size,
+                before=before,
+                after=after,
+            )
+            logging.info(
+                "Chat.ID %s return %s messages by cursor", chat_id, len(messages)
+            )
+            return {
+                "has_more": has_more,
+                "entities": messages,
+                **MessageEntities.page_cursors(messages),
+            }
+
+        params = pagination.model_dump(exclude_none=True)
+        params.setdefault("count", CountMode(config.chat.history_count))
+        total, has_more, messages = await self.message_crud.chat_history(
+            chat_id, **params
         )
 
         logging.info(
-            f"Chat.ID {chat.id} total {total} messages. Return {len(messages)} messages"
+            "Chat.ID %s total %s messages. Return %s messages",
+            chat_id,
+            total,
+            len(messages),
         )
-        return {"total_count": total, "entities": messages}
+        return {
+            "total_count": total,
+            "has_more": has_more,
+            "entities": messages,
+            **MessageEntities.page_cursors(messages),
+        }
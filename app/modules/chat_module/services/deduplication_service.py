@@ -7,6 +7,7 @@ from typing import Dict
 from uuid import UUID
 
 from app.settings import config
+from app.utils.metrics import Sample, metrics
 
 
 class MessageDeduplicationService:
@@ -18,6 +19,7 @@ class MessageDeduplicationService:
         self._recent_messages: Dict[str, tuple[float, UUID]] = {}
         self._cache_ttl_seconds = config.chat.cache_ttl_seconds
         self._min_message_interval = config.chat.min_message_interval
+        self.blocked = 0
 
     async def check_and_prevent_duplicate(
         self, user_id: UUID, chat_id: UUID, text: str
@@ -35,9 +37,9 @@ class MessageDeduplicationService:
         message_key = self._generate_message_key(user_id, chat_id, text)
 
         async with self._user_chat_locks[lock_key]:
-            logging.debug(f"Acquired lock for user {user_id} in chat {chat_id}")
+            logging.debug("Acquired lock for user %s in chat %s", user_id, chat_id)
             logging.debug(
-                f"Message key in recent: {message_key in self._recent_messages}"
+                "Message key in recent: %s", message_key in self._recent_messages
             )
             current_time = time.time()
             await self._cleanup_expired_messages()
@@ -45,10 +47,11 @@ class MessageDeduplicationService:
             if message_key in self._recent_messages:
                 last_time, last_message_id = self._recent_messages[message_key]
                 time_diff = current_time - last_time
-                logging.info(f"Last message ID: {last_message_id} at {last_time}")
-                logging.info(f"Time diff: {time_diff} seconds")
+                logging.debug("Last message ID: %s at %s", last_message_id, last_time)
+                logging.debug("Time diff: %s seconds", time_diff)
 
                 if time_diff < self._min_message_interval:
+                    self.blocked += 1
                     return (
                         False,
                         f"Too frequent. Wait {self._min_message_interval - time_diff:.1f}s",
@@ -87,7 +90,7 @@ class MessageDeduplicationService:
 
         for key in expired_keys:
             del self._recent_messages[key]
-        logging.debug(f"Removed {len(expired_keys)} expired messages")
+        logging.debug("Removed %s expired messages", len(expired_keys))
 
     def get_stats(self) -> dict:
         """Возвращает статистику сервиса"""
@@ -96,7 +99,24 @@ class MessageDeduplicationService:
             "active_locks": len(self._user_chat_locks),
             "cache_ttl": self._cache_ttl_seconds,
             "min_interval": self._min_message_interval,
+            "blocked": self.blocked,
         }
 
+    def get_metrics(self) -> list[Sample]:
+        return [
+            Sample(
+                "chat_dedup_blocked_total",
+                self.blocked,
+                "Messages rejected as too frequent duplicates",
+                "counter",
+            ),
+            Sample(
+                "chat_dedup_cached_messages",
+                len(self._recent_messages),
+                "Recent message keys kept for deduplication",
+            ),
+        ]
+
 
 deduplication_service = MessageDeduplicationService()
+metrics.register_collector("deduplication", deduplication_service.get_metrics)
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Callable
+
+from app.modules.chat_module.db.unit_of_work import ChatUnitOfWork
+from app.settings import config
+from app.utils.metrics import Sample, metrics
+
+if TYPE_CHECKING:
+    from app.modules.chat_module.schemas.message_schema import MessageDBSchema
+
+
+class MessageWriter:
+    """Групповая запись входящих сообщений воркера.
+
+    Сообщения со всех сокетов копятся не дольше `delay` секунд и записываются
+    одним INSERT в одной транзакции. `write` возвращает сообщение только после
+    коммита, поэтому рассылка по-прежнему идет после записи в БД. Пока пачка
+    пишется, следующая копится, так что под нагрузкой пачки растут сами.
+    """
+
+    def __init__(
+        self,
+        uow_factory: Callable[[], ChatUnitOfWork] = ChatUnitOfWork,
+        delay: float = config.chat.message_batch_delay,
+        max_batch: int = config.chat.message_batch_size,
+    ):
+        self.uow = uow_factory
+        self.delay = delay
+        self.max_batch = max_batch
+        self.batches = 0
+        self.messages = 0
+        self._pending: list[tuple[dict, asyncio.Future]] = []
+        self._full = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def write(self, values: dict) -> "MessageDBSchema":
+        """Запись сообщения в ближайшей пачке.
+
+        Raises:
+            Exception: ошибка записи этого сообщения
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((values, future))
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return await future
+
+    async def flush(self) -> None:
+        """Ожидание записи всех накопленных сообщений."""
+        if self._task is not None:
+            self._full.set()
+            await self._task
+            self._full.clear()
+
+    async def _run(self) -> None:
+        while self._pending:
+            if len(self._pending) < self.max_batch and not self._full.is_set():
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.delay)
+                except asyncio.TimeoutError:
+                    pass
+            self._full.clear()
+            batch = self._pending[: self.max_batch]
+            del self._pending[: self.max_batch]
+            await self._write_batch(batch)
+
+    async def _write_batch(self, batch: list[tuple[dict, asyncio.Future]]) -> None:
+        try:
+            async with self.uow() as uow:
+                messages = await uow.message_crud.add_many(
+                    [values for values, _ in batch]
+                )
+                await uow.commit()
+        except Exception as err:
+            if len(batch) == 1:
+                _, future = batch[0]
+                if not future.done():
+                    future.set_exception(err)
+                return
+            # одно плохое сообщение не должно ронять чужие, пишем по одному
+            logging.warning("Batch of %s messages failed: %s", len(batch), err)
+            for item in batch:
+                await self._write_batch([item])
+            return
+
+        self.batches += 1
+        self.messages += len(batch)
+        for (_, future), message in zip(batch, messages):
+            # отправитель мог уже отключиться, сообщение при этом записано
+            if not future.done():
+                future.set_result(message)
+
+    def get_stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "messages": self.messages,
+            "pending": len(self._pending),
+        }
+
+    def get_metrics(self) -> list[Sample]:
+        return [
+            Sample(
+                "chat_writer_batches_total",
+                self.batches,
+                "Committed message batches",
+                "counter",
+            ),
+            Sample(
+                "chat_writer_messages_total",
+                self.messages,
+                "Messages written in batches",
+                "counter",
+            ),
+            Sample(
+                "chat_writer_pending",
+                len(self._pending),
+                "Messages waiting for a batch",
+            ),
+        ]
+
+
+message_writer = MessageWriter()
+metrics.register_collector("message_writer", message_writer.get_metrics)
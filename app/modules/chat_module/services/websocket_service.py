@@ -1,37 +1,57 @@
 import json
 import logging
 from datetime import datetime
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
 from uuid import UUID
 
 from fastapi import WebSocket, WebSocketDisconnect
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.modules.auth_module.dependencies.jwt_decode import authenticate_websocket_user
 from app.modules.base_module.db.errors import ItemNotFoundError
-from app.modules.base_module.services.base_service import BaseService
-from app.modules.chat_module.db.cruds.chat_crud import ChatCRUD
-from app.modules.chat_module.db.cruds.message_crud import MessageCRUD
-from app.modules.chat_module.db.cruds.profile_crud import ProfileCRUD
+from app.modules.base_module.schemas.pagination import (
+    CountMode,
+    Cursor,
+    CursorParams,
+)
+from app.modules.chat_module.db.unit_of_work import ChatUnitOfWork
+from app.modules.chat_module.schemas.message_schema import MessageEntities
 from app.modules.chat_module.services.deduplication_service import deduplication_service
+from app.modules.chat_module.services.message_writer import message_writer
 from app.modules.chat_module.websoket.connection_manager import connection_manager
+from app.modules.chat_module.websoket.frames import EncodedFrame
 from app.settings import config
 from app.settings.base import ApiMode
+from app.utils.metrics import metrics
 
 if TYPE_CHECKING:
-    from app.modules.chat_module.schemas.chat_schemas import ChatDBSchema
     from app.modules.chat_module.schemas.message_schema import MessageDBSchema
-    from app.modules.chat_module.schemas.profile_schemas import ProfileDBSchema
 
-
-class WebsocketService(BaseService):
-    def __init__(self, session: AsyncSession):
-        super().__init__(session)
+WS_EVENT_TYPES = (
+    "send_message",
+    "leave_chat",
+    "mark_read",
+    "mark_single_read",
+    "typing",
+    "get_chat_history",
+    "get_unread_count",
+)
+ws_events = metrics.counter(
+    "ws_events_total", "Incoming WebSocket events by type", ("type",)
+)
+
+
+class WebsocketService:
+    """Сервис WebSocket соединения чата.
+
+    Соединение живет часами, поэтому сервис не держит сессию БД: каждое входящее
+    событие открывает свою короткую единицу работы через `uow_factory`.
+    """
+
+    def __init__(self, uow_factory: Callable[[], ChatUnitOfWork] = ChatUnitOfWork):
+        self.uow = uow_factory
         self.manager = connection_manager
-        self.profile_crud = ProfileCRUD(session)
-        self.message_crud = MessageCRUD(session)
-        self.chat_crud = ChatCRUD(session)
         self.dedup_service = deduplication_service
+        self.message_writer = message_writer
 
     async def handle_incoming_connection(self, websocket: WebSocket, chat_id: UUID):
         await websocket.accept()
@@ -39,14 +59,13 @@ class WebsocketService(BaseService):
 
         try:
             auth_message = await websocket.receive_text()
-            profile_schema = await self.authorize_account(auth_message)
+            profile_id = await self.authorize_account(auth_message)
 
-            if not profile_schema:
-                logging.info(f"Profile.ID {profile_schema} authorized")
+            if not profile_id:
+                logging.info("WebSocket authorization failed")
                 await self.manager.close_as_unauthorized(websocket)
                 return
 
-            profile_id = profile_schema.id
             await self.manager.connect(websocket, profile_id)
             await self.manager.user_authorized(websocket, profile_id, chat_id)
 
@@ -60,11 +79,13 @@ class WebsocketService(BaseService):
                 message_data = await self.manager.receive_message_from_socket(websocket)
                 if config.environment in (ApiMode.dev, ApiMode.local):
                     logging.debug(
-                        f"Profile.ID {profile_id} Received message: {message_data}"
+                        "Profile.ID %s Received message: %s", profile_id, message_data
                     )
                 else:
                     logging.debug(
-                        f"Profile.ID {profile_id} Received message type: {message_data.get('type', 'unknown')}"
+                        "Profile.ID %s Received message type: %s",
+                        profile_id,
+                        message_data.get("type", "unknown"),
                     )
                 await self.handle_websocket_message(
                     message_data, profile_id, websocket, chat_id
@@ -72,17 +93,19 @@ class WebsocketService(BaseService):
 
         except WebSocketDisconnect:
             logging.info(
-                f"WebSocket disconnected for Profile.ID {profile_id if 'profile_id' in locals() else 'unknown'}"
+                "WebSocket disconnected for Profile.ID %s",
+                profile_id if "profile_id" in locals() else "unknown",
             )
             if "profile_id" in locals() and "chat_id" in locals():
                 await self.handle_disconnect(profile_id, chat_id)
                 await self.manager.disconnect(websocket, profile_id)
 
         except Exception as e:
-            logging.error(f"WebSocket connection error: {e}")
+            logging.error("WebSocket connection error: %s", e)
             await self.manager.close_as_internal_error(websocket)
 
-    async def authorize_account(self, auth_message: str) -> "ProfileDBSchema| None":
+    async def authorize_account(self, auth_message: str) -> UUID | None:
+        """Id профиля из сообщения авторизации или None"""
         try:
             auth_data = json.loads(auth_message)
             if auth_data.get("type") == "auth":
@@ -90,17 +113,15 @@ class WebsocketService(BaseService):
                 authenticated_user = await authenticate_websocket_user(token)
 
                 if authenticated_user:
-                    profile_db: "ProfileDBSchema" = (
-                        await self.profile_crud.get_profile_by_account_id(
+                    async with self.uow() as uow:
+                        return await uow.profile_crud.get_profile_id_by_account_id(
                             authenticated_user.id
                         )
-                    )
-                    return profile_db
 
         except json.JSONDecodeError:
             logging.warning("Invalid auth message format")
         except Exception as e:
-            logging.error(f"Authorization error: {e}")
+            logging.error("Authorization error: %s", e)
 
         return None
 
@@ -109,10 +130,12 @@ class WebsocketService(BaseService):
     ) -> bool:
         """Автоматическое присоединение к чату после аутентификации"""
         try:
-            db_chat: "ChatDBSchema" = await self.chat_crud.get_by_id(chat_id)
-            members_ids: list[UUID] = [member.id for member in db_chat.members]
+            async with self.uow() as uow:
+                is_member = await uow.chat_crud.is_member(chat_id, profile_id)
+                if not is_member and not await uow.chat_crud.exists(chat_id):
+                    raise ItemNotFoundError(f"Chat {chat_id} not found")
 
-            if profile_id not in members_ids:
+            if not is_member:
                 await self.manager.close_as_not_a_member(websocket)
                 return False
 
@@ -125,7 +148,9 @@ class WebsocketService(BaseService):
             # не посылать уведомление, что пользователь вошел в чат, если он зашел с другого устройства
             if had_multiple_devices_before:
                 logging.debug(
-                    f"Profile.ID {profile_id} connected from additional device to chat {chat_id}"
+                    "Profile.ID %s connected from additional device to chat %s",
+                    profile_id,
+                    chat_id,
                 )
                 await self.manager.send_chat_message(
                     {
@@ -139,36 +164,68 @@ class WebsocketService(BaseService):
                 )
             else:
                 logging.debug(
-                    f"Profile.ID {profile_id} connected from additional device to chat {chat_id}"
+                    "Profile.ID %s connected from additional device to chat %s",
+                    profile_id,
+                    chat_id,
                 )
 
             return True
 
         except ItemNotFoundError:
-            logging.warning(f"Chat.ID {chat_id} Not Found")
+            logging.warning("Chat.ID %s Not Found", chat_id)
             await self.manager.close_chat_not_found(websocket)
             return False
 
     async def send_chat_history(
-        self, chat_id: UUID, profile_id: UUID, websocket: WebSocket, limit: int = 10
+        self,
+        chat_id: UUID,
+        profile_id: UUID,
+        websocket: WebSocket,
+        limit: int = 10,
+        before: Cursor | None = None,
+        after: Cursor | None = None,
     ):
-        """Отправка истории сообщений"""
+        """Отправка истории сообщений.
+
+        Без курсоров отправляются последние сообщения и общее количество
+        способом CHAT_HISTORY_COUNT, с курсором - страница по индексу без подсчета.
+        """
         try:
-            # total_count: int, messages: list[MessageDBSchema]
-            total_count, messages = await self.message_crud.chat_history(
-                chat_id, limit=limit, offset=0
-            )
+            async with self.uow() as uow:
+                if not await uow.chat_crud.is_member(chat_id, profile_id):
+                    message = {"type": "error", "message": "Not a member of chat"}
+                    await self.manager.send_message_to_socket(websocket, message)
+                    return
+                if before is None and after is None:
+                    total_count, has_more, messages = (
+                        await uow.message_crud.chat_history(
+                            chat_id,
+                            limit=limit,
+                            offset=0,
+                            count=CountMode(config.chat.history_count),
+                        )
+                    )
+                    page = {
+                        "total_count": total_count,
+                        "has_more": has_more,
+                        "unread_count": 0,
+                    }
+                else:
+                    has_more, messages = await uow.message_crud.chat_history_page(
+                        chat_id, limit=limit, before=before, after=after
+                    )
+                    page = {"has_more": has_more}
             message = {
                 "type": "chat_history",
                 "messages": [message.model_dump(mode="json") for message in messages],
-                "total_count": total_count,
-                "unread_count": 0,
+                **page,
+                **MessageEntities.page_cursors(messages),
             }
             await self.manager.send_message_to_socket(websocket, message)
-            logging.debug(f"Sent chat history for user {profile_id}")
+            logging.debug("Sent chat history for user %s", profile_id)
 
         except Exception as err:
-            logging.error(f"Error sending chat history: {err}")
+            logging.error("Error sending chat history: %s", err)
             message = {"type": "error", "message": "Failed to load chat history"}
             await self.manager.send_message_to_socket(websocket, message)
 
@@ -182,6 +239,8 @@ class WebsocketService(BaseService):
         """Обработчик входящих WebSocket сообщений"""
         try:
             message_type = message_data.get("type")
+            # тип от клиента, неизвестные сводятся в одну метку
+            ws_events.inc(message_type if message_type in WS_EVENT_TYPES else "unknown")
 
             if message_type == "send_message":
                 await self.handle_send_message(message_data, user_id, chat_id)
@@ -216,7 +275,7 @@ class WebsocketService(BaseService):
                 )
 
         except Exception as e:
-            logging.error(f"Error handling websocket message: {e}")
+            logging.error("Error handling websocket message: %s", e)
             await self.manager.send_message_to_socket(
                 websocket,
                 {"type": "error", "message": f"Failed to process message: {str(e)}"},
@@ -246,14 +305,14 @@ class WebsocketService(BaseService):
                     chat_id,
                     exclude_user=profile_id,
                 )
-                logging.info(f"User {profile_id} completely left chat {chat_id}")
+                logging.info("User %s completely left chat %s", profile_id, chat_id)
             else:
                 logging.info(
-                    f"User {profile_id} disconnected one device from chat {chat_id}"
+                    "User %s disconnected one device from chat %s", profile_id, chat_id
                 )
 
         except Exception as err:
-            logging.error(f"Error Profile.ID {profile_id} leave chat: {err}")
+            logging.error("Error Profile.ID %s leave chat: %s", profile_id, err)
 
     async def handle_disconnect(self, user_id: UUID, chat_id: UUID):
         """Обработка отключения пользователя (вызывается при WebSocketDisconnect)"""
@@ -269,10 +328,10 @@ class WebsocketService(BaseService):
                 exclude_user=user_id,
             )
 
-            logging.info(f"User {user_id} disconnected from chat {chat_id}")
+            logging.info("User %s disconnected from chat %s", user_id, chat_id)
 
         except Exception as e:
-            logging.error(f"Error handling disconnect: {e}")
+            logging.error("Error handling disconnect: %s", e)
 
     async def handle_send_message(
         self, message_data: dict, user_id: UUID, chat_id: UUID
@@ -289,10 +348,21 @@ class WebsocketService(BaseService):
                 await self.manager.send_personal_message(
                     {"type": "error", "message": f"Message blocked: {reason}"}, user_id
                 )
-                logging.info(f"Blocked duplicate message from user {user_id}: {reason}")
+                logging.info(
+                    "Blocked duplicate message from user %s: %s", user_id, reason
+                )
                 return
 
-            message: "MessageDBSchema" = await self.message_crud.add(
+            async with self.uow() as uow:
+                is_member = await uow.chat_crud.is_member(chat_id, user_id)
+            if not is_member:
+                await self.manager.send_personal_message(
+                    {"type": "error", "message": "Not a member of chat"}, user_id
+                )
+                return
+
+            # запись идет пачкой с сообщениями других сокетов, возврат после коммита
+            message: "MessageDBSchema" = await self.message_writer.write(
                 {
                     "chat_id": chat_id,
                     "sender_id": user_id,
@@ -301,14 +371,15 @@ class WebsocketService(BaseService):
                 }
             )
             await self.dedup_service.mark_message_sent(reason, message.id)
-            await self.session.commit()
             await self.manager.broadcast_to_chat(
-                {"type": "new_message", "message": message.model_dump(mode="json")},
+                EncodedFrame.from_raw_field(
+                    "new_message", "message", message.model_dump_json()
+                ),
                 chat_id,
             )
 
         except Exception as e:
-            logging.error(f"Error sending message: {e}")
+            logging.error("Error sending message: %s", e)
             await self.manager.send_personal_message(
                 {"type": "error", "message": "Failed to send message"}, user_id
             )
@@ -322,17 +393,26 @@ class WebsocketService(BaseService):
             return
 
         try:
-            newly_read_message_ids = (
-                await self.message_crud.mark_messages_read_by_last_id(
-                    chat_id, profile_id, last_read_message_id
+            async with self.uow() as uow:
+                if not await uow.chat_crud.is_member(chat_id, profile_id):
+                    logging.warning(
+                        "User %s is not member of chat %s", profile_id, chat_id
+                    )
+                    return
+                newly_read_message_ids = (
+                    await uow.message_crud.mark_messages_read_by_last_id(
+                        chat_id, profile_id, last_read_message_id
+                    )
                 )
-            )
+                read_messages_info = []
+                if newly_read_message_ids:
+                    # Получаем детальную информацию о прочитанных сообщениях для уведомления
+                    read_messages_info = await uow.message_crud.get_messages_by_ids(
+                        newly_read_message_ids
+                    )
+                await uow.commit()
+
             if newly_read_message_ids:
-                # Получаем детальную информацию о прочитанных сообщениях для уведомления
-                read_messages_info = await self.message_crud.get_messages_by_ids(
-                    newly_read_message_ids
-                )
-                await self.session.commit()
                 await self.manager.broadcast_to_chat(
                     {
                         "type": "messages_read",
@@ -363,12 +443,9 @@ class WebsocketService(BaseService):
                         },
                         sender_id,
                     )
-            else:
-                await self.session.commit()
 
         except Exception as e:
-            logging.error(f"Error marking messages as read: {e}")
-            await self.session.rollback()
+            logging.error("Error marking messages as read: %s", e)
 
     async def handle_mark_single_read(self, message_data: dict, profile_id: UUID):
         """Обработка отметки одного сообщения как прочитанного"""
@@ -379,13 +456,15 @@ class WebsocketService(BaseService):
 
         try:
             message_uuid = UUID(message_id)
-            was_marked = await self.message_crud.mark_as_read_by_profile(
-                message_uuid, profile_id
-            )
-            if was_marked:
-                message_db = await self.message_crud.get_by_id(message_uuid)
-                await self.session.commit()
+            async with self.uow() as uow:
+                was_marked = await uow.message_crud.mark_as_read_by_profile(
+                    message_uuid, profile_id
+                )
+                if was_marked:
+                    message_db = await uow.message_crud.get_by_id(message_uuid)
+                await uow.commit()
 
+            if was_marked:
                 await self.manager.send_personal_message(
                     {
                         "type": "message_read",
@@ -395,12 +474,9 @@ class WebsocketService(BaseService):
                     },
                     message_db.sender.id,
                 )
-            else:
-                await self.session.commit()
 
         except Exception as e:
-            logging.error(f"Error marking single message as read: {e}")
-            await self.session.rollback()
+            logging.error("Error marking single message as read: %s", e)
 
     async def handle_typing(self, message_data: dict, user_id: UUID, chat_id: UUID):
         """Обработка индикатора печати"""
@@ -419,25 +495,36 @@ class WebsocketService(BaseService):
                 exclude_user=user_id,
             )
         except Exception as e:
-            logging.error(f"Error handling typing indicator: {e}")
+            logging.error("Error handling typing indicator: %s", e)
 
     async def handle_get_chat_history(
         self, message_data: dict, user_id: UUID, websocket: WebSocket, chat_id: UUID
     ):
         """Обработка запроса истории чата"""
         limit = message_data.get("limit", 10)
-        offset = message_data.get("offset", 0)
+        try:
+            before, after = CursorParams(
+                before=message_data.get("before"), after=message_data.get("after")
+            ).decode()
+        except ValueError as err:
+            await self.manager.send_message_to_socket(
+                websocket, {"type": "error", "message": str(err)}
+            )
+            return
 
-        await self.send_chat_history(chat_id, user_id, websocket, limit)
+        await self.send_chat_history(
+            chat_id, user_id, websocket, limit, before=before, after=after
+        )
 
     async def handle_get_unread_count(
         self, profile_id: UUID, websocket: WebSocket, chat_id: UUID
     ):
         """Обработка запроса количества непрочитанных сообщений"""
         try:
-            unread_count = await self.message_crud.get_unread_count_for_user(
-                chat_id, profile_id
-            )
+            async with self.uow() as uow:
+                unread_count = await uow.message_crud.get_unread_count_for_user(
+                    chat_id, profile_id
+                )
             await self.manager.send_message_to_socket(
                 websocket,
                 {
@@ -447,7 +534,7 @@ class WebsocketService(BaseService):
                 },
             )
         except Exception as e:
-            logging.error(f"Error getting unread count: {e}")
+            logging.error("Error getting unread count: %s", e)
             await self.manager.send_message_to_socket(
                 websocket,
                 {"type": "error", "message": "Failed to get unread count"},
@@ -0,0 +1,171 @@
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.adapters.backplane import InMemoryBackplane
+from app.modules.base_module.db.errors import ItemNotFoundError
+from app.modules.chat_module.db.cruds import chat_crud, profile_crud
+from app.modules.chat_module.db.cruds.chat_crud import ChatCRUD
+from app.modules.chat_module.db.cruds.profile_crud import ProfileCRUD
+from app.modules.chat_module.db.membership_cache import MembershipCache
+from app.modules.chat_module.errors import ChatNotFound, ProhibitedToModifyChat
+from app.modules.chat_module.schemas.chat_schemas import UpdateChatSchema
+from app.modules.chat_module.services.chat_service import ChatService
+from app.utils.ttl_cache import TTLCache
+
+
+def compile_query(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+class TestAccessChecks:
+    """Тесты проверок доступа без загрузки профиля со всеми чатами"""
+
+    @pytest.fixture
+    def session(self):
+        session = Mock()
+        session.scalar = AsyncMock()
+        return session
+
+    @pytest.fixture(autouse=True)
+    def profile_id_cache(self, monkeypatch):
+        cache = TTLCache(maxsize=10, ttl=60)
+        monkeypatch.setattr(profile_crud, "profile_id_cache", cache)
+        return cache
+
+    async def test_profile_id_query(self, session):
+        profile_id = uuid4()
+        session.scalar.return_value = profile_id
+
+        result = await ProfileCRUD(session).get_profile_id_by_account_id(uuid4())
+
+        assert result == profile_id
+        sql = compile_query(session.scalar.call_args[0][0])
+        assert sql.startswith("SELECT profile.id \nFROM profile")
+        assert "JOIN" not in sql
+
+    async def test_profile_id_cached(self, session):
+        """Тест, что повторная проверка не ходит в БД"""
+        account_id, profile_id = uuid4(), uuid4()
+        session.scalar.return_value = profile_id
+        crud = ProfileCRUD(session)
+
+        await crud.get_profile_id_by_account_id(account_id)
+        result = await crud.get_profile_id_by_account_id(account_id)
+
+        assert result == profile_id
+        session.scalar.assert_called_once()
+
+    async def test_profile_not_found(self, session, profile_id_cache):
+        session.scalar.return_value = None
+
+        with pytest.raises(ItemNotFoundError):
+            await ProfileCRUD(session).get_profile_id_by_account_id(uuid4())
+        assert len(profile_id_cache) == 0
+
+    async def test_owner_probe(self, session):
+        session.scalar.return_value = True
+
+        assert await ChatCRUD(session).is_owner(uuid4(), uuid4()) is True
+
+        sql = compile_query(session.scalar.call_args[0][0])
+        assert sql.startswith("SELECT EXISTS (SELECT * \nFROM chat \nWHERE")
+
+    async def test_history_of_foreign_chat(self, session):
+        """Тест, что чужой чат выглядит как несуществующий"""
+        service = ChatService(session)
+        service.profile_crud.get_profile_id_by_account_id = AsyncMock(
+            return_value=uuid4()
+        )
+        service.chat_crud.is_member = AsyncMock(return_value=False)
+
+        with pytest.raises(ChatNotFound):
+            await service.chat_history(uuid4(), uuid4(), Mock())
+
+    async def test_delete_not_owned_chat(self, session):
+        service = ChatService(session)
+        service.profile_crud.get_profile_id_by_account_id = AsyncMock(
+            return_value=uuid4()
+        )
+        service.chat_crud.is_owner = AsyncMock(return_value=False)
+        service.chat_crud.delete = AsyncMock()
+
+        with pytest.raises(ProhibitedToModifyChat):
+            await service.delete_chat(uuid4(), uuid4())
+        service.chat_crud.delete.assert_not_called()
+
+
+class TestMembershipCache:
+    """Тесты кэша участников чата"""
+
+    @pytest.fixture
+    def backplane(self):
+        return InMemoryBackplane()
+
+    @pytest.fixture
+    def cache(self, backplane, monkeypatch):
+        cache = MembershipCache(backplane, maxsize=10, ttl=60)
+        monkeypatch.setattr(chat_crud, "membership_cache", cache)
+        return cache
+
+    @pytest.fixture
+    def session(self):
+        session = Mock()
+        session.scalars = AsyncMock()
+        return session
+
+    async def test_members_loaded_once(self, cache, session):
+        """Тест, что повторные проверки участия не ходят в БД"""
+        chat_id, profile_id = uuid4(), uuid4()
+        session.scalars.return_value = [profile_id]
+        crud = ChatCRUD(session)
+
+        assert await crud.is_member(chat_id, profile_id) is True
+        assert await crud.is_member(chat_id, uuid4()) is False
+
+        session.scalars.assert_called_once()
+        sql = compile_query(session.scalars.call_args[0][0])
+        assert sql.startswith("SELECT chat_user.profile_id \nFROM chat_user")
+
+    async def test_invalidate_on_all_workers(self, cache, backplane, session):
+        chat_id, profile_id = uuid4(), uuid4()
+        other_worker = MembershipCache(backplane, maxsize=10, ttl=60)
+        cache.set(chat_id, frozenset())
+        other_worker.set(chat_id, frozenset())
+
+        await cache.invalidate(chat_id)
+
+        assert cache.get(chat_id) is None
+        assert other_worker.get(chat_id) is None
+        session.scalars.return_value = [profile_id]
+        assert await ChatCRUD(session).is_member(chat_id, profile_id) is True
+
+    async def test_invalidate_after_adding_members(self, cache, session, monkeypatch):
+        """Тест сброса кэша после коммита новых участников"""
+        monkeypatch.setattr(
+            "app.modules.chat_module.services.chat_service.membership_cache", cache
+        )
+        chat_id, profile_id, new_member_id = uuid4(), uuid4(), uuid4()
+        cache.set(chat_id, frozenset([profile_id]))
+        session.commit = AsyncMock()
+        service = ChatService(session)
+        service.profile_crud.get_profile_id_by_account_id = AsyncMock(
+            return_value=profile_id
+        )
+        service.profile_crud.get_by_ids = AsyncMock(
+            return_value=[Mock(id=new_member_id), Mock(id=profile_id)]
+        )
+        service.chat_crud.is_owner = AsyncMock(return_value=True)
+        service.chat_crud.update = AsyncMock(
+            return_value=Mock(id=chat_id, members=[Mock(id=profile_id)])
+        )
+        service.chat_crud.add_members = AsyncMock()
+
+        await service.update_chat(
+            uuid4(), UpdateChatSchema(members=[new_member_id]), chat_id
+        )
+
+        service.chat_crud.add_members.assert_called_once_with(chat_id, [new_member_id])
+        assert cache.get(chat_id) is None
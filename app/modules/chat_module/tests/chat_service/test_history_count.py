@@ -0,0 +1,120 @@
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.modules.base_module.db.cruds.base_crud import BaseCRUD
+from app.modules.base_module.schemas.pagination import CountMode
+from app.modules.chat_module.db.cruds.message_crud import MessageCRUD
+from app.modules.chat_module.db.models.chat import MessageModel
+
+
+class TestHistoryCount:
+    """Тесты способов подсчета общего количества в истории чата"""
+
+    @pytest.fixture
+    def session(self):
+        session = Mock()
+        result = Mock()
+        result.unique.return_value.all.return_value = []
+        session.scalars = AsyncMock(return_value=result)
+        session.scalar = AsyncMock(return_value=7)
+        session.get_bind.return_value.dialect = postgresql.psycopg.dialect()
+        return session
+
+    def executed_sql(self, mock) -> list[str]:
+        return [str(call.args[0]) for call in mock.call_args_list]
+
+    async def test_exact_count(self, session):
+        page = await MessageCRUD(session).chat_history(
+            uuid4(), limit=10, offset=0, count=CountMode.exact
+        )
+
+        assert page.total_count == 7
+        (sql,) = self.executed_sql(session.scalar)
+        assert "count(*)" in sql
+
+    async def test_no_count(self, session):
+        """Тест, что без подсчета выполняется только запрос страницы"""
+        page = await MessageCRUD(session).chat_history(
+            uuid4(), limit=10, offset=0, count=CountMode.none
+        )
+
+        assert page.total_count is None
+        session.scalar.assert_not_called()
+        session.scalars.assert_called_once()
+
+    async def test_estimated_count_uses_chat_counter(self, session):
+        """Тест, что оценка берется из счетчика чата, а не из прохода по сообщениям"""
+        page = await MessageCRUD(session).chat_history(
+            uuid4(), limit=10, offset=0, count=CountMode.estimated
+        )
+
+        assert page.total_count == 7
+        (sql,) = self.executed_sql(session.scalar)
+        assert "FROM chat_stats" in sql
+        assert "count(" not in sql
+
+    async def test_planner_estimate(self, session):
+        """Тест оценки количества по плану запроса"""
+        session.scalar.return_value = [{"Plan": {"Plan Rows": 120}}]
+        query = select(MessageModel).where(MessageModel.chat_id == uuid4())
+
+        total = await BaseCRUD(session).count_select(query, CountMode.estimated)
+
+        assert total == 120
+        (sql,) = self.executed_sql(session.scalar)
+        assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+        assert "count(" not in sql
+
+    async def test_has_more_from_extra_row(self, session):
+        """Тест признака следующей страницы по лишней записи"""
+        rows = [Mock(name=f"message{i}") for i in range(3)]
+        session.scalars.return_value.unique.return_value.all.return_value = rows
+        crud = MessageCRUD(session)
+        crud.to_schemas = list
+
+        page = await crud.chat_history(uuid4(), limit=2, offset=1, count=CountMode.none)
+
+        assert page.has_more is True
+        assert page.items == [rows[1], rows[0]]
+        sql = str(
+            session.scalars.call_args[0][0].compile(
+                dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+            )
+        )
+        assert "LIMIT 3 OFFSET 2" in sql
+
+
+class TestChatStats:
+    """Тесты обновления счетчиков чата при добавлении сообщения"""
+
+    async def test_add_message_upserts_stats(self):
+        session = Mock()
+        session.execute = AsyncMock()
+        message = Mock(chat_id=uuid4(), id=uuid4(), sent_at=None)
+        crud = MessageCRUD(session)
+
+        await crud.update_chat_stats(message)
+
+        sql = str(
+            session.execute.call_args[0][0].compile(dialect=postgresql.dialect())
+        )
+        assert sql.startswith("INSERT INTO chat_stats")
+        assert "ON CONFLICT (chat_id) DO UPDATE" in sql
+        assert "message_count = (chat_stats.message_count + " in sql
+
+    async def test_add_updates_stats_in_same_session(self, monkeypatch):
+        message = Mock()
+        monkeypatch.setattr(BaseCRUD, "add", AsyncMock(return_value=message))
+        crud = MessageCRUD(Mock())
+        crud.update_chat_stats = AsyncMock()
+        crud.increment_unread = AsyncMock()
+
+        result = await crud.add({"text": "hello"}, return_raw=True)
+
+        assert result is message
+        crud.update_chat_stats.assert_called_once_with(message)
+        crud.increment_unread.assert_called_once_with(message)
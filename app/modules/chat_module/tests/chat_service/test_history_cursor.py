@@ -0,0 +1,90 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.modules.base_module.schemas.pagination import Cursor, CursorParams
+from app.modules.chat_module.db.cruds.message_crud import MessageCRUD
+
+
+def compile_query(query) -> str:
+    return str(
+        query.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+
+class TestCursor:
+    """Тесты курсора keyset пагинации"""
+
+    def test_encode_decode(self):
+        cursor = Cursor(datetime(2025, 1, 1, 12, 30, 15, 123456), uuid4())
+
+        assert Cursor.decode(cursor.encode()) == cursor
+
+    # "eHx5" - это base64 от "x|y"
+    @pytest.mark.parametrize("value", ["", "garbage", "eHx5"])
+    def test_decode_invalid(self, value):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            Cursor.decode(value)
+
+    def test_params_one_direction(self):
+        cursor = Cursor(datetime(2025, 1, 1), uuid4()).encode()
+
+        assert CursorParams(after=cursor).decode()[1] == Cursor.decode(cursor)
+        with pytest.raises(ValueError):
+            CursorParams(before=cursor, after=cursor).decode()
+
+
+class TestChatHistoryPage:
+    """Тесты запроса страницы истории по курсору"""
+
+    @pytest.fixture
+    def session(self):
+        session = Mock()
+        result = Mock()
+        result.unique.return_value.all.return_value = []
+        session.scalars = AsyncMock(return_value=result)
+        return session
+
+    async def test_before_cursor_uses_keyset(self, session):
+        """Тест, что запрос идет по (sent_at, id) без offset и count"""
+        cursor = Cursor(datetime(2025, 1, 1, 12, 0), uuid4())
+
+        has_more, messages = await MessageCRUD(session).chat_history_page(
+            uuid4(), limit=20, before=cursor
+        )
+
+        assert (has_more, messages) == (False, [])
+        session.scalars.assert_called_once()
+        sql = compile_query(session.scalars.call_args[0][0])
+        assert "(message.sent_at, message.id) < (" in sql
+        assert "ORDER BY message.sent_at DESC, message.id DESC" in sql
+        assert "LIMIT 21" in sql
+        assert "OFFSET" not in sql
+        assert "count(" not in sql
+
+    async def test_after_cursor_reads_forward(self, session):
+        cursor = Cursor(datetime(2025, 1, 1, 12, 0), uuid4())
+
+        await MessageCRUD(session).chat_history_page(uuid4(), limit=5, after=cursor)
+
+        sql = compile_query(session.scalars.call_args[0][0])
+        assert "(message.sent_at, message.id) > (" in sql
+        assert "ORDER BY message.sent_at, message.id" in sql
+
+    async def test_has_more_and_chronological_order(self, session):
+        """Тест лишней записи для has_more и порядка страницы"""
+        rows = [Mock(name=f"message{i}") for i in range(3)]
+        session.scalars.return_value.unique.return_value.all.return_value = rows
+        crud = MessageCRUD(session)
+        crud.to_schemas = list
+
+        has_more, messages = await crud.chat_history_page(uuid4(), limit=2)
+
+        assert has_more is True
+        # записи пришли от новых к старым, страница отдается хронологически
+        assert messages == [rows[1], rows[0]]
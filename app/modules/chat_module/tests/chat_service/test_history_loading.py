@@ -0,0 +1,59 @@
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.modules.base_module.schemas.pagination import CountMode
+from app.modules.chat_module.db.cruds.message_crud import MessageCRUD
+
+
+def compile_query(query) -> str:
+    return str(
+        query.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+
+class TestHistoryLoading:
+    """Тесты, что страница истории читает только строки сообщений.
+
+    Отправители грузятся отдельным selectin запросом по ключам страницы,
+    поэтому строк страницы ровно limit + 1, сколько бы ни было участников.
+    """
+
+    @pytest.fixture
+    def session(self):
+        session = Mock()
+        result = Mock()
+        result.unique.return_value.all.return_value = []
+        session.scalars = AsyncMock(return_value=result)
+        return session
+
+    def assert_message_rows_only(self, sql: str, limit: int) -> None:
+        assert "JOIN" not in sql
+        assert "profile" not in sql
+        assert f"LIMIT {limit + 1}" in sql
+
+    async def test_offset_page(self, session):
+        await MessageCRUD(session).chat_history(
+            uuid4(), limit=50, offset=0, count=CountMode.none
+        )
+
+        (call,) = session.scalars.call_args_list
+        self.assert_message_rows_only(compile_query(call.args[0]), 50)
+
+    async def test_cursor_page(self, session):
+        await MessageCRUD(session).chat_history_page(uuid4(), limit=50)
+
+        (call,) = session.scalars.call_args_list
+        self.assert_message_rows_only(compile_query(call.args[0]), 50)
+
+    async def test_sender_loaded_by_selectin(self, session):
+        await MessageCRUD(session).get_messages_by_ids([uuid4()])
+
+        query = session.scalars.call_args[0][0]
+        assert "JOIN" not in compile_query(query)
+        (option,) = query._with_options
+        assert option.context[0].strategy == (("lazy", "selectin"),)
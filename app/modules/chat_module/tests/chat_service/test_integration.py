@@ -4,7 +4,8 @@ from uuid import uuid4
 import pytest
 
 from app.modules.auth_module.db.cruds.account_crud import AccountCRUD
-from app.modules.base_module.schemas.pagination import PaginationParams
+from app.modules.base_module.db.cruds.base_crud import Page
+from app.modules.base_module.schemas.pagination import CountMode, PaginationParams
 from app.modules.chat_module.db.cruds.chat_crud import ChatCRUD
 from app.modules.chat_module.db.cruds.message_crud import MessageCRUD
 from app.modules.chat_module.db.cruds.profile_crud import ProfileCRUD
@@ -99,7 +100,9 @@ class TestChatServiceSimplifiedIntegration:
         created_chat.description = chat_data.description
         created_chat.owner_id = profile.id
 
-        chat_service.profile_crud.get_profile_by_account_id = AsyncMock(return_value=profile)
+        chat_service.profile_crud.get_profile_id_by_account_id = AsyncMock(
+            return_value=profile.id
+        )
         chat_service.chat_crud.add = AsyncMock(return_value=created_chat)
         chat_service.profile_crud.get_by_ids = AsyncMock(return_value=[profile])
         chat_service.chat_crud.add_members = AsyncMock()
@@ -109,7 +112,9 @@ class TestChatServiceSimplifiedIntegration:
         assert result == created_chat
         assert result.name == "Интеграционный чат"
 
-        chat_service.profile_crud.get_profile_by_account_id.assert_called_once_with(account.id)
+        chat_service.profile_crud.get_profile_id_by_account_id.assert_called_once_with(
+            account.id
+        )
         chat_service.chat_crud.add.assert_called_once()
         chat_service.profile_crud.get_by_ids.assert_called_once()
         chat_service.chat_crud.add_members.assert_called_once()
@@ -123,7 +128,7 @@ class TestChatServiceSimplifiedIntegration:
         profile = mock_account_data["profile"]
         chat = mock_chat_data["chat"]
 
-        profile.is_owner_of_chat = Mock(return_value=True)
+        chat_service.chat_crud.is_owner = AsyncMock(return_value=True)
 
         update_data = UpdateChatSchema(
             name="Обновленное название", description="Обновленное описание"
@@ -134,7 +139,9 @@ class TestChatServiceSimplifiedIntegration:
         updated_chat.name = update_data.name
         updated_chat.description = update_data.description
 
-        chat_service.profile_crud.get_profile_by_account_id = AsyncMock(return_value=profile)
+        chat_service.profile_crud.get_profile_id_by_account_id = AsyncMock(
+            return_value=profile.id
+        )
         chat_service.chat_crud.update = AsyncMock(return_value=updated_chat)
         chat_service.profile_crud.get_by_ids = AsyncMock(return_value=[profile])
         chat_service.chat_crud.add_members = AsyncMock()
@@ -144,7 +151,9 @@ class TestChatServiceSimplifiedIntegration:
         assert result == updated_chat
         assert result.name == "Обновленное название"
 
-        chat_service.profile_crud.get_profile_by_account_id.assert_called_once_with(account.id)
+        chat_service.profile_crud.get_profile_id_by_account_id.assert_called_once_with(
+            account.id
+        )
         chat_service.chat_crud.update.assert_called_once()
         mock_session.commit.assert_called_once()
 
@@ -156,14 +165,18 @@ class TestChatServiceSimplifiedIntegration:
         profile = mock_account_data["profile"]
         chat = mock_chat_data["chat"]
 
-        chat_service.profile_crud.get_profile_by_account_id = AsyncMock(return_value=profile)
+        chat_service.profile_crud.get_profile_id_by_account_id = AsyncMock(
+            return_value=profile.id
+        )
         chat_service.chat_crud.delete = AsyncMock()
 
-        profile.is_owner_of_chat = Mock(return_value=True)
+        chat_service.chat_crud.is_owner = AsyncMock(return_value=True)
 
         await chat_service.delete_chat(account.id, chat.id)
 
-        chat_service.profile_crud.get_profile_by_account_id.assert_called_once_with(account.id)
+        chat_service.profile_crud.get_profile_id_by_account_id.assert_called_once_with(
+            account.id
+        )
         chat_service.chat_crud.delete.assert_called_once_with(chat.id)
         mock_session.commit.assert_called_once()
 
@@ -176,10 +189,7 @@ class TestChatServiceSimplifiedIntegration:
         chat = mock_chat_data["chat"]
         profile = mock_account_data["profile"]
 
-        profile.chats = [chat]
-        profile.find_chat = Mock(return_value=chat)
-        profile.chat_ids = [chat]
-        profile.is_memeber_of_chat = Mock(return_value=True)
+        chat_service.chat_crud.is_member = AsyncMock(return_value=True)
 
         pagination = PaginationParams(limit=10, offset=0)
 
@@ -188,9 +198,11 @@ class TestChatServiceSimplifiedIntegration:
             Mock(id=uuid4(), text="Сообщение 2", sender_id=uuid4()),
         ]
 
-        chat_service.profile_crud.get_profile_by_account_id = AsyncMock(return_value=profile)
+        chat_service.profile_crud.get_profile_id_by_account_id = AsyncMock(
+            return_value=profile.id
+        )
         chat_service.message_crud.chat_history = AsyncMock(
-            return_value=(2, mock_messages)
+            return_value=Page(2, False, mock_messages)
         )
 
         result = await chat_service.chat_history(account.id, chat.id, pagination)
@@ -198,9 +210,11 @@ class TestChatServiceSimplifiedIntegration:
         assert result["total_count"] == 2
         assert result["entities"] == mock_messages
 
-        chat_service.profile_crud.get_profile_by_account_id.assert_called_once_with(account.id)
+        chat_service.profile_crud.get_profile_id_by_account_id.assert_called_once_with(
+            account.id
+        )
         chat_service.message_crud.chat_history.assert_called_once_with(
-            chat.id, limit=10, offset=0
+            chat.id, limit=10, offset=0, count=CountMode.estimated
         )
 
     async def test_error_handling_integration(self, chat_service, mock_account_data):
@@ -213,7 +227,9 @@ class TestChatServiceSimplifiedIntegration:
         )
 
         # Настраиваем моки для имитации ошибки
-        chat_service.profile_crud.get_profile_by_account_id = AsyncMock(return_value=profile)
+        chat_service.profile_crud.get_profile_id_by_account_id = AsyncMock(
+            return_value=profile.id
+        )
         chat_service.chat_crud.add = AsyncMock(return_value=Mock(id=uuid4()))
         chat_service.profile_crud.get_by_ids = AsyncMock(
             return_value=[]
@@ -230,7 +246,9 @@ class TestChatServiceSimplifiedIntegration:
         profile = mock_account_data["profile"]
         chat_data = CreateChatSchema(name="Транзакционный чат")
 
-        chat_service.profile_crud.get_profile_by_account_id = AsyncMock(return_value=profile)
+        chat_service.profile_crud.get_profile_id_by_account_id = AsyncMock(
+            return_value=profile.id
+        )
         chat_service.chat_crud.add = AsyncMock(return_value=Mock(id=uuid4()))
         chat_service.profile_crud.get_by_ids = AsyncMock(return_value=[account.profile])
         chat_service.chat_crud.add_members = AsyncMock()
@@ -249,7 +267,7 @@ class TestChatServiceSimplifiedIntegration:
         account = mock_account_data["account"]
         profile = mock_account_data["profile"]
 
-        profile.is_owner_of_chat = Mock(return_value=True)
+        chat_service.chat_crud.is_owner = AsyncMock(return_value=True)
 
         chat_data = CreateChatSchema(name="Мульти-операционный чат")
         created_chat = Mock(id=uuid4(), name=chat_data.name)
@@ -257,7 +275,9 @@ class TestChatServiceSimplifiedIntegration:
         update_data = UpdateChatSchema(name="Обновленное название")
         updated_chat = Mock(id=created_chat.id, name=update_data.name)
 
-        chat_service.profile_crud.get_profile_by_account_id = AsyncMock(return_value=profile)
+        chat_service.profile_crud.get_profile_id_by_account_id = AsyncMock(
+            return_value=profile.id
+        )
         chat_service.chat_crud.add = AsyncMock(return_value=created_chat)
         chat_service.chat_crud.update = AsyncMock(return_value=updated_chat)
         chat_service.chat_crud.delete = AsyncMock()
@@ -295,7 +315,7 @@ class TestChatServiceSimplifiedIntegration:
             nonlocal call_count, profile
             call_count += 1
             if call_count == 1:
-                return profile
+                return profile.id
             else:
                 # При повторном вызове возвращаем "обновленный" аккаунт
                 updated_account = Mock()
@@ -306,7 +326,7 @@ class TestChatServiceSimplifiedIntegration:
                 updated_profile.chats = [Mock(id=uuid4())]  # Новый чат появился
                 return updated_account
 
-        chat_service.profile_crud.get_profile_by_account_id = AsyncMock(
+        chat_service.profile_crud.get_profile_id_by_account_id = AsyncMock(
             side_effect=side_effect_get_account
         )
         chat_service.chat_crud.add = AsyncMock(return_value=Mock(id=uuid4()))
@@ -317,7 +337,7 @@ class TestChatServiceSimplifiedIntegration:
         result = await chat_service.create_chat(account.id, chat_data)
 
         assert result is not None
-        assert call_count == 1  # get_profile_by_account_id должен был быть вызван один раз
+        assert call_count == 1  # get_profile_id_by_account_id должен был быть вызван один раз
 
     async def test_data_consistency_integration(
         self, chat_service, mock_account_data, mock_session
@@ -339,7 +359,9 @@ class TestChatServiceSimplifiedIntegration:
         created_chat = Mock(id=uuid4(), name=chat_data.name)
         all_profiles = [profile] + member_profiles  # Владелец + участники
 
-        chat_service.profile_crud.get_profile_by_account_id = AsyncMock(return_value=profile)
+        chat_service.profile_crud.get_profile_id_by_account_id = AsyncMock(
+            return_value=profile.id
+        )
         chat_service.chat_crud.add = AsyncMock(return_value=created_chat)
         chat_service.profile_crud.get_by_ids = AsyncMock(return_value=all_profiles)
         chat_service.chat_crud.add_members = AsyncMock()
@@ -0,0 +1,129 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.modules.chat_module.db.cruds.message_crud import MessageCRUD
+from app.modules.chat_module.db.models.chat import ChatUsersModel
+
+
+def compile_query(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+class TestReadPosition:
+    """Тесты отметки прочтения участника вместо строки на каждое сообщение"""
+
+    @pytest.fixture
+    def session(self):
+        session = Mock()
+        session.scalar = AsyncMock()
+        session.scalars = AsyncMock(return_value=[])
+        session.execute = AsyncMock(return_value=Mock(rowcount=1))
+        return session
+
+    @pytest.fixture
+    def crud(self, session):
+        crud = MessageCRUD(session)
+        crud._get_position = AsyncMock()
+        return crud
+
+    async def test_mark_read_moves_position(self, crud, session):
+        """Тест, что прочтение обновляет одну строку chat_user"""
+        chat_id, profile_id = uuid4(), uuid4()
+        target = (datetime(2025, 1, 1, 12, 0), uuid4())
+        read_ids = [uuid4(), uuid4()]
+        session.scalar.return_value = ChatUsersModel(
+            chat_id=chat_id,
+            profile_id=profile_id,
+            last_read_sent_at=datetime(2025, 1, 1, 11, 0),
+            last_read_message_id=uuid4(),
+        )
+        session.scalars.return_value = read_ids
+        crud._get_position.return_value = target
+
+        result = await crud.mark_messages_read_by_last_id(chat_id, profile_id, uuid4())
+
+        assert result == read_ids
+        unread_sql = compile_query(session.scalars.call_args[0][0])
+        assert "(message.sent_at, message.id) > (" in unread_sql
+        (update,) = [call.args[0] for call in session.execute.call_args_list]
+        update_sql = compile_query(update)
+        assert update_sql.startswith("UPDATE chat_user SET last_read_sent_at=")
+        assert "(chat_user.last_read_sent_at, chat_user.last_read_message_id) < (" in (
+            update_sql
+        )
+        # счетчик пересчитывается только по сообщениям после новой отметки
+        assert "unread_count=(SELECT count(message.id)" in update_sql
+
+    async def test_mark_read_behind_position(self, crud, session):
+        """Тест, что отметка не двигается назад"""
+        last_read_id = uuid4()
+        session.scalar.return_value = ChatUsersModel(
+            last_read_sent_at=datetime(2025, 1, 1, 12, 0),
+            last_read_message_id=last_read_id,
+        )
+        crud._get_position.return_value = (datetime(2025, 1, 1, 11, 0), uuid4())
+
+        result = await crud.mark_messages_read_by_last_id(uuid4(), uuid4(), uuid4())
+
+        assert result == []
+        session.execute.assert_not_called()
+
+    async def test_concurrent_mark_read(self, crud, session):
+        """Тест, что при параллельном сдвиге уведомление не дублируется"""
+        session.scalar.return_value = ChatUsersModel()
+        session.scalars.return_value = [uuid4()]
+        session.execute.return_value = Mock(rowcount=0)
+        crud._get_position.return_value = (datetime(2025, 1, 1), uuid4())
+
+        assert await crud.mark_messages_read_by_last_id(uuid4(), uuid4(), uuid4()) == []
+
+    async def test_unread_count_from_counter(self, session):
+        """Тест, что непрочитанные читаются из счетчика участника"""
+        session.scalar.return_value = 3
+
+        count = await MessageCRUD(session).get_unread_count_for_user(uuid4(), uuid4())
+
+        assert count == 3
+        sql = compile_query(session.scalar.call_args[0][0])
+        assert sql.startswith("SELECT chat_user.unread_count")
+        assert "FROM message" not in sql
+
+    async def test_unread_counts_in_one_query(self, session):
+        chat_ids = [uuid4(), uuid4()]
+        session.execute.return_value = Mock(
+            all=Mock(return_value=[(chat_ids[0], 2), (chat_ids[1], 0)])
+        )
+
+        counts = await MessageCRUD(session).get_unread_counts(uuid4())
+
+        assert counts == {chat_ids[0]: 2, chat_ids[1]: 0}
+        session.execute.assert_called_once()
+
+    async def test_send_increments_unread(self, session):
+        message = Mock(chat_id=uuid4(), sender_id=uuid4())
+
+        await MessageCRUD(session).increment_unread(message)
+
+        sql = compile_query(session.execute.call_args[0][0])
+        assert "SET unread_count=(chat_user.unread_count + " in sql
+        assert "chat_user.profile_id != " in sql
+
+    def test_has_read(self):
+        profile_id = uuid4()
+        membership = ChatUsersModel(
+            profile_id=profile_id,
+            last_read_sent_at=datetime(2025, 1, 1, 12, 0),
+            last_read_message_id=uuid4(),
+        )
+        older = Mock(sender_id=uuid4(), sent_at=datetime(2025, 1, 1, 11, 0), id=uuid4())
+        newer = Mock(sender_id=uuid4(), sent_at=datetime(2025, 1, 1, 13, 0), id=uuid4())
+        own = Mock(sender_id=profile_id, sent_at=datetime(2025, 1, 1, 13, 0), id=uuid4())
+
+        assert membership.has_read(older) is True
+        assert membership.has_read(newer) is False
+        assert membership.has_read(own) is True
+        assert ChatUsersModel(profile_id=profile_id).has_read(older) is False
@@ -0,0 +1,200 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import psycopg
+import pytest
+
+from app.adapters.backplane import InMemoryBackplane, PostgresBackplane
+from app.modules.chat_module.websoket.connection_manager import ConnectionManager
+from app.settings import config
+
+
+class TestInMemoryBackplane:
+    """Тесты шины событий между воркерами"""
+
+    @pytest.fixture
+    def backplane(self):
+        return InMemoryBackplane()
+
+    @pytest.fixture
+    def mock_websocket(self):
+        websocket = AsyncMock()
+        websocket.client_state = 1
+        return websocket
+
+    async def test_publish_to_subscribers(self, backplane):
+        """Тест доставки события подписчикам топика"""
+        handler = AsyncMock()
+        other_handler = AsyncMock()
+        backplane.subscribe("topic", handler)
+        backplane.subscribe("other", other_handler)
+
+        await backplane.publish("topic", {"key": "value"})
+
+        handler.assert_called_once_with({"key": "value"})
+        other_handler.assert_not_called()
+
+    async def test_handler_error_does_not_break_others(self, backplane):
+        """Тест, что ошибка одного подписчика не мешает остальным"""
+        failing_handler = AsyncMock(side_effect=Exception("boom"))
+        handler = AsyncMock()
+        backplane.subscribe("topic", failing_handler)
+        backplane.subscribe("topic", handler)
+
+        await backplane.publish("topic", {})
+
+        handler.assert_called_once_with({})
+
+    async def test_chat_message_reaches_every_worker(self, backplane, mock_websocket):
+        """Тест доставки сообщения чата сокетам разных воркеров"""
+        worker_1 = ConnectionManager(backplane)
+        worker_2 = ConnectionManager(backplane)
+        sender_id, receiver_id, chat_id = uuid4(), uuid4(), uuid4()
+        sender_socket = AsyncMock()
+
+        await worker_1.connect(sender_socket, sender_id)
+        await worker_1.join_chat(sender_id, chat_id)
+        await worker_2.connect(mock_websocket, receiver_id)
+        await worker_2.join_chat(receiver_id, chat_id)
+
+        message = {"type": "new_message", "text": "hello"}
+        await worker_1.broadcast_to_chat(message, chat_id)
+        await worker_1.flush()
+        await worker_2.flush()
+
+        sender_socket.send_text.assert_called_once_with(json.dumps(message))
+        mock_websocket.send_text.assert_called_once_with(json.dumps(message))
+
+    async def test_personal_message_reaches_every_worker(
+        self, backplane, mock_websocket
+    ):
+        """Тест доставки личного сообщения через другой воркер"""
+        worker_1 = ConnectionManager(backplane)
+        worker_2 = ConnectionManager(backplane)
+        user_id = uuid4()
+        await worker_2.connect(mock_websocket, user_id)
+
+        message = {"type": "your_messages_read", "read_count": 1}
+        await worker_1.send_personal_message(message, user_id)
+        await worker_1.flush()
+        await worker_2.flush()
+
+        mock_websocket.send_text.assert_called_once_with(json.dumps(message))
+
+    async def test_exclude_user_on_other_worker(self, backplane, mock_websocket):
+        """Тест исключения отправителя при доставке через шину"""
+        worker_1 = ConnectionManager(backplane)
+        worker_2 = ConnectionManager(backplane)
+        user_id, chat_id = uuid4(), uuid4()
+        await worker_2.connect(mock_websocket, user_id)
+        await worker_2.join_chat(user_id, chat_id)
+
+        await worker_1.send_chat_message({"type": "typing"}, chat_id, user_id)
+        await worker_1.flush()
+        await worker_2.flush()
+
+        mock_websocket.send_text.assert_not_called()
+
+
+class TestPostgresBackplane:
+    """Тесты шины событий на LISTEN/NOTIFY"""
+
+    def test_encode_splits_large_payload(self):
+        """Тест разбиения большого события на части под лимит NOTIFY"""
+        backplane = PostgresBackplane("", "channel", max_payload_size=1000)
+
+        notifications = backplane.encode("topic", {"text": "ы" * 2000})
+
+        assert len(notifications) > 1
+        assert all(len(item.encode()) < 1100 for item in notifications)
+
+    def test_collect_chunks(self):
+        """Тест сборки события из частей"""
+        sender = PostgresBackplane("", "channel", max_payload_size=200)
+        receiver = PostgresBackplane("", "channel", max_payload_size=200)
+        handler = AsyncMock()
+        receiver.subscribe("topic", handler)
+        payload = {"text": "привет" * 100}
+
+        events = [
+            receiver.decode(notification)
+            for notification in reversed(sender.encode("topic", payload))
+        ]
+
+        assert events[:-1] == [None] * (len(events) - 1)
+        assert events[-1] == ("topic", payload)
+
+    def test_skip_own_events(self):
+        """Тест, что воркер не получает обратно свои события"""
+        backplane = PostgresBackplane("", "channel")
+
+        for notification in backplane.encode("topic", {}):
+            assert backplane.decode(notification) is None
+
+    async def test_publish_between_connections(self):
+        """Тест доставки события другому воркеру через PostgreSQL"""
+        try:
+            conn = await psycopg.AsyncConnection.connect(
+                config.db.dsn_no_driver, connect_timeout=2
+            )
+        except psycopg.OperationalError as err:
+            pytest.skip(f"PostgreSQL is unavailable: {err}")
+        await conn.close()
+
+        channel = f"test_backplane_{uuid4().hex}"
+        publisher = PostgresBackplane(config.db.dsn_no_driver, channel)
+        listener = PostgresBackplane(config.db.dsn_no_driver, channel)
+        received = asyncio.Queue()
+        local_handler = AsyncMock()
+
+        async def handler(payload):
+            await received.put(payload)
+
+        listener.subscribe("topic", handler)
+        publisher.subscribe("topic", local_handler)
+        payload = {"text": "x" * 20000, "chat_id": str(uuid4())}
+
+        await publisher.start()
+        await listener.start()
+        try:
+            await publisher.publish("topic", payload)
+
+            assert await asyncio.wait_for(received.get(), timeout=5) == payload
+            local_handler.assert_called_once_with(payload)
+        finally:
+            await publisher.stop()
+            await listener.stop()
+
+    async def test_remote_publish_does_not_wait_local_dispatch(self):
+        """Тест, что отправка другим воркерам не ждет локальной рассылки"""
+        backplane = PostgresBackplane("", "channel")
+        local_started = asyncio.Event()
+        remote_sent = asyncio.Event()
+
+        async def slow_handler(payload):
+            local_started.set()
+            await asyncio.wait_for(remote_sent.wait(), timeout=1)
+
+        async def publish_remote(topic, payload):
+            await local_started.wait()
+            remote_sent.set()
+
+        backplane.subscribe("topic", slow_handler)
+        backplane._publish_remote = publish_remote
+
+        await asyncio.wait_for(backplane.publish("topic", {}), timeout=2)
+
+        assert remote_sent.is_set()
+
+    async def test_publish_failure_is_counted(self):
+        """Тест подсчета событий, которые не удалось отправить другим воркерам"""
+        backplane = PostgresBackplane("", "channel")
+        backplane._get_publish_connection = AsyncMock(
+            side_effect=psycopg.OperationalError("connection refused")
+        )
+
+        await backplane.publish("topic", {})
+
+        assert backplane.get_stats() == {"publish_failures": 1}
@@ -1,10 +1,13 @@
+import asyncio
 import json
-from unittest.mock import AsyncMock
+import time
+from unittest.mock import AsyncMock, patch
 from uuid import uuid4
 
 import pytest
 
 from app.modules.chat_module.websoket.connection_manager import ConnectionManager
+from app.modules.chat_module.websoket.frames import EncodedFrame, get_dumps
 
 
 class TestConnectionManager:
@@ -52,7 +55,7 @@ class TestConnectionManager:
         """Тест отключения пользователя"""
         user_id = uuid4()
 
-        connection_manager.active_connections[user_id].append(mock_websocket)
+        connection_manager.active_connections[user_id].add(mock_websocket)
         await connection_manager.disconnect(mock_websocket, user_id)
 
         assert user_id not in connection_manager.active_connections
@@ -64,10 +67,10 @@ class TestConnectionManager:
         """Тест отключения одного устройства из нескольких"""
         user_id = uuid4()
 
-        connection_manager.active_connections[user_id] = [
+        connection_manager.active_connections[user_id] = {
             mock_websocket,
             mock_websocket2,
-        ]
+        }
 
         await connection_manager.disconnect(mock_websocket, user_id)
 
@@ -128,6 +131,58 @@ class TestConnectionManager:
         assert len(connection_manager.chat_connections[chat_id][user_id]) == 1
         assert mock_websocket2 in connection_manager.chat_connections[chat_id][user_id]
 
+    async def test_disconnect_removes_socket_from_its_chats(
+        self, connection_manager, mock_websocket, mock_websocket2
+    ):
+        """Тест, что отключение убирает сокет из всех его чатов по обратному индексу"""
+        user_id = uuid4()
+        chat1_id, chat2_id = uuid4(), uuid4()
+
+        await connection_manager.connect(mock_websocket, user_id)
+        await connection_manager.connect(mock_websocket2, user_id)
+        await connection_manager.join_chat(user_id, chat1_id)
+        await connection_manager.join_chat(user_id, chat2_id)
+        assert connection_manager.socket_chats[mock_websocket] == {
+            (chat1_id, user_id),
+            (chat2_id, user_id),
+        }
+
+        await connection_manager.disconnect(mock_websocket, user_id)
+
+        assert mock_websocket not in connection_manager.socket_chats
+        assert connection_manager.chat_connections[chat1_id][user_id] == {
+            mock_websocket2
+        }
+        assert connection_manager.chat_connections[chat2_id][user_id] == {
+            mock_websocket2
+        }
+
+        await connection_manager.disconnect(mock_websocket2, user_id)
+
+        assert not connection_manager.chat_connections
+        assert not connection_manager.socket_chats
+
+    async def test_leave_chat_updates_socket_index(
+        self, connection_manager, mock_websocket
+    ):
+        """Тест, что выход из чата удаляет чат из обратного индекса сокета"""
+        user_id = uuid4()
+        chat1_id, chat2_id = uuid4(), uuid4()
+
+        await connection_manager.connect(mock_websocket, user_id)
+        await connection_manager.join_chat(user_id, chat1_id)
+        await connection_manager.join_chat(user_id, chat2_id)
+
+        await connection_manager.leave_chat(user_id, chat1_id)
+        assert connection_manager.socket_chats[mock_websocket] == {(chat2_id, user_id)}
+        assert chat1_id not in connection_manager.chat_connections
+
+        await connection_manager.leave_chat_single_device(
+            user_id, chat2_id, mock_websocket
+        )
+        assert mock_websocket not in connection_manager.socket_chats
+        assert chat2_id not in connection_manager.chat_connections
+
     async def test_send_personal_message(self, connection_manager, mock_websocket):
         """Тест отправки личного сообщения"""
         user_id = uuid4()
@@ -135,6 +190,7 @@ class TestConnectionManager:
 
         await connection_manager.connect(mock_websocket, user_id)
         await connection_manager.send_personal_message(message, user_id)
+        await connection_manager.flush()
 
         mock_websocket.send_text.assert_called_once_with(json.dumps(message))
 
@@ -155,6 +211,7 @@ class TestConnectionManager:
 
         # Отправляем сообщение в чат
         await connection_manager.send_chat_message(message, chat_id)
+        await connection_manager.flush()
 
         # Оба пользователя должны получить сообщение
         mock_websocket.send_text.assert_called_once_with(json.dumps(message))
@@ -177,6 +234,7 @@ class TestConnectionManager:
         await connection_manager.send_chat_message(
             message, chat_id, exclude_user=user1_id
         )
+        await connection_manager.flush()
 
         mock_websocket.send_text.assert_not_called()
         mock_websocket2.send_text.assert_called_once_with(json.dumps(message))
@@ -196,6 +254,7 @@ class TestConnectionManager:
         await connection_manager.join_chat(user2_id, chat_id)
 
         await connection_manager.broadcast_to_chat(message, chat_id)
+        await connection_manager.flush()
 
         mock_websocket.send_text.assert_called_once_with(json.dumps(message))
         mock_websocket2.send_text.assert_called_once_with(json.dumps(message))
@@ -207,8 +266,8 @@ class TestConnectionManager:
         user2_id = uuid4()
         user3_id = uuid4()
 
-        connection_manager.chat_connections[chat_id][user1_id] = [AsyncMock()]
-        connection_manager.chat_connections[chat_id][user2_id] = [AsyncMock()]
+        connection_manager.chat_connections[chat_id][user1_id] = {AsyncMock()}
+        connection_manager.chat_connections[chat_id][user2_id] = {AsyncMock()}
 
         online_users = connection_manager.get_chat_online_users(chat_id)
 
@@ -224,16 +283,16 @@ class TestConnectionManager:
         user2_id = uuid4()
         user3_id = uuid4()
 
-        connection_manager.chat_connections[chat_id][user1_id] = [
+        connection_manager.chat_connections[chat_id][user1_id] = {
             AsyncMock(),
             AsyncMock(),
-        ]
-        connection_manager.chat_connections[chat_id][user2_id] = [AsyncMock()]
-        connection_manager.chat_connections[chat_id][user3_id] = [
+        }
+        connection_manager.chat_connections[chat_id][user2_id] = {AsyncMock()}
+        connection_manager.chat_connections[chat_id][user3_id] = {
             AsyncMock(),
             AsyncMock(),
             AsyncMock(),
-        ]
+        }
 
         stats = connection_manager.get_chat_stats(chat_id)
 
@@ -265,7 +324,7 @@ class TestConnectionManager:
         )
 
         # Одно устройство
-        connection_manager.chat_connections[chat_id][user_id] = [AsyncMock()]
+        connection_manager.chat_connections[chat_id][user_id] = {AsyncMock()}
         assert (
             await connection_manager.profile_has_multiple_devices_in_chat(
                 chat_id, user_id
@@ -274,10 +333,10 @@ class TestConnectionManager:
         )
 
         # Два устройства
-        connection_manager.chat_connections[chat_id][user_id] = [
+        connection_manager.chat_connections[chat_id][user_id] = {
             AsyncMock(),
             AsyncMock(),
-        ]
+        }
         assert (
             await connection_manager.profile_has_multiple_devices_in_chat(
                 chat_id, user_id
@@ -296,14 +355,17 @@ class TestConnectionManager:
         mock_websocket_error.send_text.side_effect = Exception("Connection lost")
 
         # Подключаем пользователя
-        connection_manager.active_connections[user_id] = [mock_websocket_error]
-        connection_manager.chat_connections[chat_id][user_id] = [mock_websocket_error]
+        await connection_manager.connect(mock_websocket_error, user_id)
+        await connection_manager.join_chat(user_id, chat_id)
 
         # Отправляем сообщение - не должно падать
         await connection_manager.send_personal_message(message, user_id)
+        await connection_manager.flush()
         await connection_manager.send_chat_message(message, chat_id)
+        await connection_manager.flush()
 
-        # Пользователь должен быть отключен после ошибки
+        # Пользователь должен быть отключен после ошибки, а сокет закрыт
+        mock_websocket_error.close.assert_called_with(code=1011, reason="Send failed")
         assert user_id not in connection_manager.active_connections
         assert user_id not in connection_manager.chat_connections.get(chat_id, {})
 
@@ -338,6 +400,109 @@ class TestConnectionManager:
 
         await connection_manager.connect(mock_websocket, user_id)
         await connection_manager.send_personal_message(complex_message, user_id)
+        await connection_manager.flush()
 
         expected_json = json.dumps(complex_message)
         mock_websocket.send_text.assert_called_once_with(expected_json)
+
+    async def test_slow_socket_does_not_block_chat(
+        self, connection_manager, mock_websocket
+    ):
+        """Тест, что медленный сокет не задерживает рассылку и отключается по таймауту"""
+        slow_user_id = uuid4()
+        user_id = uuid4()
+        chat_id = uuid4()
+        slow_websocket = AsyncMock()
+
+        async def slow_send(_):
+            await asyncio.sleep(10)
+
+        slow_websocket.send_text.side_effect = slow_send
+        connection_manager.send_timeout = 0.05
+
+        await connection_manager.connect(slow_websocket, slow_user_id)
+        await connection_manager.connect(mock_websocket, user_id)
+        await connection_manager.join_chat(slow_user_id, chat_id)
+        await connection_manager.join_chat(user_id, chat_id)
+
+        await asyncio.wait_for(
+            connection_manager.broadcast_to_chat({"type": "test"}, chat_id), 0.01
+        )
+        await asyncio.wait_for(connection_manager.flush(), 1)
+
+        mock_websocket.send_text.assert_called_once()
+        slow_websocket.close.assert_called_once_with(code=1013, reason="Slow consumer")
+        assert connection_manager.is_user_online(slow_user_id) is False
+        assert connection_manager.get_chat_online_users(chat_id) == [user_id]
+
+        stats = connection_manager.get_broadcast_stats()
+        assert stats["broadcasts"] == 1
+        assert stats["recipients"] == 2
+        assert stats["timeouts"] == 1
+        assert stats["latency_max"] < 1
+
+    async def test_broadcast_serializes_once(self, connection_manager):
+        """Тест, что сообщение сериализуется один раз для всех получателей"""
+        chat_id = uuid4()
+        sockets = []
+        for _ in range(5):
+            user_id = uuid4()
+            socket = AsyncMock()
+            sockets.append(socket)
+            await connection_manager.connect(socket, user_id)
+            await connection_manager.join_chat(user_id, chat_id)
+        message = {"type": "new_message", "text": "Сообщение"}
+
+        with patch(
+            "app.modules.chat_module.websoket.frames.dumps", wraps=json.dumps
+        ) as mock_dumps:
+            await connection_manager.broadcast_to_chat(message, chat_id)
+            await connection_manager.flush()
+
+        mock_dumps.assert_called_once_with(message)
+        for socket in sockets:
+            socket.send_text.assert_called_once_with(json.dumps(message))
+
+    async def test_send_encoded_frame(self, connection_manager, mock_websocket):
+        """Тест отправки заранее сериализованного фрейма"""
+        user_id = uuid4()
+        frame = EncodedFrame.from_raw_field("new_message", "message", '{"id": "1"}')
+
+        await connection_manager.connect(mock_websocket, user_id)
+        await connection_manager.send_personal_message(frame, user_id)
+        await connection_manager.flush()
+
+        sent = mock_websocket.send_text.call_args[0][0]
+        assert json.loads(sent) == {"type": "new_message", "message": {"id": "1"}}
+
+    def test_orjson_backend_fallback(self):
+        """Тест, что без установленного orjson используется json"""
+        message = {"type": "test", "text": "Сообщение", "items": [1, 2]}
+
+        with patch("app.modules.chat_module.websoket.frames.orjson", None):
+            assert get_dumps("orjson")(message) == json.dumps(message)
+
+    async def test_mass_disconnect_benchmark(self):
+        """Микробенчмарк: отключение 50k сокетов не перебирает все чаты воркера"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        shared_chat_id = uuid4()
+        connections = []
+        for index in range(50_000):
+            socket, user_id = object(), uuid4()
+            connections.append((socket, user_id))
+            await manager.connect(socket, user_id)
+            await manager.join_chat(user_id, uuid4())
+            # часть сокетов состоит в общем чате
+            if index % 10 == 0:
+                await manager.join_chat(user_id, shared_chat_id)
+
+        started_at = time.perf_counter()
+        for socket, user_id in connections:
+            await manager.disconnect(socket, user_id)
+        elapsed = time.perf_counter() - started_at
+
+        # при переборе всех чатов на каждое отключение это заняло бы десятки минут
+        assert elapsed < 5
+        assert not manager.active_connections
+        assert not manager.chat_connections
+        assert not manager.socket_chats
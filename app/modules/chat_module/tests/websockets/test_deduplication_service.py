@@ -36,6 +36,7 @@ class TestMessageDeduplicationService:
         )
         assert is_allowed is False
         assert "Wait" in reason
+        assert dedup_service.get_stats()["blocked"] == 1
 
     async def test_different_users_same_message(self, dedup_service):
         """Тест: разные пользователи могут отправлять одинаковые сообщения"""
@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.modules.chat_module.db.cruds.message_crud import MessageCRUD
+from app.modules.chat_module.db.models.chat import MessageModel
+from app.modules.chat_module.services.message_writer import MessageWriter
+
+
+class TestMessageWriter:
+    """Тесты групповой записи сообщений"""
+
+    @pytest.fixture
+    def mock_uow(self):
+        uow = AsyncMock()
+        uow.__aenter__.return_value = uow
+        uow.__aexit__.return_value = False
+        uow.message_crud.add_many.side_effect = lambda values: [
+            Mock(text=item["text"]) for item in values
+        ]
+        return uow
+
+    @pytest.fixture
+    def make_writer(self, mock_uow):
+        def _make_writer(delay: float = 0.01, max_batch: int = 100):
+            return MessageWriter(
+                uow_factory=Mock(return_value=mock_uow),
+                delay=delay,
+                max_batch=max_batch,
+            )
+
+        return _make_writer
+
+    async def test_group_commit(self, make_writer, mock_uow):
+        """Тест, что одновременные сообщения пишутся одной транзакцией"""
+        writer = make_writer()
+
+        messages = await asyncio.gather(
+            *(writer.write({"text": str(i)}) for i in range(10))
+        )
+
+        assert [message.text for message in messages] == [str(i) for i in range(10)]
+        mock_uow.message_crud.add_many.assert_called_once()
+        mock_uow.commit.assert_called_once()
+        assert writer.get_stats() == {"batches": 1, "messages": 10, "pending": 0}
+
+    async def test_max_batch(self, make_writer, mock_uow):
+        writer = make_writer(delay=0.05, max_batch=4)
+
+        await asyncio.wait_for(
+            asyncio.gather(*(writer.write({"text": str(i)}) for i in range(10))), 1
+        )
+
+        batch_sizes = [
+            len(call.args[0]) for call in mock_uow.message_crud.add_many.call_args_list
+        ]
+        assert batch_sizes == [4, 4, 2]
+        assert mock_uow.commit.call_count == 3
+
+    async def test_failed_message_does_not_fail_batch(self, make_writer, mock_uow):
+        """Тест, что ошибка одного сообщения не роняет остальные в пачке"""
+
+        def add_many(values):
+            if any(item["text"] == "bad" for item in values):
+                raise ValueError("bad message")
+            return [Mock(text=item["text"]) for item in values]
+
+        mock_uow.message_crud.add_many.side_effect = add_many
+        writer = make_writer()
+
+        results = await asyncio.gather(
+            writer.write({"text": "first"}),
+            writer.write({"text": "bad"}),
+            writer.write({"text": "second"}),
+            return_exceptions=True,
+        )
+
+        assert results[0].text == "first"
+        assert isinstance(results[1], ValueError)
+        assert results[2].text == "second"
+        assert mock_uow.commit.call_count == 2
+
+    async def test_flush(self, make_writer, mock_uow):
+        writer = make_writer(delay=10)
+        task = asyncio.create_task(writer.write({"text": "last"}))
+        await asyncio.sleep(0)
+
+        await asyncio.wait_for(writer.flush(), 1)
+
+        assert (await task).text == "last"
+
+
+class TestAddManyMessages:
+    """Тесты пакетной вставки сообщений"""
+
+    async def test_single_insert_with_counters(self):
+        chat_id, other_chat_id, sender_id = uuid4(), uuid4(), uuid4()
+        sent_at = datetime(2025, 1, 1)
+        values = [
+            {"id": uuid4(), "chat_id": chat_id, "text": "a", "sent_at": sent_at},
+            {
+                "id": uuid4(),
+                "chat_id": chat_id,
+                "text": "b",
+                "sent_at": sent_at + timedelta(seconds=1),
+            },
+            {"id": uuid4(), "chat_id": other_chat_id, "text": "c", "sent_at": sent_at},
+        ]
+        session = Mock()
+        # RETURNING может вернуть строки не в порядке VALUES
+        session.scalars = AsyncMock(
+            return_value=[
+                MessageModel(sender_id=sender_id, **item) for item in reversed(values)
+            ]
+        )
+        crud = MessageCRUD(session)
+        crud.update_chat_stats = AsyncMock()
+        crud.increment_unread = AsyncMock()
+        crud.to_schemas = list
+
+        result = await crud.add_many(values)
+
+        assert [message.text for message in result] == ["a", "b", "c"]
+        (call,) = session.scalars.call_args_list
+        sql = str(call.args[0].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("INSERT INTO message")
+        assert sql.count("VALUES") == 1
+        stats = {
+            call.args[0].chat_id: (call.args[0].text, call.kwargs["count"])
+            for call in crud.update_chat_stats.call_args_list
+        }
+        assert stats == {chat_id: ("b", 2), other_chat_id: ("c", 1)}
+        unread = {
+            call.args[0].chat_id: call.kwargs["count"]
+            for call in crud.increment_unread.call_args_list
+        }
+        assert unread == {chat_id: 2, other_chat_id: 1}
@@ -0,0 +1,153 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from app.modules.chat_module.websoket.broadcast_stats import BroadcastStats
+from app.modules.chat_module.websoket.connection_manager import ConnectionManager
+from app.modules.chat_module.websoket.frames import EncodedFrame
+from app.modules.chat_module.websoket.outbound import OutboundQueue
+from app.settings.chat_settings import OverflowPolicy
+
+
+def typing_frame(user_id: str = "user") -> EncodedFrame:
+    return EncodedFrame.from_message({"type": "typing", "user_id": user_id})
+
+
+def read_frame(message_ids: list[str], read_by: str = "reader") -> EncodedFrame:
+    return EncodedFrame.from_message(
+        {
+            "type": "messages_read",
+            "chat_id": "chat",
+            "read_by": read_by,
+            "message_ids": message_ids,
+            "read_count": len(message_ids),
+        }
+    )
+
+
+class TestOutboundQueue:
+    """Тесты исходящей очереди сокета"""
+
+    @pytest.fixture
+    def make_queue(self):
+        def _make_queue(policies: list[OverflowPolicy], maxsize: int = 2):
+            # писатель не запущен, поэтому очередь не разбирается
+            return OutboundQueue(
+                send=AsyncMock(),
+                on_failure=AsyncMock(),
+                maxsize=maxsize,
+                policies=policies,
+                send_timeout=1,
+                stats=BroadcastStats(),
+            )
+
+        return _make_queue
+
+    def test_drop_oldest_typing(self, make_queue):
+        """Тест вытеснения самого старого события печати"""
+        queue = make_queue([OverflowPolicy.drop_typing])
+        first_typing = typing_frame("first")
+        message = EncodedFrame.from_message({"type": "new_message"})
+
+        queue.put(first_typing)
+        queue.put(message)
+        assert queue.put(typing_frame("second")) is True
+
+        assert [frame.event_type for frame in queue._frames] == ["new_message", "typing"]
+        assert first_typing not in queue._frames
+        assert queue.stats.dropped == 1
+
+    def test_coalesce_read_receipts(self, make_queue):
+        """Тест объединения уведомлений о прочтении"""
+        queue = make_queue([OverflowPolicy.coalesce_read])
+        queue.put(read_frame(["1", "2"]))
+        queue.put(EncodedFrame.from_message({"type": "new_message"}))
+
+        assert queue.put(read_frame(["2", "3"])) is True
+
+        assert len(queue) == 2
+        merged = json.loads(queue._frames[0].text)
+        assert merged["message_ids"] == ["1", "2", "3"]
+        assert merged["read_count"] == 3
+        assert queue.stats.coalesced == 1
+
+    def test_do_not_coalesce_other_reader(self, make_queue):
+        """Тест, что уведомления разных читателей не объединяются"""
+        queue = make_queue(
+            [OverflowPolicy.coalesce_read, OverflowPolicy.disconnect], maxsize=1
+        )
+        queue.put(read_frame(["1"], read_by="first"))
+
+        assert queue.put(read_frame(["2"], read_by="second")) is False
+        assert queue.stats.overflows == 1
+
+    def test_disconnect_after_policies(self, make_queue):
+        """Тест отключения медленного клиента, когда политики не помогли"""
+        queue = make_queue(
+            [OverflowPolicy.drop_typing, OverflowPolicy.disconnect], maxsize=1
+        )
+        queue.put(EncodedFrame.from_message({"type": "new_message"}))
+
+        assert queue.put(EncodedFrame.from_message({"type": "new_message"})) is False
+
+    def test_drop_new_frame_without_disconnect(self, make_queue):
+        """Тест, что без политики disconnect новый фрейм выбрасывается"""
+        queue = make_queue([OverflowPolicy.drop_typing], maxsize=1)
+        first = EncodedFrame.from_message({"type": "new_message", "id": 1})
+        queue.put(first)
+
+        assert queue.put(EncodedFrame.from_message({"type": "new_message"})) is True
+        assert list(queue._frames) == [first]
+        assert queue.stats.dropped == 1
+
+
+class TestConnectionManagerOutbound:
+    """Тесты рассылки через исходящие очереди"""
+
+    async def test_broadcast_does_not_wait_for_slow_socket(self):
+        """Тест, что рассылка не ждет сеть медленного клиента"""
+        manager = ConnectionManager(outbound_queue_size=10)
+        chat_id, slow_user_id, user_id = uuid4(), uuid4(), uuid4()
+        slow_websocket, websocket = AsyncMock(), AsyncMock()
+        send_started = asyncio.Event()
+
+        async def slow_send(_):
+            send_started.set()
+            await asyncio.sleep(10)
+
+        slow_websocket.send_text.side_effect = slow_send
+        for socket, user in ((slow_websocket, slow_user_id), (websocket, user_id)):
+            await manager.connect(socket, user)
+            await manager.join_chat(user, chat_id)
+
+        await asyncio.wait_for(manager.broadcast_to_chat({"type": "a"}, chat_id), 0.1)
+        await asyncio.wait_for(send_started.wait(), 1)
+        await asyncio.wait_for(manager.broadcast_to_chat({"type": "b"}, chat_id), 0.1)
+        await asyncio.wait_for(manager.outbound_queues[websocket].join(), 1)
+
+        assert websocket.send_text.call_count == 2
+        assert len(manager.outbound_queues[slow_websocket]) == 1
+        await manager.disconnect(slow_websocket, slow_user_id)
+        await manager.disconnect(websocket, user_id)
+
+    async def test_overflow_disconnects_slow_consumer(self):
+        """Тест отключения клиента, переполнившего очередь"""
+        manager = ConnectionManager(outbound_queue_size=1)
+        user_id = uuid4()
+        websocket = AsyncMock()
+
+        async def slow_send(_):
+            await asyncio.sleep(10)
+
+        websocket.send_text.side_effect = slow_send
+
+        await manager.connect(websocket, user_id)
+        for _ in range(3):
+            await manager.send_personal_message({"type": "new_message"}, user_id)
+
+        websocket.close.assert_called_once_with(code=1013, reason="Slow consumer")
+        assert manager.is_user_online(user_id) is False
+        assert websocket not in manager.outbound_queues
@@ -0,0 +1,51 @@
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from app.modules.chat_module.db.cruds.message_crud import MessageCRUD
+from app.modules.chat_module.db.unit_of_work import ChatUnitOfWork
+
+
+class TestChatUnitOfWork:
+    """Тесты единицы работы модуля чатов"""
+
+    @pytest.fixture
+    def mock_session(self):
+        return AsyncMock()
+
+    @pytest.fixture
+    def uow(self, mock_session):
+        return ChatUnitOfWork(session_factory=Mock(return_value=mock_session))
+
+    async def test_session_closed_after_block(self, uow, mock_session):
+        """Тест, что сессия живет только внутри блока"""
+        async with uow:
+            assert isinstance(uow.message_crud, MessageCRUD)
+            assert uow.message_crud.session is mock_session
+            await uow.commit()
+
+        mock_session.commit.assert_awaited_once()
+        mock_session.close.assert_awaited_once()
+        assert uow.session is None
+
+    async def test_rollback_on_error(self, uow, mock_session):
+        """Тест отката изменений при ошибке внутри блока"""
+        with pytest.raises(ValueError):
+            async with uow:
+                raise ValueError("boom")
+
+        mock_session.commit.assert_not_called()
+        mock_session.rollback.assert_awaited_once()
+        mock_session.close.assert_awaited_once()
+
+    async def test_each_block_gets_new_session(self, mock_session):
+        """Тест, что каждая операция получает свою сессию"""
+        session_factory = Mock(return_value=mock_session)
+        uow = ChatUnitOfWork(session_factory=session_factory)
+
+        async with uow:
+            pass
+        async with uow:
+            pass
+
+        assert session_factory.call_count == 2
@@ -1,11 +1,15 @@
 import asyncio
+import json
+from datetime import datetime
 from unittest.mock import AsyncMock, Mock, patch
 from uuid import uuid4
 
 import pytest
 from fastapi import WebSocketDisconnect
 
-from app.modules.base_module.db.errors import ItemNotFoundError
+from app.modules.base_module.db.cruds.base_crud import Page
+from app.modules.base_module.schemas.pagination import CountMode, Cursor
+from app.modules.chat_module.services.message_writer import MessageWriter
 from app.modules.chat_module.services.websocket_service import WebsocketService
 
 
@@ -13,17 +17,20 @@ class TestWebsocketService:
     """Тесты для WebSocket сервиса"""
 
     @pytest.fixture
-    def mock_session(self):
-        return AsyncMock()
+    def mock_uow(self):
+        uow = AsyncMock()
+        uow.__aenter__.return_value = uow
+        uow.__aexit__.return_value = False
+        return uow
 
     @pytest.fixture
-    def websocket_service(self, mock_session):
-        service = WebsocketService(mock_session)
+    def websocket_service(self, mock_uow):
+        service = WebsocketService(uow_factory=Mock(return_value=mock_uow))
         service.manager = AsyncMock()
-        service.profile_crud = AsyncMock()
-        service.message_crud = AsyncMock()
-        service.chat_crud = AsyncMock()
         service.dedup_service = AsyncMock()
+        service.message_writer = MessageWriter(
+            uow_factory=Mock(return_value=mock_uow), delay=0
+        )
         return service
 
     @pytest.fixture
@@ -48,7 +55,7 @@ class TestWebsocketService:
         return {"account": profile, "account_id": account_id, "profile_id": profile_id}
 
     async def test_authorize_account_success(
-        self, websocket_service, mock_account_data
+        self, websocket_service, mock_account_data, mock_uow
     ):
         """Тест успешной авторизации через WebSocket"""
         auth_message = '{"type": "auth", "token": "valid_token"}'
@@ -58,15 +65,15 @@ class TestWebsocketService:
             "app.modules.chat_module.services.websocket_service.authenticate_websocket_user"
         ) as mock_auth:
             mock_auth.return_value = Mock(id=mock_account.id)
-            websocket_service.profile_crud.get_profile_by_account_id.return_value = (
-                mock_account
+            mock_uow.profile_crud.get_profile_id_by_account_id.return_value = (
+                mock_account.id
             )
 
             result = await websocket_service.authorize_account(auth_message)
 
-            assert result == mock_account
+            assert result == mock_account.id
             mock_auth.assert_called_once_with("valid_token")
-            websocket_service.profile_crud.get_profile_by_account_id.assert_called_once_with(
+            mock_uow.profile_crud.get_profile_id_by_account_id.assert_called_once_with(
                 mock_account.id
             )
 
@@ -101,16 +108,13 @@ class TestWebsocketService:
 
     # @pytest.mark.skip("Разобраться почему не отправляет сообщения")
     async def test_auto_join_chat_success(
-        self, websocket_service, mock_websocket, mock_account_data
+        self, websocket_service, mock_websocket, mock_account_data, mock_uow
     ):
         """Тест успешного автоматического присоединения к чату"""
         chat_id = uuid4()
         profile_id = mock_account_data["profile_id"]
 
-        mock_chat = Mock()
-        mock_chat.members = [Mock(id=profile_id), Mock(id=uuid4())]
-
-        websocket_service.chat_crud.get_by_id.return_value = mock_chat
+        mock_uow.chat_crud.is_member.return_value = True
         websocket_service.manager.profile_has_multiple_devices_in_chat.return_value = (
             False
         )
@@ -132,17 +136,15 @@ class TestWebsocketService:
         )
 
     async def test_auto_join_chat_not_member(
-        self, websocket_service, mock_websocket, mock_account_data
+        self, websocket_service, mock_websocket, mock_account_data, mock_uow
     ):
         """Тест присоединения к чату, где пользователь не является участником"""
         chat_id = uuid4()
         profile_id = mock_account_data["profile_id"]
 
         # Мокаем чат без данного пользователя
-        mock_chat = Mock()
-        mock_chat.members = [Mock(id=uuid4()), Mock(id=uuid4())]
-
-        websocket_service.chat_crud.get_by_id.return_value = mock_chat
+        mock_uow.chat_crud.is_member.return_value = False
+        mock_uow.chat_crud.exists.return_value = True
 
         result = await websocket_service.auto_join_chat(
             chat_id, profile_id, mock_websocket
@@ -154,14 +156,15 @@ class TestWebsocketService:
         )
 
     async def test_auto_join_chat_not_found(
-        self, websocket_service, mock_websocket, mock_account_data
+        self, websocket_service, mock_websocket, mock_account_data, mock_uow
     ):
         """Тест присоединения к несуществующему чату"""
 
         chat_id = uuid4()
         profile_id = mock_account_data["profile_id"]
 
-        websocket_service.chat_crud.get_by_id.side_effect = ItemNotFoundError()
+        mock_uow.chat_crud.is_member.return_value = False
+        mock_uow.chat_crud.exists.return_value = False
 
         result = await websocket_service.auto_join_chat(
             chat_id, profile_id, mock_websocket
@@ -173,16 +176,13 @@ class TestWebsocketService:
         )
 
     async def test_auto_join_chat_multiple_devices(
-        self, websocket_service, mock_websocket, mock_account_data
+        self, websocket_service, mock_websocket, mock_account_data, mock_uow
     ):
         """Тест присоединения к чату с нескольких устройств"""
         chat_id = uuid4()
         profile_id = mock_account_data["profile_id"]
 
-        mock_chat = Mock()
-        mock_chat.members = [Mock(id=profile_id)]
-
-        websocket_service.chat_crud.get_by_id.return_value = mock_chat
+        mock_uow.chat_crud.is_member.return_value = True
         websocket_service.manager.profile_has_multiple_devices_in_chat.return_value = (
             True
         )
@@ -196,7 +196,7 @@ class TestWebsocketService:
         websocket_service.manager.send_chat_message.assert_not_called()
 
     async def test_send_chat_history(
-        self, websocket_service, mock_websocket, mock_account_data
+        self, websocket_service, mock_websocket, mock_account_data, mock_uow
     ):
         """Тест отправки истории чата"""
         chat_id = uuid4()
@@ -216,7 +216,7 @@ class TestWebsocketService:
             ),
         ]
 
-        websocket_service.message_crud.chat_history.return_value = (2, mock_messages)
+        mock_uow.message_crud.chat_history.return_value = Page(2, False, mock_messages)
 
         await websocket_service.send_chat_history(chat_id, profile_id, mock_websocket)
 
@@ -226,16 +226,20 @@ class TestWebsocketService:
         assert call_args[0] == mock_websocket
         assert call_args[1]["type"] == "chat_history"
         assert call_args[1]["total_count"] == 2
+        assert call_args[1]["has_more"] is False
         assert len(call_args[1]["messages"]) == 2
+        mock_uow.message_crud.chat_history.assert_called_once_with(
+            chat_id, limit=10, offset=0, count=CountMode.estimated
+        )
 
     async def test_send_chat_history_error(
-        self, websocket_service, mock_websocket, mock_account_data
+        self, websocket_service, mock_websocket, mock_account_data, mock_uow
     ):
         """Тест обработки ошибки при отправке истории чата"""
         chat_id = uuid4()
         profile_id = mock_account_data["profile_id"]
 
-        websocket_service.message_crud.chat_history.side_effect = Exception(
+        mock_uow.message_crud.chat_history.side_effect = Exception(
             "Database error"
         )
 
@@ -247,8 +251,57 @@ class TestWebsocketService:
         assert call_args[1]["type"] == "error"
         assert "Failed to load chat history" in call_args[1]["message"]
 
+    async def test_get_chat_history_by_cursor(
+        self, websocket_service, mock_websocket, mock_account_data, mock_uow
+    ):
+        """Тест листания истории по курсору без подсчета количества"""
+        chat_id = uuid4()
+        profile_id = mock_account_data["profile_id"]
+        cursor = Cursor(datetime(2025, 1, 1, 12, 0), uuid4())
+        message = Mock(
+            id=uuid4(),
+            sent_at=datetime(2025, 1, 1, 11, 0),
+            model_dump=Mock(return_value={"text": "Message 1"}),
+        )
+        mock_uow.message_crud.chat_history_page.return_value = (True, [message])
+
+        await websocket_service.handle_get_chat_history(
+            {"type": "get_chat_history", "limit": 20, "before": cursor.encode()},
+            profile_id,
+            mock_websocket,
+            chat_id,
+        )
+
+        mock_uow.message_crud.chat_history_page.assert_called_once_with(
+            chat_id, limit=20, before=cursor, after=None
+        )
+        mock_uow.message_crud.chat_history.assert_not_called()
+        call_args = websocket_service.manager.send_message_to_socket.call_args[0]
+        assert call_args[1]["type"] == "chat_history"
+        assert call_args[1]["has_more"] is True
+        assert "total_count" not in call_args[1]
+        assert Cursor.decode(call_args[1]["before_cursor"]) == (
+            message.sent_at,
+            message.id,
+        )
+
+    async def test_get_chat_history_invalid_cursor(
+        self, websocket_service, mock_websocket, mock_account_data, mock_uow
+    ):
+        """Тест ответа на поврежденный курсор"""
+        await websocket_service.handle_get_chat_history(
+            {"type": "get_chat_history", "before": "not a cursor"},
+            mock_account_data["profile_id"],
+            mock_websocket,
+            uuid4(),
+        )
+
+        mock_uow.message_crud.chat_history_page.assert_not_called()
+        call_args = websocket_service.manager.send_message_to_socket.call_args[0]
+        assert call_args[1] == {"type": "error", "message": "Invalid cursor"}
+
     async def test_handle_send_message_success(
-        self, websocket_service, mock_account_data
+        self, websocket_service, mock_account_data, mock_uow
     ):
         """Тест успешной обработки отправки сообщения"""
         message_data = {"type": "send_message", "text": "Тестовое сообщение"}
@@ -264,11 +317,12 @@ class TestWebsocketService:
         # Мокаем создание сообщения
         mock_message = Mock()
         mock_message.id = uuid4()
-        mock_message.model_dump.return_value = {
-            "id": str(mock_message.id),
-            "text": "Тестовое сообщение",
-        }
-        websocket_service.message_crud.add.return_value = mock_message
+        mock_message.model_dump_json.return_value = json.dumps(
+            {"id": str(mock_message.id), "text": "Тестовое сообщение"}
+        )
+        mock_uow.message_crud.add_many.side_effect = lambda values: [mock_message] * len(
+            values
+        )
 
         await websocket_service.handle_send_message(message_data, user_id, chat_id)
 
@@ -276,15 +330,69 @@ class TestWebsocketService:
         websocket_service.dedup_service.check_and_prevent_duplicate.assert_called_once_with(
             user_id, chat_id, "Тестовое сообщение"
         )
-        websocket_service.message_crud.add.assert_called_once()
-        websocket_service.session.commit.assert_called_once()
+        mock_uow.message_crud.add_many.assert_called_once()
+        mock_uow.commit.assert_called_once()
         websocket_service.manager.broadcast_to_chat.assert_called_once()
+        frame = websocket_service.manager.broadcast_to_chat.call_args[0][0]
+        assert json.loads(frame.text) == {
+            "type": "new_message",
+            "message": {"id": str(mock_message.id), "text": "Тестовое сообщение"},
+        }
         websocket_service.dedup_service.mark_message_sent.assert_called_once_with(
             "message_key", mock_message.id
         )
 
+    async def test_handle_send_message_not_member(
+        self, websocket_service, mock_account_data, mock_uow
+    ):
+        """Тест, что сообщение не участника чата не сохраняется"""
+        user_id = mock_account_data["profile_id"]
+        websocket_service.dedup_service.check_and_prevent_duplicate.return_value = (
+            True,
+            "message_key",
+        )
+        mock_uow.chat_crud.is_member.return_value = False
+
+        await websocket_service.handle_send_message(
+            {"type": "send_message", "text": "hello"}, user_id, uuid4()
+        )
+
+        mock_uow.message_crud.add_many.assert_not_called()
+        websocket_service.manager.broadcast_to_chat.assert_not_called()
+        websocket_service.manager.send_personal_message.assert_called_once_with(
+            {"type": "error", "message": "Not a member of chat"}, user_id
+        )
+
+    async def test_handle_send_message_releases_session_before_broadcast(
+        self, websocket_service, mock_account_data, mock_uow
+    ):
+        """Тест, что сессия БД закрывается до рассылки сообщения"""
+        websocket_service.dedup_service.check_and_prevent_duplicate.return_value = (
+            True,
+            "message_key",
+        )
+        mock_message = Mock()
+        mock_message.model_dump_json.return_value = "{}"
+        mock_uow.message_crud.add_many.side_effect = lambda values: [mock_message] * len(
+            values
+        )
+        calls = []
+        mock_uow.__aexit__.side_effect = lambda *args: calls.append("release")
+        websocket_service.manager.broadcast_to_chat.side_effect = (
+            lambda *args: calls.append("broadcast")
+        )
+
+        await websocket_service.handle_send_message(
+            {"type": "send_message", "text": "Сообщение"},
+            mock_account_data["profile_id"],
+            uuid4(),
+        )
+
+        # сессия проверки участия и сессия записи закрыты до рассылки
+        assert calls == ["release", "release", "broadcast"]
+
     async def test_handle_send_message_blocked_duplicate(
-        self, websocket_service, mock_account_data
+        self, websocket_service, mock_account_data, mock_uow
     ):
         """Тест блокировки дублирующегося сообщения"""
         message_data = {"type": "send_message", "text": "Дублирующееся сообщение"}
@@ -300,8 +408,8 @@ class TestWebsocketService:
         await websocket_service.handle_send_message(message_data, user_id, chat_id)
 
         # Проверяем, что сообщение НЕ было создано
-        websocket_service.message_crud.add.assert_not_called()
-        websocket_service.session.commit.assert_not_called()
+        mock_uow.message_crud.add_many.assert_not_called()
+        mock_uow.commit.assert_not_called()
 
         # Проверяем, что было отправлено уведомление об ошибке
         websocket_service.manager.send_personal_message.assert_called_once()
@@ -310,7 +418,7 @@ class TestWebsocketService:
         assert "Message blocked: Too frequent" in call_args[0]["message"]
 
     async def test_handle_send_message_empty_text(
-        self, websocket_service, mock_account_data
+        self, websocket_service, mock_account_data, mock_uow
     ):
         """Тест обработки пустого сообщения"""
         message_data = {"type": "send_message", "text": ""}
@@ -321,10 +429,10 @@ class TestWebsocketService:
 
         # Пустое сообщение не должно обрабатываться
         websocket_service.dedup_service.check_and_prevent_duplicate.assert_not_called()
-        websocket_service.message_crud.add.assert_not_called()
+        mock_uow.message_crud.add_many.assert_not_called()
 
     async def test_handle_send_message_whitespace_only(
-        self, websocket_service, mock_account_data
+        self, websocket_service, mock_account_data, mock_uow
     ):
         """Тест обработки сообщения из одних пробелов"""
         message_data = {"type": "send_message", "text": "   \t\n  "}
@@ -335,10 +443,10 @@ class TestWebsocketService:
 
         # Сообщение из пробелов не должно обрабатываться
         websocket_service.dedup_service.check_and_prevent_duplicate.assert_not_called()
-        websocket_service.message_crud.add.assert_not_called()
+        mock_uow.message_crud.add_many.assert_not_called()
 
     async def test_handle_send_message_database_error(
-        self, websocket_service, mock_account_data
+        self, websocket_service, mock_account_data, mock_uow
     ):
         """Тест обработки ошибки базы данных при отправке сообщения"""
         message_data = {"type": "send_message", "text": "Сообщение с ошибкой"}
@@ -349,7 +457,7 @@ class TestWebsocketService:
             True,
             "message_key",
         )
-        websocket_service.message_crud.add.side_effect = Exception("Database error")
+        mock_uow.message_crud.add_many.side_effect = Exception("Database error")
 
         await websocket_service.handle_send_message(message_data, user_id, chat_id)
 
@@ -399,7 +507,7 @@ class TestWebsocketService:
         # Уведомление о покидании чата не должно отправляться
         websocket_service.manager.send_chat_message.assert_not_called()
 
-    async def test_handle_mark_read(self, websocket_service, mock_account_data):
+    async def test_handle_mark_read(self, websocket_service, mock_account_data, mock_uow):
         """Тест обработки отметки сообщений как прочитанных"""
         message_data = {"type": "mark_read", "last_read_message_id": str(uuid4())}
         profile_id = mock_account_data["profile_id"]
@@ -407,25 +515,25 @@ class TestWebsocketService:
 
         # Мокаем список прочитанных сообщений
         newly_read_ids = [uuid4(), uuid4()]
-        websocket_service.message_crud.mark_messages_read_by_last_id.return_value = (
+        mock_uow.message_crud.mark_messages_read_by_last_id.return_value = (
             newly_read_ids
         )
 
         # Мокаем информацию о сообщениях
         mock_messages = [Mock(sender_id=uuid4()), Mock(sender_id=uuid4())]
-        websocket_service.message_crud.get_messages_by_ids.return_value = mock_messages
+        mock_uow.message_crud.get_messages_by_ids.return_value = mock_messages
 
         await websocket_service.handle_mark_read(message_data, profile_id, chat_id)
 
-        websocket_service.message_crud.mark_messages_read_by_last_id.assert_called_once()
-        websocket_service.session.commit.assert_called_once()
+        mock_uow.message_crud.mark_messages_read_by_last_id.assert_called_once()
+        mock_uow.commit.assert_called_once()
         websocket_service.manager.broadcast_to_chat.assert_called_once()
 
         # Проверяем, что отправители получили персональные уведомления
         assert websocket_service.manager.send_personal_message.call_count == 2
 
     async def test_handle_mark_read_no_new_messages(
-        self, websocket_service, mock_account_data
+        self, websocket_service, mock_account_data, mock_uow
     ):
         """Тест отметки прочитанными когда нет новых сообщений"""
         message_data = {"type": "mark_read", "last_read_message_id": str(uuid4())}
@@ -433,7 +541,7 @@ class TestWebsocketService:
         chat_id = uuid4()
 
         # Мокаем пустой список прочитанных сообщений
-        websocket_service.message_crud.mark_messages_read_by_last_id.return_value = []
+        mock_uow.message_crud.mark_messages_read_by_last_id.return_value = []
 
         await websocket_service.handle_mark_read(message_data, profile_id, chat_id)
 
@@ -441,7 +549,7 @@ class TestWebsocketService:
         websocket_service.manager.broadcast_to_chat.assert_not_called()
         websocket_service.manager.send_personal_message.assert_not_called()
 
-    async def test_handle_mark_single_read(self, websocket_service, mock_account_data):
+    async def test_handle_mark_single_read(self, websocket_service, mock_account_data, mock_uow):
         """Тест отметки одного сообщения как прочитанного"""
         message_id = uuid4()
         message_data = {"type": "mark_single_read", "message_id": str(message_id)}
@@ -452,12 +560,12 @@ class TestWebsocketService:
         mock_message.sender = Mock()
         mock_message.sender.id = uuid4()
 
-        websocket_service.message_crud.mark_as_read_by_profile.return_value = True
-        websocket_service.message_crud.get_by_id.return_value = mock_message
+        mock_uow.message_crud.mark_as_read_by_profile.return_value = True
+        mock_uow.message_crud.get_by_id.return_value = mock_message
 
         await websocket_service.handle_mark_single_read(message_data, profile_id)
 
-        websocket_service.message_crud.mark_as_read_by_profile.assert_called_once_with(
+        mock_uow.message_crud.mark_as_read_by_profile.assert_called_once_with(
             message_id, profile_id
         )
         websocket_service.manager.send_personal_message.assert_called_once()
@@ -489,19 +597,19 @@ class TestWebsocketService:
         )
 
     async def test_handle_get_unread_count(
-        self, websocket_service, mock_websocket, mock_account_data
+        self, websocket_service, mock_websocket, mock_account_data, mock_uow
     ):
         """Тест получения количества непрочитанных сообщений"""
         profile_id = mock_account_data["profile_id"]
         chat_id = uuid4()
 
-        websocket_service.message_crud.get_unread_count_for_user.return_value = 5
+        mock_uow.message_crud.get_unread_count_for_user.return_value = 5
 
         await websocket_service.handle_get_unread_count(
             profile_id, mock_websocket, chat_id
         )
 
-        websocket_service.message_crud.get_unread_count_for_user.assert_called_once_with(
+        mock_uow.message_crud.get_unread_count_for_user.assert_called_once_with(
             chat_id, profile_id
         )
         websocket_service.manager.send_message_to_socket.assert_called_once()
@@ -663,7 +771,7 @@ class TestWebsocketService:
         )
 
     async def test_message_filtering_and_validation(
-        self, websocket_service, mock_account_data
+        self, websocket_service, mock_account_data, mock_uow
     ):
         """Тест фильтрации и валидации сообщений"""
         user_id = mock_account_data["profile_id"]
@@ -690,8 +798,12 @@ class TestWebsocketService:
         )
         mock_message = Mock()
         mock_message.id = uuid4()
-        mock_message.model_dump.return_value = {"id": str(mock_message.id)}
-        websocket_service.message_crud.add.return_value = mock_message
+        mock_message.model_dump_json.return_value = json.dumps(
+            {"id": str(mock_message.id)}
+        )
+        mock_uow.message_crud.add_many.side_effect = lambda values: [mock_message] * len(
+            values
+        )
 
         message_data_valid = {"type": "send_message", "text": "Valid message"}
         await websocket_service.handle_send_message(
@@ -700,7 +812,7 @@ class TestWebsocketService:
         websocket_service.dedup_service.check_and_prevent_duplicate.assert_called_once()
 
     async def test_concurrent_message_handling(
-        self, websocket_service, mock_account_data
+        self, websocket_service, mock_account_data, mock_uow
     ):
         """Тест конкурентной обработки сообщений"""
 
@@ -714,8 +826,12 @@ class TestWebsocketService:
         )
         mock_message = Mock()
         mock_message.id = uuid4()
-        mock_message.model_dump.return_value = {"id": str(mock_message.id)}
-        websocket_service.message_crud.add.return_value = mock_message
+        mock_message.model_dump_json.return_value = json.dumps(
+            {"id": str(mock_message.id)}
+        )
+        mock_uow.message_crud.add_many.side_effect = lambda values: [mock_message] * len(
+            values
+        )
 
         # Создаем несколько одновременных запросов
         message_data = {"type": "send_message", "text": "Concurrent message"}
@@ -726,6 +842,8 @@ class TestWebsocketService:
 
         await asyncio.gather(*tasks)
 
-        # Все сообщения должны быть обработаны
-        assert websocket_service.message_crud.add.call_count == 5
-        assert websocket_service.session.commit.call_count == 5
+        # Все сообщения записаны одной пачкой и одним коммитом
+        mock_uow.message_crud.add_many.assert_called_once()
+        assert len(mock_uow.message_crud.add_many.call_args[0][0]) == 5
+        mock_uow.commit.assert_called_once()
+        assert websocket_service.manager.broadcast_to_chat.call_count == 5
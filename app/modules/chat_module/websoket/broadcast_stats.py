@@ -0,0 +1,79 @@
+from collections import deque
+
+from app.utils.metrics import metrics
+
+broadcast_recipients = metrics.histogram(
+    "ws_broadcast_recipients",
+    "Sockets per broadcast",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+broadcast_duration = metrics.histogram(
+    "ws_broadcast_duration_seconds",
+    "Broadcast fan-out duration",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+
+class BroadcastStats:
+    """Статистика рассылок по сокетам текущего воркера"""
+
+    def __init__(self, window_size: int = 1000):
+        self.broadcasts = 0
+        self.recipients = 0
+        self.timeouts = 0
+        self.errors = 0
+        # события исходящих очередей сокетов
+        self.dropped = 0
+        self.coalesced = 0
+        self.overflows = 0
+        self.max_latency = 0.0
+        self._latencies: deque[float] = deque(maxlen=window_size)
+
+    def record(
+        self, recipients: int, latency: float, timeouts: int, errors: int
+    ) -> None:
+        """Учет одной рассылки.
+
+        Args:
+            recipients (int): количество сокетов-получателей
+            latency (float): длительность рассылки в секундах
+            timeouts (int): количество сокетов, не успевших принять сообщение
+            errors (int): количество сокетов, упавших с ошибкой
+        """
+        self.broadcasts += 1
+        self.recipients += recipients
+        self.timeouts += timeouts
+        self.errors += errors
+        self.max_latency = max(self.max_latency, latency)
+        self._latencies.append(latency)
+        broadcast_recipients.observe(recipients)
+        broadcast_duration.observe(latency)
+
+    def record_failure(self, is_timeout: bool) -> None:
+        """Учет сокета, который не принял сообщение из исходящей очереди."""
+        if is_timeout:
+            self.timeouts += 1
+        else:
+            self.errors += 1
+
+    def percentile(self, percent: float) -> float:
+        """Перцентиль длительности рассылки по последним замерам."""
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+        return ordered[index]
+
+    def get_stats(self) -> dict:
+        return {
+            "broadcasts": self.broadcasts,
+            "recipients": self.recipients,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "overflows": self.overflows,
+            "latency_p50": self.percentile(50),
+            "latency_p99": self.percentile(99),
+            "latency_max": self.max_latency,
+        }
@@ -1,75 +1,117 @@
+import asyncio
 import json
 import logging
+import time
 from collections import defaultdict
-from typing import Dict, List
+from functools import partial
+from typing import Dict, List, Set, Tuple
 from uuid import UUID
 
 from fastapi import WebSocket
 
+from app.adapters.backplane import BaseBackplane, InMemoryBackplane, backplane
+from app.modules.chat_module.websoket.broadcast_stats import BroadcastStats
+from app.modules.chat_module.websoket.frames import EncodedFrame, encode_frame
+from app.modules.chat_module.websoket.outbound import OutboundQueue
+from app.settings import config
+from app.utils.metrics import Sample, metrics
+
+# топик шины событий, через который воркеры обмениваются сообщениями чатов
+CHAT_EVENTS_TOPIC = "chat_events"
+
 
 class ConnectionManager:
-    """Менеджер WebSocket соединений"""
+    """Менеджер WebSocket соединений
+
+    Хранит сокеты только текущего воркера. Рассылки публикуются в шину событий,
+    и каждый воркер доставляет их своим сокетам.
 
-    def __init__(self):
-        self.active_connections: Dict[UUID, List[WebSocket]] = defaultdict(list)
-        self.chat_connections: Dict[UUID, Dict[UUID, List[WebSocket]]] = defaultdict(
-            lambda: defaultdict(list)
+    Для каждого сокета ведется обратный индекс чатов, в которые он добавлен,
+    поэтому отключение не перебирает все чаты воркера.
+    """
+
+    def __init__(
+        self,
+        backplane: BaseBackplane | None = None,
+        outbound_queue_size: int | None = None,
+    ):
+        self.active_connections: Dict[UUID, Set[WebSocket]] = defaultdict(set)
+        self.chat_connections: Dict[UUID, Dict[UUID, Set[WebSocket]]] = defaultdict(
+            lambda: defaultdict(set)
+        )
+        # обратный индекс: сокет -> пары (chat_id, profile_id), где он подключен
+        self.socket_chats: Dict[WebSocket, Set[Tuple[UUID, UUID]]] = defaultdict(set)
+        self.backplane = backplane or InMemoryBackplane()
+        self.send_timeout = config.chat.send_timeout
+        self.broadcast_stats = BroadcastStats()
+        self.outbound_queue_size = (
+            config.chat.outbound_queue_size
+            if outbound_queue_size is None
+            else outbound_queue_size
         )
+        self.outbound_queues: Dict[WebSocket, OutboundQueue] = {}
+        self.backplane.subscribe(CHAT_EVENTS_TOPIC, self.handle_backplane_event)
 
     async def connect(self, socket: WebSocket, user_id: UUID):
         """Подключение пользователя"""
-        self.active_connections[user_id].append(socket)
+        self.active_connections[user_id].add(socket)
+        if self.outbound_queue_size and socket not in self.outbound_queues:
+            queue = OutboundQueue(
+                send=partial(self.send_message_to_socket, socket),
+                on_failure=partial(self._handle_writer_failure, socket, user_id),
+                maxsize=self.outbound_queue_size,
+                policies=config.chat.overflow_policies,
+                send_timeout=self.send_timeout,
+                stats=self.broadcast_stats,
+            )
+            self.outbound_queues[socket] = queue
+            queue.start()
         logging.info(
-            f"Account.ID {user_id} connected. Total connections: {len(self.active_connections[user_id])}"
+            "Account.ID %s connected. Total connections: %s",
+            user_id,
+            len(self.active_connections[user_id]),
         )
 
     async def profile_is_in_chat(self, chat_id: UUID, profile_id: UUID) -> bool:
         """Проверить, находится ли пользователь в чате (хотя бы с одного устройства)"""
-        chat_connections = self.chat_connections.get(chat_id, {}).get(profile_id, [])
+        chat_connections = self.chat_connections.get(chat_id, {}).get(profile_id, ())
         return len(chat_connections) > 0
 
     async def profile_has_multiple_devices_in_chat(
         self, chat_id: UUID, profile_id: UUID
     ) -> bool:
         """Проверить, есть ли у пользователя несколько устройств в чате"""
-        chat_connections = self.chat_connections.get(chat_id, {}).get(profile_id, [])
+        chat_connections = self.chat_connections.get(chat_id, {}).get(profile_id, ())
         return len(chat_connections) > 1
 
     async def disconnect(self, socket: WebSocket, user_id: UUID):
         """Отключение пользователя"""
+        queue = self.outbound_queues.pop(socket, None)
+        if queue is not None:
+            queue.close()
+
         # Удаляем из активных соединений
         if user_id in self.active_connections:
-            if socket in self.active_connections[user_id]:
-                self.active_connections[user_id].remove(socket)
+            self.active_connections[user_id].discard(socket)
 
             # Если у пользователя не осталось активных соединений
             if not self.active_connections[user_id]:
                 del self.active_connections[user_id]
 
-        # Удаляем из всех чатов
-        for chat_id in list(self.chat_connections.keys()):
-            if user_id in self.chat_connections[chat_id]:
-                if socket in self.chat_connections[chat_id][user_id]:
-                    self.chat_connections[chat_id][user_id].remove(socket)
-
-                # Если у пользователя не осталось соединений в чате
-                if not self.chat_connections[chat_id][user_id]:
-                    del self.chat_connections[chat_id][user_id]
-
-                    # Если в чате не осталось пользователей, удаляем чат
-                    if not self.chat_connections[chat_id]:
-                        del self.chat_connections[chat_id]
+        # Удаляем только из тех чатов, где сокет был подключен
+        for chat_id, profile_id in self.socket_chats.pop(socket, ()):
+            self._remove_from_chat(chat_id, profile_id, socket)
 
-        logging.info(f"Account.ID {user_id} disconnected")
+        logging.info("Account.ID %s disconnected", user_id)
 
     async def join_chat(self, user_id: UUID, chat_id: UUID):
         """Присоединение пользователя к чату"""
         if user_id in self.active_connections:
             for socket in self.active_connections[user_id]:
-                if socket not in self.chat_connections[chat_id][user_id]:
-                    self.chat_connections[chat_id][user_id].append(socket)
+                self.chat_connections[chat_id][user_id].add(socket)
+                self.socket_chats[socket].add((chat_id, user_id))
 
-        logging.info(f"User {user_id} joined chat {chat_id}")
+        logging.info("User %s joined chat %s", user_id, chat_id)
 
     async def leave_chat(self, user_id: UUID, chat_id: UUID):
         """Покидание чата - удаляет ВСЕ устройства пользователя из чата"""
@@ -77,65 +119,213 @@ class ConnectionManager:
             chat_id in self.chat_connections
             and user_id in self.chat_connections[chat_id]
         ):
-            del self.chat_connections[chat_id][user_id]
-            logging.info(f"User {user_id} left chat {chat_id}")
+            for socket in self.chat_connections[chat_id].pop(user_id):
+                self._forget_chat(socket, chat_id, user_id)
+
+            if not self.chat_connections[chat_id]:
+                del self.chat_connections[chat_id]
+            logging.info("User %s left chat %s", user_id, chat_id)
 
     async def leave_chat_single_device(
         self, user_id: UUID, chat_id: UUID, socket: WebSocket
     ):
         """Покидание чата конкретным устройством"""
-        if (
-            chat_id in self.chat_connections
-            and user_id in self.chat_connections[chat_id]
-        ):
-            if socket in self.chat_connections[chat_id][user_id]:
-                self.chat_connections[chat_id][user_id].remove(socket)
+        self._forget_chat(socket, chat_id, user_id)
+        self._remove_from_chat(chat_id, user_id, socket)
 
-                # Если у пользователя не осталось соединений в чате
-                if not self.chat_connections[chat_id][user_id]:
-                    del self.chat_connections[chat_id][user_id]
+        logging.info("User %s left chat %s from one device", user_id, chat_id)
 
-        logging.info(f"User {user_id} left chat {chat_id} from one device")
+    def _remove_from_chat(self, chat_id: UUID, user_id: UUID, socket: WebSocket):
+        """Удаление сокета из чата с очисткой опустевших записей"""
+        chat = self.chat_connections.get(chat_id)
+        if chat is None or user_id not in chat:
+            return
 
-    async def send_personal_message(self, message: dict, user_id: UUID):
-        """Отправка личного сообщения пользователю"""
-        if user_id in self.active_connections:
-            disconnected_sockets = []
-            for socket in self.active_connections[user_id].copy():
-                try:
-                    await self.send_message_to_socket(socket, message)
-                except Exception as e:
-                    logging.error(f"Error sending message to user {user_id}: {e}")
-                    disconnected_sockets.append(socket)
+        chat[user_id].discard(socket)
+        # Если у пользователя не осталось соединений в чате
+        if not chat[user_id]:
+            del chat[user_id]
 
-            for socket in disconnected_sockets:
-                await self.disconnect(socket, user_id)
+            # Если в чате не осталось пользователей, удаляем чат
+            if not chat:
+                del self.chat_connections[chat_id]
+
+    def _forget_chat(self, socket: WebSocket, chat_id: UUID, user_id: UUID):
+        """Удаление чата из обратного индекса сокета"""
+        chats = self.socket_chats.get(socket)
+        if chats is None:
+            return
+
+        chats.discard((chat_id, user_id))
+        if not chats:
+            del self.socket_chats[socket]
+
+    async def send_personal_message(
+        self, message: dict | EncodedFrame, user_id: UUID
+    ):
+        """Отправка личного сообщения пользователю на всех воркерах"""
+        frame = encode_frame(message)
+        await self.backplane.publish(
+            CHAT_EVENTS_TOPIC,
+            {
+                "kind": "personal",
+                "user_id": str(user_id),
+                "frame": frame.text,
+                "frame_type": frame.event_type,
+            },
+        )
 
     async def send_chat_message(
-        self, message: dict, chat_id: UUID, exclude_user: UUID = None
+        self, message: dict | EncodedFrame, chat_id: UUID, exclude_user: UUID = None
     ):
-        """Отправка сообщения всем участникам чата"""
+        """Отправка сообщения всем участникам чата на всех воркерах"""
+        frame = encode_frame(message)
+        await self.backplane.publish(
+            CHAT_EVENTS_TOPIC,
+            {
+                "kind": "chat",
+                "chat_id": str(chat_id),
+                "exclude_user": str(exclude_user) if exclude_user else None,
+                "frame": frame.text,
+                "frame_type": frame.event_type,
+            },
+        )
+
+    async def handle_backplane_event(self, event: dict):
+        """Доставка события из шины событий локальным сокетам"""
+        frame = EncodedFrame(event["frame"], event.get("frame_type"))
+        if event["kind"] == "personal":
+            await self.send_local_personal_message(frame, UUID(event["user_id"]))
+        elif event["kind"] == "chat":
+            exclude_user = event.get("exclude_user")
+            await self.send_local_chat_message(
+                frame,
+                UUID(event["chat_id"]),
+                exclude_user=UUID(exclude_user) if exclude_user else None,
+            )
+
+    async def send_local_personal_message(
+        self, message: dict | EncodedFrame, user_id: UUID
+    ):
+        """Отправка личного сообщения сокетам пользователя в текущем воркере"""
+        recipients = [
+            (socket, user_id) for socket in self.active_connections.get(user_id, ())
+        ]
+        await self._send_to_recipients(message, recipients)
+
+    async def send_local_chat_message(
+        self, message: dict | EncodedFrame, chat_id: UUID, exclude_user: UUID = None
+    ):
+        """Отправка сообщения участникам чата, подключенным к текущему воркеру"""
         if chat_id not in self.chat_connections:
             return
-        disconnected_sockets = []
-        for user_id, sockets in self.chat_connections[chat_id].copy().items():
+        recipients = [
+            (socket, user_id)
+            for user_id, sockets in self.chat_connections[chat_id].items()
             # Исключаем отправителя, если нужно
-            if exclude_user and user_id == exclude_user:
-                continue
+            if not (exclude_user and user_id == exclude_user)
+            for socket in sockets
+        ]
+        await self._send_to_recipients(message, recipients)
 
-            for socket in sockets.copy():
-                try:
-                    await self.send_message_to_socket(socket, message)
-                except Exception as e:
-                    logging.error(
-                        f"Error sending message to user {user_id} in chat {chat_id}: {e}"
-                    )
-                    disconnected_sockets.append((socket, user_id))
+    async def _send_to_recipients(
+        self, message: dict | EncodedFrame, recipients: list[tuple[WebSocket, UUID]]
+    ):
+        """Рассылка сообщения по сокетам.
+
+        Сообщение сериализуется один раз, во все сокеты уходит один и тот же текст.
+        Сокетам с исходящей очередью фрейм только ставится в очередь, остальным
+        отправляется параллельно с таймаутом на каждый сокет.
+        Сокеты, которые не успели принять сообщение, упали с ошибкой или
+        переполнили очередь, отключаются.
+        """
+        if not recipients:
+            return
 
-        for socket, user_id in disconnected_sockets:
-            await self.disconnect(socket, user_id)
+        frame = encode_frame(message)
+        started_at = time.perf_counter()
+        evicted = []
+        direct_recipients = []
+        for socket, user_id in recipients:
+            queue = self.outbound_queues.get(socket)
+            if queue is None:
+                direct_recipients.append((socket, user_id))
+            elif not queue.put(frame):
+                logging.warning("Outbound queue of user %s overflowed", user_id)
+                evicted.append(self.evict_socket(socket, user_id, 1013, "Slow consumer"))
+
+        results = await asyncio.gather(
+            *(
+                asyncio.wait_for(
+                    self.send_message_to_socket(socket, frame), self.send_timeout
+                )
+                for socket, _ in direct_recipients
+            ),
+            return_exceptions=True,
+        )
+        latency = time.perf_counter() - started_at
+
+        timeouts, errors = 0, 0
+        for (socket, user_id), result in zip(direct_recipients, results):
+            if not isinstance(result, BaseException):
+                continue
+            if isinstance(result, asyncio.TimeoutError):
+                timeouts += 1
+                logging.warning("Send to user %s timed out, disconnecting", user_id)
+                evicted.append(self.evict_socket(socket, user_id, 1013, "Slow consumer"))
+            else:
+                errors += 1
+                logging.error("Error sending message to user %s: %s", user_id, result)
+                evicted.append(self.evict_socket(socket, user_id, 1011, "Send failed"))
+        if evicted:
+            await asyncio.gather(*evicted)
+
+        self.broadcast_stats.record(len(recipients), latency, timeouts, errors)
+        if timeouts or errors:
+            logging.info(
+                "Broadcast to %s sockets took %.3fs, timeouts: %s, errors: %s",
+                len(recipients),
+                latency,
+                timeouts,
+                errors,
+            )
+
+    async def _handle_writer_failure(
+        self, socket: WebSocket, user_id: UUID, err: BaseException
+    ):
+        """Писатель исходящей очереди не смог отправить фрейм"""
+        is_timeout = isinstance(err, asyncio.TimeoutError)
+        self.broadcast_stats.record_failure(is_timeout)
+        if is_timeout:
+            logging.warning("Send to user %s timed out, disconnecting", user_id)
+            await self.evict_socket(socket, user_id, 1013, "Slow consumer")
+        else:
+            logging.error("Error sending message to user %s: %s", user_id, err)
+            await self.evict_socket(socket, user_id, 1011, "Send failed")
+
+    async def flush(self):
+        """Ожидание отправки всех фреймов из исходящих очередей"""
+        await asyncio.gather(
+            *(queue.join() for queue in list(self.outbound_queues.values()))
+        )
 
-    async def broadcast_to_chat(self, message: dict, chat_id: UUID):
+    async def evict_socket(
+        self, socket: WebSocket, user_id: UUID, code: int, reason: str
+    ):
+        """Отключение сокета, который не смог принять сообщение.
+
+        Сокет закрывается, чтобы клиент переподключился: после отмены отправки
+        фрейм мог остаться недописанным.
+        """
+        await self.disconnect(socket, user_id)
+        try:
+            await asyncio.wait_for(
+                self._close_socket(socket, code, reason), self.send_timeout
+            )
+        except Exception as err:
+            logging.debug("Error closing socket of user %s: %s", user_id, err)
+
+    async def broadcast_to_chat(self, message: dict | EncodedFrame, chat_id: UUID):
         """Рассылка сообщения всем участникам чата включая отправителя"""
         await self.send_chat_message(message, chat_id)
 
@@ -164,6 +354,60 @@ class ConnectionManager:
             "users_with_multiple_devices": users_with_multiple_devices,
         }
 
+    def get_broadcast_stats(self) -> dict:
+        """Получить статистику рассылок текущего воркера"""
+        return self.broadcast_stats.get_stats()
+
+    def get_metrics(self) -> list[Sample]:
+        """Метрики сокетов и рассылок текущего воркера для /metrics"""
+        stats = self.broadcast_stats
+        sockets = sum(len(sockets) for sockets in self.active_connections.values())
+        return [
+            Sample("ws_active_sockets", sockets, "Open WebSocket connections"),
+            Sample(
+                "ws_active_users",
+                sum(1 for sockets in self.active_connections.values() if sockets),
+                "Users with at least one open socket",
+            ),
+            Sample(
+                "ws_active_chats",
+                sum(1 for users in self.chat_connections.values() if users),
+                "Chats with at least one connected socket",
+            ),
+            Sample(
+                "ws_outbound_queue_events_total",
+                stats.dropped,
+                "Outbound socket queue events",
+                "counter",
+                {"event": "dropped"},
+            ),
+            Sample(
+                "ws_outbound_queue_events_total",
+                stats.coalesced,
+                kind="counter",
+                labels={"event": "coalesced"},
+            ),
+            Sample(
+                "ws_outbound_queue_events_total",
+                stats.overflows,
+                kind="counter",
+                labels={"event": "overflow"},
+            ),
+            Sample(
+                "ws_send_failures_total",
+                stats.timeouts,
+                "Sockets that failed to receive a message",
+                "counter",
+                {"reason": "timeout"},
+            ),
+            Sample(
+                "ws_send_failures_total",
+                stats.errors,
+                kind="counter",
+                labels={"reason": "error"},
+            ),
+        ]
+
     def is_user_online(self, user_id: UUID) -> bool:
         """Проверить, онлайн ли пользователь"""
         return (
@@ -173,7 +417,7 @@ class ConnectionManager:
 
     def get_user_connection_count(self, user_id: UUID) -> int:
         """Получить количество активных соединений пользователя"""
-        return len(self.active_connections.get(user_id, []))
+        return len(self.active_connections.get(user_id, ()))
 
     async def user_authorized(
         self, socket: WebSocket, profile_id: UUID, chat_id: UUID
@@ -215,12 +459,15 @@ class ConnectionManager:
     async def _close_socket(self, socket: WebSocket, code: int, reason: str) -> None:
         await socket.close(code=code, reason=reason)
 
-    async def send_message_to_socket(self, socket: WebSocket, message: dict):
-        await socket.send_text(json.dumps(message))
+    async def send_message_to_socket(
+        self, socket: WebSocket, message: dict | EncodedFrame
+    ):
+        await socket.send_text(encode_frame(message).text)
 
     async def receive_message_from_socket(self, socket: WebSocket) -> dict:
         message = await socket.receive_text()
         return json.loads(message)
 
 
-connection_manager = ConnectionManager()
+connection_manager = ConnectionManager(backplane)
+metrics.register_collector("connection_manager", connection_manager.get_metrics)
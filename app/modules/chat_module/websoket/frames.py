@@ -0,0 +1,67 @@
+import json
+import logging
+from typing import Callable
+
+from app.settings import config
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _json_dumps(message: dict) -> str:
+    return json.dumps(message)
+
+
+def _orjson_dumps(message: dict) -> str:
+    return orjson.dumps(message).decode()
+
+
+def get_dumps(backend: str) -> Callable[[dict], str]:
+    """Функция сериализации сообщений по настройке CHAT_JSON_BACKEND."""
+    if backend == "orjson":
+        if orjson is not None:
+            return _orjson_dumps
+        logging.warning("orjson is not installed, fallback to json")
+    return _json_dumps
+
+
+dumps = get_dumps(config.chat.json_backend)
+
+
+class EncodedFrame:
+    """Сообщение, сериализованное один раз для всех получателей.
+
+    Во все сокеты уходит один и тот же текст, между воркерами через шину
+    событий тоже передается уже готовый текст.
+    """
+
+    __slots__ = ("event_type", "text")
+
+    def __init__(self, text: str, event_type: str | None = None):
+        self.text = text
+        # тип события нужен политикам переполнения исходящей очереди
+        self.event_type = event_type
+
+    @classmethod
+    def from_message(cls, message: dict) -> "EncodedFrame":
+        return cls(dumps(message), message.get("type"))
+
+    @classmethod
+    def from_raw_field(cls, event_type: str, field: str, raw_json: str) -> "EncodedFrame":
+        """Сборка фрейма вида `{"type": ..., field: ...}` из уже сериализованного json.
+
+        Позволяет не превращать pydantic схему в словарь, а взять результат `model_dump_json`.
+        """
+        text = f'{{"type": {dumps(event_type)}, {dumps(field)}: {raw_json}}}'
+        return cls(text, event_type)
+
+    def __repr__(self) -> str:
+        return f"EncodedFrame({self.text!r})"
+
+
+def encode_frame(message: dict | EncodedFrame) -> EncodedFrame:
+    if isinstance(message, EncodedFrame):
+        return message
+    return EncodedFrame.from_message(message)
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Awaitable, Callable
+
+from app.modules.chat_module.websoket.broadcast_stats import BroadcastStats
+from app.modules.chat_module.websoket.frames import EncodedFrame
+from app.settings.chat_settings import OverflowPolicy
+
+TYPING_EVENTS = {"typing"}
+READ_RECEIPT_EVENTS = {"messages_read", "your_messages_read"}
+
+
+def merge_read_receipts(
+    queued: EncodedFrame, frame: EncodedFrame
+) -> EncodedFrame | None:
+    """Объединение двух уведомлений о прочтении одного читателя в одном чате.
+
+    Returns:
+        EncodedFrame | None: объединенный фрейм или None, если уведомления про разное
+    """
+    old, new = json.loads(queued.text), json.loads(frame.text)
+    if (old.get("chat_id"), old.get("read_by")) != (
+        new.get("chat_id"),
+        new.get("read_by"),
+    ):
+        return None
+
+    merged = dict(new)
+    if "message_ids" in old or "message_ids" in new:
+        message_ids = list(
+            dict.fromkeys([*old.get("message_ids", []), *new.get("message_ids", [])])
+        )
+        merged["message_ids"] = message_ids
+        merged["read_count"] = len(message_ids)
+    else:
+        merged["read_count"] = old.get("read_count", 0) + new.get("read_count", 0)
+    return EncodedFrame.from_message(merged)
+
+
+class OutboundQueue:
+    """Ограниченная исходящая очередь сокета.
+
+    Фреймы отправляет отдельная задача-писатель, поэтому рассылка только кладет
+    фрейм в очередь и не ждет сеть получателя. При переполнении по порядку
+    применяются политики из CHAT_OUTBOUND_OVERFLOW.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[EncodedFrame], Awaitable[None]],
+        on_failure: Callable[[BaseException], Awaitable[None]],
+        maxsize: int,
+        policies: list[OverflowPolicy],
+        send_timeout: float,
+        stats: BroadcastStats,
+    ):
+        self._send = send
+        self._on_failure = on_failure
+        self.maxsize = maxsize
+        self.policies = policies
+        self.send_timeout = send_timeout
+        self.stats = stats
+
+        self._frames: deque[EncodedFrame] = deque()
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: asyncio.Task | None = None
+        self.closed = False
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def close(self) -> None:
+        """Остановка писателя, неотправленные фреймы выбрасываются."""
+        self.closed = True
+        self._frames.clear()
+        self._idle.set()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    async def join(self) -> None:
+        """Ожидание, пока писатель отправит все фреймы из очереди."""
+        await self._idle.wait()
+
+    def put(self, frame: EncodedFrame) -> bool:
+        """Постановка фрейма в очередь.
+
+        Returns:
+            bool: False, если очередь переполнена и сокет нужно отключить
+        """
+        if self.closed:
+            return True
+
+        if len(self._frames) >= self.maxsize:
+            for policy in self.policies:
+                if policy == OverflowPolicy.drop_typing and self._drop_oldest_typing():
+                    break
+                if policy == OverflowPolicy.coalesce_read and self._coalesce(frame):
+                    return True
+                if policy == OverflowPolicy.disconnect:
+                    self.stats.overflows += 1
+                    return False
+            else:
+                self.stats.dropped += 1
+                logging.warning(
+                    "Outbound queue is full, drop %s event", frame.event_type
+                )
+                return True
+
+        self._frames.append(frame)
+        self._idle.clear()
+        self._wakeup.set()
+        return True
+
+    def _drop_oldest_typing(self) -> bool:
+        for index, queued in enumerate(self._frames):
+            if queued.event_type in TYPING_EVENTS:
+                del self._frames[index]
+                self.stats.dropped += 1
+                return True
+        return False
+
+    def _coalesce(self, frame: EncodedFrame) -> bool:
+        if frame.event_type not in READ_RECEIPT_EVENTS:
+            return False
+        for index, queued in enumerate(self._frames):
+            if queued.event_type != frame.event_type:
+                continue
+            merged = merge_read_receipts(queued, frame)
+            if merged is not None:
+                self._frames[index] = merged
+                self.stats.coalesced += 1
+                return True
+        return False
+
+    async def _run(self) -> None:
+        while True:
+            while not self._frames:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            frame = self._frames.popleft()
+            try:
+                await asyncio.wait_for(self._send(frame), self.send_timeout)
+            except Exception as err:
+                self.close()
+                await self._on_failure(err)
+                return
@@ -0,0 +1,43 @@
+from unittest.mock import Mock
+
+import pytest
+from sqlalchemy.pool import NullPool
+
+from app.adapters.db.pool import (
+    InstrumentedAsyncAdaptedQueuePool,
+    PoolStats,
+    get_pool_stats,
+)
+
+
+class TestPoolStats:
+    """Тесты статистики пула соединений"""
+
+    @pytest.fixture
+    def pool(self, monkeypatch):
+        stats = PoolStats()
+        monkeypatch.setattr(InstrumentedAsyncAdaptedQueuePool, "stats", stats)
+        monkeypatch.setattr("app.adapters.db.pool.pool_stats", stats)
+        return InstrumentedAsyncAdaptedQueuePool(
+            creator=Mock, pool_size=1, max_overflow=1, timeout=0.01
+        )
+
+    def test_checkout_is_measured(self, pool):
+        """Тест учета выдачи соединений и загрузки пула"""
+        first = pool.connect()
+        second = pool.connect()
+
+        stats = get_pool_stats(pool)
+        assert stats["mode"] == "queue"
+        assert stats["checked_out"] == 2
+        assert stats["utilization"] == 1.0
+        assert stats["checkouts"] == 2
+        assert stats["wait_max"] >= 0
+
+        first.close()
+        second.close()
+        assert get_pool_stats(pool)["checked_out"] == 0
+
+    def test_null_pool(self):
+        """Тест статистики без пула"""
+        assert get_pool_stats(NullPool(creator=Mock)) == {"mode": "null"}
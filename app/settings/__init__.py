@@ -1,5 +1,6 @@
 from .app_settings import AppSettings
 from .auth_settings import AuthSettings
+from .backplane_settings import BackplaneSettings
 from .base import ApiMode, BaseSettings
 from .chat_settings import ChatSettings
 from .db_settings import DBSettings
@@ -19,6 +20,7 @@ class Config(BaseSettings):
     smtp: SMTPSettings = SMTPSettings()
     auth: AuthSettings = AuthSettings()
     chat: ChatSettings = ChatSettings()
+    backplane: BackplaneSettings = BackplaneSettings()
 
 
 config = Config()
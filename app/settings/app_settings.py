@@ -25,7 +25,9 @@ class AppSettings(BaseSettings):
 
     redoc_path: Union[str, None] = None
     doc_path: str = "/docs"
-    no_log_endpoints: str = "docs,openapi.json"
+    no_log_endpoints: str = "docs,openapi.json,metrics"
+    # метрики Prometheus текущего воркера на {prefix}/metrics
+    metrics_enabled: bool = True
 
     http: Literal["http", "https"] = "https"
     route_confirm_password: str = "/setup-new-password"
@@ -0,0 +1,17 @@
+from typing import Literal
+
+from pydantic_settings import SettingsConfigDict
+
+from app.settings.base import BaseSettings
+
+
+class BackplaneSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="backplane_")
+
+    # memory - события живут в рамках одного процесса
+    # postgres - события рассылаются всем воркерам через LISTEN/NOTIFY
+    kind: Literal["memory", "postgres"] = "memory"
+    channel: str = "messenger_backplane"
+    # лимит NOTIFY в PostgreSQL - 8000 байт, оставляем запас на служебные поля
+    max_payload_size: int = 7000
+    reconnect_delay: float = 1.0
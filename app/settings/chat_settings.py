@@ -1,10 +1,53 @@
+from enum import Enum, unique
+from typing import Literal
+
+from pydantic import Field
 from pydantic_settings import SettingsConfigDict
 
 from app.settings.base import BaseSettings
 
 
+@unique
+class OverflowPolicy(str, Enum):
+    """Что делать, когда исходящая очередь сокета заполнена"""
+
+    drop_typing: str = "drop_typing"
+    coalesce_read: str = "coalesce_read"
+    disconnect: str = "disconnect"
+
+
 class ChatSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="chat_")
 
     cache_ttl_seconds: int = 60
     min_message_interval: float = 1.0
+    # сколько секунд ждать отправки сообщения в один сокет при рассылке
+    send_timeout: float = Field(default=5.0, gt=0)
+    # json - стандартная библиотека, orjson - быстрее, если пакет установлен
+    json_backend: Literal["json", "orjson"] = "json"
+    # размер исходящей очереди каждого сокета, 0 - отправлять без очереди
+    outbound_queue_size: int = Field(default=256, ge=0)
+    # политики переполнения очереди, применяются по порядку
+    outbound_overflow: str = "drop_typing,coalesce_read,disconnect"
+    # размер страницы истории по курсору, если limit не передан
+    history_page_size: int = Field(default=50, gt=0)
+    # подсчет общего количества сообщений истории, если клиент его не выбрал
+    history_count: Literal["exact", "estimated", "none"] = "estimated"
+    # кэш id профиля по id аккаунта для проверок доступа, 0 - без кэша
+    profile_cache_size: int = Field(default=10000, ge=0)
+    profile_cache_ttl: float = Field(default=300.0, ge=0)
+    # кэш участников чата для проверок доступа, 0 - без кэша
+    membership_cache_size: int = Field(default=10000, ge=0)
+    membership_cache_ttl: float = Field(default=60.0, ge=0)
+    # сколько секунд копить входящие сообщения для записи одной транзакцией
+    message_batch_delay: float = Field(default=0.005, ge=0)
+    # максимальный размер пачки сообщений в одной транзакции
+    message_batch_size: int = Field(default=100, gt=0)
+
+    @property
+    def overflow_policies(self) -> list[OverflowPolicy]:
+        return [
+            OverflowPolicy(policy.strip())
+            for policy in self.outbound_overflow.split(",")
+            if policy.strip()
+        ]
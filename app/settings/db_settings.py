@@ -1,5 +1,7 @@
 import os
+from typing import Literal
 
+from pydantic import Field
 from pydantic_settings import SettingsConfigDict
 
 from app.settings.base import BaseSettings
@@ -20,6 +22,20 @@ class DBSettings(BaseSettings):
     echo: bool = False
     chunk_size: int = 1000
 
+    # queue - пул соединений воркера, null - соединение на каждую сессию
+    # (для PgBouncer в режиме transaction)
+    pool_mode: Literal["queue", "null"] = "queue"
+    pool_size: int = Field(default=10, ge=1)
+    pool_max_overflow: int = Field(default=10, ge=-1)
+    pool_timeout: float = Field(default=30.0, gt=0)
+    # через сколько секунд переоткрывать соединение, -1 - не переоткрывать
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    # после скольких выполнений запрос становится prepared statement
+    prepare_threshold: int = Field(default=5, ge=0)
+    # размер кэша prepared statements одного соединения
+    prepared_max: int = Field(default=100, ge=1)
+
     @property
     def db_name(self):
         return (
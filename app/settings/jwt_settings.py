@@ -1,3 +1,6 @@
+from typing import Literal
+
+from pydantic import Field
 from pydantic_settings import SettingsConfigDict
 
 from .base import ApiMode, BaseSettings
@@ -14,6 +17,12 @@ class JWTSettings(BaseSettings):
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 60
     confirmation_token_expire_days: int = 2
+    # db - каждый токен ищется в таблице сессий (с кэшем),
+    # signature - проверка подписи и срока действия без обращения к БД
+    verify_mode: Literal["db", "signature"] = "db"
+    # кэш токенов, проверенных по БД; 0 отключает кэш
+    token_cache_size: int = Field(default=10000, ge=0)
+    token_cache_ttl: float = Field(default=60.0, ge=0)
 
     @property
     def token_expire(self) -> int:
@@ -1,6 +1,7 @@
 import logging
 from enum import Enum, unique
 
+from pydantic import Field
 from pydantic_settings import SettingsConfigDict
 
 from app.settings.base import BaseSettings
@@ -28,7 +29,31 @@ class LogSettings(BaseSettings):
     access_log_path: str = "./logs/access.log"
     asgi_log_path: str = "./logs/asgi.log"
     write_to_file: bool = False
+    # запись логов в отдельном потоке через очередь, цикл событий не ждет записи
+    queue: bool = False
+
+    # логирование запросов и ответов HTTP (LogMiddleware)
+    access_log: bool = False
+    # доля логируемых запросов от 0 до 1
+    access_sample_rate: float = Field(default=1.0, ge=0, le=1)
+    # доли по префиксу пути, самый длинный префикс важнее, {"/chats/": 0.1}
+    access_sample_routes: dict[str, float] = {}
+    # сколько байт каждого тела держать и писать в лог, остальное отрезается
+    access_body_max_size: int = Field(default=4096, ge=0)
+    # sha256 всего тела, считается по кускам без хранения тела
+    access_body_hash: bool = False
+    # запись лога одной строкой JSON вместо dict
+    access_json: bool = False
 
     @property
     def logging_level(self):
         return getattr(logging, self.level)
+
+    def access_sample_rate_for(self, path: str) -> float:
+        """Доля логируемых запросов для пути"""
+        prefixes = [
+            prefix for prefix in self.access_sample_routes if path.startswith(prefix)
+        ]
+        if not prefixes:
+            return self.access_sample_rate
+        return self.access_sample_routes[max(prefixes, key=len)]
@@ -0,0 +1,176 @@
+import math
+from bisect import bisect_left
+from typing import Callable, Iterable, NamedTuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# секунды, как у клиентов Prometheus по умолчанию
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Sample(NamedTuple):
+    """Значение метрики, которое коллектор снимает в момент запроса /metrics"""
+
+    name: str
+    value: float
+    documentation: str = ""
+    kind: str = "gauge"
+    labels: dict | None = None
+
+
+class Counter:
+    """Монотонный счетчик с метками"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[tuple[str, dict, float]]:
+        for labels, value in self._values.items():
+            yield self.name, dict(zip(self.labelnames, labels)), value
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами.
+
+    Наблюдение стоит одного бинарного поиска по корзинам, накопленные
+    значения `_bucket` считаются только при выдаче /metrics.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # метки -> [количество по корзинам + корзина +Inf, сумма]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        item = self._values.get(labels)
+        if item is None:
+            item = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        item[0][bisect_left(self.buckets, value)] += 1
+        item[1] += value
+
+    def count(self, *labels: str) -> int:
+        item = self._values.get(labels)
+        return sum(item[0]) if item is not None else 0
+
+    def samples(self) -> Iterable[tuple[str, dict, float]]:
+        for labels, (counts, total) in self._values.items():
+            labels = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                yield self.name + "_bucket", {**labels, "le": bound}, cumulative
+            yield self.name + "_sum", labels, total
+            yield self.name + "_count", labels, cumulative
+
+
+class MetricsRegistry:
+    """Метрики текущего воркера в текстовом формате Prometheus.
+
+    Счетчики и гистограммы копятся в памяти процесса, остальное снимается
+    коллекторами со статистики сервисов (get_stats) при каждом запросе
+    /metrics. Повторная регистрация под тем же именем возвращает уже
+    созданную метрику, поэтому модули можно импортировать повторно.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram] = {}
+        self._collectors: dict[str, Callable[[], Iterable[Sample]]] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        if name not in self._metrics:
+            self._metrics[name] = Counter(name, documentation, labelnames)
+        return self._metrics[name]
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, documentation, labelnames, buckets)
+        return self._metrics[name]
+
+    def register_collector(
+        self, name: str, collector: Callable[[], Iterable[Sample]]
+    ) -> None:
+        """Регистрация функции, отдающей метрики на момент запроса"""
+        self._collectors[name] = collector
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines += header(metric.name, metric.documentation, metric.kind)
+            lines += (line(*sample) for sample in metric.samples())
+
+        described = set()
+        for collector in self._collectors.values():
+            for sample in collector():
+                if sample.name not in described:
+                    described.add(sample.name)
+                    lines += header(sample.name, sample.documentation, sample.kind)
+                lines.append(line(sample.name, sample.labels, sample.value))
+        return "\n".join(lines) + "\n"
+
+
+def header(name: str, documentation: str, kind: str) -> list[str]:
+    return [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+
+
+def line(name: str, labels: dict | None, value: float) -> str:
+    if labels:
+        pairs = ",".join(f'{key}="{format_label(val)}"' for key, val in labels.items())
+        name = f"{name}{{{pairs}}}"
+    return f"{name} {format_value(value)}"
+
+
+def format_label(value) -> str:
+    if isinstance(value, float):
+        return format_value(value)
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(value) if isinstance(value, float) else str(int(value))
+
+
+def cache_samples(prefix: str, documentation: str, stats: dict) -> list[Sample]:
+    """Метрики TTLCache.get_stats: попадания, промахи и размер"""
+    return [
+        Sample(f"{prefix}_hits_total", stats["hits"], f"{documentation} hits", "counter"),
+        Sample(
+            f"{prefix}_misses_total",
+            stats["misses"],
+            f"{documentation} misses",
+            "counter",
+        ),
+        Sample(f"{prefix}_size", stats["size"], f"{documentation} entries"),
+    ]
+
+
+metrics = MetricsRegistry()
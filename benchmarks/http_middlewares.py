@@ -0,0 +1,161 @@
+"""Запросов в секунду на GET /chats/: мидлвари BaseHTTPMiddleware против ASGI.
+
+Запросы идут через httpx.ASGITransport в том же процессе, сервис чатов
+возвращает заготовленный список, поэтому замер показывает стоимость
+HTTP стека, а не БД.
+
+Запуск:
+    python -m benchmarks.http_middlewares [--chats 50] [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+from fastapi import FastAPI, Request, Response
+from httpx import ASGITransport, AsyncClient
+from starlette.background import BackgroundTask
+
+from app.fastapi_engine.middlewares import LogMiddleware, add_corse_middleware
+from app.fastapi_engine.middlewares.log_middleware import BodyLog, log_info
+from app.fastapi_engine.responses import EnvelopeJSONResponse
+from app.modules.auth_module.dependencies.jwt_decode import get_account_from_token
+from app.modules.chat_module.api import router
+from app.modules.chat_module.schemas.chat_schemas import ChatDBSchema, ChatSchema
+from app.modules.chat_module.schemas.profile_schemas import ProfileSchema  # noqa: F401
+from app.modules.chat_module.services.chat_service import ChatService
+from app.settings import config
+
+ChatSchema.model_rebuild()
+ChatDBSchema.model_rebuild()
+
+
+def full_body(body: bytes) -> BodyLog:
+    body_log = BodyLog(len(body))
+    body_log.add(body)
+    return body_log
+
+
+async def legacy_log_middleware(request: Request, call_next):
+    """log_middleware до перехода на ASGI, тела пишутся в лог целиком"""
+    task = None
+    req_body = await request.body()
+    response = await call_next(request)
+
+    res_body = b""
+    async for chunk in response.body_iterator:
+        res_body += chunk
+
+    if request.url.path not in config.app.no_log:
+        task = BackgroundTask(
+            log_info,
+            full_body(req_body),
+            full_body(res_body),
+            kwargs={
+                "req_headers": dict(request.headers),
+                "resp_headers": dict(response.headers),
+                "status_code": response.status_code,
+            },
+        )
+
+    return Response(
+        content=res_body,
+        status_code=response.status_code,
+        headers=dict(response.headers),
+        media_type=response.media_type,
+        background=task,
+    )
+
+
+async def legacy_meta_middleware(request: Request, call_next):
+    """success_middleware до перехода на EnvelopeJSONResponse"""
+    response = await call_next(request)
+    if response.status_code != 200:
+        return response
+
+    res_body = b""
+    async for chunk in response.body_iterator:
+        res_body += chunk
+    new_body = json.dumps({"status": "success", "data": json.loads(res_body)})
+    res = Response(
+        content=new_body.encode(),
+        status_code=response.status_code,
+        headers=dict(response.headers),
+        media_type="application/json",
+    )
+    res.headers["Content-Length"] = str(len(new_body))
+    return res
+
+
+def make_chats(size: int) -> list[dict]:
+    now = datetime(2025, 1, 1)
+    return [
+        {
+            "id": uuid4(),
+            "name": f"chat {i}",
+            "description": "chat description",
+            "owner": {"id": uuid4(), "first_name": "Иван", "username": f"user{i}"},
+            "stats": {"message_count": i, "last_sent_at": now},
+        }
+        for i in range(size)
+    ]
+
+
+def make_app(asgi: bool) -> FastAPI:
+    if asgi:
+        app = FastAPI(default_response_class=EnvelopeJSONResponse)
+        app.add_middleware(LogMiddleware)
+    else:
+        app = FastAPI()
+        app.middleware("http")(legacy_meta_middleware)
+        app.middleware("http")(legacy_log_middleware)
+    add_corse_middleware(app)
+    app.include_router(router)
+    app.dependency_overrides[get_account_from_token] = lambda: SimpleNamespace(
+        id=uuid4()
+    )
+    return app
+
+
+async def measure(app: FastAPI, requests: int) -> float:
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        for _ in range(50):
+            await client.get("/chats/")
+        start = time.perf_counter()
+        for _ in range(requests):
+            response = await client.get("/chats/")
+        elapsed = time.perf_counter() - start
+    assert response.json()["status"] == "success"
+    return requests / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, default=50, help="чатов в ответе")
+    parser.add_argument("--requests", type=int, default=2000, help="запросов")
+    args = parser.parse_args()
+
+    # записи лога создаются, но никуда не пишутся
+    logging.basicConfig(handlers=[logging.NullHandler()], level=logging.INFO, force=True)
+    chats = make_chats(args.chats)
+
+    async def accounts_chats(self, account_id):
+        return chats
+
+    ChatService.accounts_chats = accounts_chats
+
+    print(f"GET /chats/, {args.chats} чатов, {args.requests} запросов")
+    for name, asgi in (("BaseHTTPMiddleware", False), ("ASGI", True)):
+        rps = await measure(make_app(asgi), args.requests)
+        print(f"{name:<20}{rps:8.0f} rps")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
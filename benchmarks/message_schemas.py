@@ -0,0 +1,87 @@
+"""Сборка схем страницы истории: валидация против model_construct.
+
+Запуск:
+    python -m benchmarks.message_schemas [--page 1000] [--repeat 10] [--number 10]
+"""
+
+import argparse
+import time
+import timeit
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from pydantic import TypeAdapter
+
+from app.modules.base_module.db.cruds.base_crud import construct_schema, list_adapter
+from app.modules.chat_module.db.models.chat import MessageModel
+from app.modules.chat_module.db.models.profile import ProfileModel
+from app.modules.chat_module.schemas.message_schema import MessageDBSchema
+from app.modules.chat_module.schemas.profile_schemas import ProfileSchema  # noqa: F401
+
+MessageDBSchema.model_rebuild()
+
+
+def make_page(size: int, senders: int = 20) -> list[MessageModel]:
+    """Страница сообщений с отправителями, как ее возвращает selectinload"""
+    now = datetime(2025, 1, 1)
+    profiles = [
+        ProfileModel(
+            id=uuid4(),
+            first_name="Иван",
+            last_name="Иванов",
+            username=f"user{i}",
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(senders)
+    ]
+    chat_id = uuid4()
+    return [
+        MessageModel(
+            id=uuid4(),
+            chat_id=chat_id,
+            text=f"message {i}",
+            sent_at=now + timedelta(seconds=i),
+            read_at=None,
+            created_at=now,
+            updated_at=now,
+            sender_id=profiles[i % senders].id,
+            sender=profiles[i % senders],
+        )
+        for i in range(size)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page", type=int, default=1000, help="сообщений на странице")
+    parser.add_argument("--repeat", type=int, default=10, help="повторов замера")
+    parser.add_argument("--number", type=int, default=10, help="вызовов в замере")
+    args = parser.parse_args()
+
+    page = make_page(args.page)
+    cases = {
+        "сборка TypeAdapter": lambda: TypeAdapter(list[MessageDBSchema]),
+        "TypeAdapter на каждый вызов": lambda: TypeAdapter(
+            list[MessageDBSchema]
+        ).validate_python(page),
+        "общий TypeAdapter": lambda: list_adapter(MessageDBSchema).validate_python(
+            page
+        ),
+        "model_construct": lambda: [
+            construct_schema(MessageDBSchema, item) for item in page
+        ],
+    }
+    print(f"страница {args.page} сообщений, лучший из {args.repeat} замеров")
+    for name, case in cases.items():
+        case()
+        best = min(
+            timeit.repeat(
+                case, timer=time.process_time, number=args.number, repeat=args.repeat
+            )
+        )
+        print(f"{name:<30}{best / args.number * 1000:8.2f} мс")
+
+
+if __name__ == "__main__":
+    main()